@@ -45,6 +45,11 @@ class Article(BaseDataPermissionModel):
         verbose_name = '文章'
         verbose_name_plural = '文章管理'
         ordering = ['-created_at']
+        indexes = [
+            # 游标分页按 (created_at, id) 倒序；数据权限按所属部门过滤后同样按时间排序
+            models.Index(fields=['-created_at', '-id'], name='demo_article_created_idx'),
+            models.Index(fields=['owner_department', '-created_at', '-id'], name='demo_article_dept_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -97,6 +102,10 @@ class Project(BaseDataPermissionModel):
         verbose_name = '项目'
         verbose_name_plural = '项目管理'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='demo_project_created_idx'),
+            models.Index(fields=['owner_department', '-created_at', '-id'], name='demo_project_dept_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -128,6 +137,10 @@ class Document(BaseDataPermissionModel):
         verbose_name = '文档'
         verbose_name_plural = '文档管理'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='demo_document_created_idx'),
+            models.Index(fields=['owner_department', '-created_at', '-id'], name='demo_document_dept_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -198,6 +211,10 @@ class Task(BaseDataPermissionModel):
         verbose_name = '任务'
         verbose_name_plural = '任务管理'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='demo_task_created_idx'),
+            models.Index(fields=['owner_department', '-created_at', '-id'], name='demo_task_dept_idx'),
+        ]
     
     def __str__(self):
         return self.title
\ No newline at end of file
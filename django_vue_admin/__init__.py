@@ -1,2 +1,2 @@
-# Django应用启动时自动加载权限策略
+# 项目AppConfig（权限策略改为首次权限检查时按需载入）
 default_app_config = 'django_vue_admin.apps.DjangoVueAdminConfig'
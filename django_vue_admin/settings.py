@@ -51,6 +51,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'rbac.middleware.ApiLogMiddleware',  # API访问日志（异步批量写入）
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -136,7 +137,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'rbac.authentication.CachedJWTAuthentication',  # JWT认证，用户快照缓存见 rbac/authentication.py
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -144,7 +145,7 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rbac.renderers.ApiResponseRenderer',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'rbac.pagination.BoundedPageNumberPagination',  # 支持 page_size 参数，上限见视图 max_page_size
     'PAGE_SIZE': 20,
     'EXCEPTION_HANDLER': 'rbac.exceptions.custom_exception_handler',
 }
@@ -154,9 +155,55 @@ AUTH_USER_MODEL = 'rbac.User'
 
 # Casbin配置
 CASBIN_URL_MODEL = BASE_DIR / 'rbac' / 'rbac_model_url.conf'  # URL权限模型
+CASBIN_ENFORCE_CACHE_SIZE = 10000  # Enforcer 权限检查结果缓存条数
 
 # 简化RBAC配置
-USE_SIMPLE_RBAC = True  # 使用简化的RBAC系统（推荐）
+USE_SIMPLE_RBAC = True  # 使用简化的RBAC系统（推荐）；False 时使用 casbin Enforcer
+
+# 权限缓存版本配置（多worker部署时用于同步进程内权限缓存）
+RBAC_VERSION_BACKEND = 'rbac.versioning.DatabaseVersionBackend'  # 可选 rbac.versioning.FileVersionBackend
+RBAC_VERSION_FILE_DIR = BASE_DIR / 'cache_versions'  # FileVersionBackend 使用的目录
+RBAC_POLICY_CHECK_INTERVAL = 1  # 检查策略版本号的间隔（秒），即权限变更在其他worker生效的最大延迟
+RBAC_DATA_SCOPE_CACHE_SIZE = 1024  # 有效数据权限范围的进程内 LRU 缓存条数
+RBAC_MENU_CACHE_SIZE = 256  # 用户菜单树（按角色集合）的进程内 LRU 缓存条数
+RBAC_COUNT_CACHE_TTL = 30  # 列表总数缓存时间（秒），见 rbac.pagination.CachedCountPagination
+RBAC_COUNT_CACHE_SIZE = 1024  # 列表总数缓存条数
+RBAC_APPROX_COUNT_THRESHOLD = 100000  # 精确总数曾超过该值的查询改用执行计划估算值（PostgreSQL/MySQL）
+RBAC_USER_CACHE_TTL = 60  # JWT认证用户快照的最长缓存时间（秒），即绕过信号的用户变更（如停用）的最大生效延迟
+RBAC_USER_CACHE_SIZE = 4096  # JWT认证用户快照缓存条数
+RBAC_TOKEN_CLAIMS = False  # 在 access token 中写入角色、数据权限等授权声明，版本一致时授权不查询角色（见 rbac/authentication.py）
+RBAC_IMPORT_CHUNK_SIZE = 500  # 用户批量导入每块的行数，见 rbac.user_transfer
+RBAC_IMPORT_HASH_WORKERS = None  # 计算密码哈希的进程数（import_users 命令）/ 线程数（HTTP 导入接口），None 为CPU核数，0 为在当前线程中计算
+RBAC_IMPORT_MAX_ERRORS = 100  # 导入结果中最多返回的错误行数
+RBAC_IMPORT_MAX_ROWS = 5000  # HTTP 导入接口单次最多导入的行数，更大的文件使用 import_users 命令
+
+# 可信反向代理（IP 或网段），只有来自这些地址的请求才使用 X-Forwarded-For 确定客户端IP（API日志、最后登录IP）
+RBAC_TRUSTED_PROXIES = []
+
+# 登录吞吐配置（rbac.login）：密码哈希计算池与最后登录信息缓冲写入
+AUTHENTICATION_BACKENDS = ['rbac.login.PooledModelBackend']
+RBAC_LOGIN = {
+    'HASH_POOL': 'thread',  # None 在请求线程中计算 / thread 线程池 / process 进程池
+    'HASH_WORKERS': None,  # 池大小，None 为CPU核数
+    'MAX_PENDING': 64,  # 同时等待或计算中的密码校验数上限，超过时返回 429
+    'BUFFER_LAST_LOGIN': True,  # 缓冲写入 last_login / last_login_ip / last_login_time
+    'FLUSH_INTERVAL': 5.0,  # 最后登录信息的最长写入间隔（秒）
+    'BATCH_SIZE': 500,  # 累计多少个用户时立即写入
+}
+
+# API访问日志配置（rbac.middleware.ApiLogMiddleware，后台线程批量写入）
+API_LOG = {
+    'ENABLED': True,
+    'PATH_PREFIXES': ['/rbac/', '/business_demo/'],  # 只记录这些前缀的请求
+    'EXCLUDE_PATHS': [],  # 不记录的路径前缀
+    'QUEUE_SIZE': 10000,  # 内存队列容量
+    'BATCH_SIZE': 200,  # 每批 bulk_create 的条数
+    'FLUSH_INTERVAL': 2.0,  # 最长写入间隔（秒）
+    'OVERFLOW': 'drop',  # 队列满时：drop 丢弃新记录 / block 短暂等待后丢弃
+    'MAX_BODY_LENGTH': 2000,  # 请求/响应数据保存的最大长度
+    'RETENTION_DAYS': 30,  # 原始日志按天保留，prune_api_logs 整天删除过期日志
+    'STAT_RETENTION_DAYS': 365,  # 小时汇总（rollup_api_logs 生成）的保留天数
+}
 
 # CORS配置
 CORS_ALLOWED_ORIGINS = [
@@ -201,7 +248,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),     # 刷新令牌有效期
     'ROTATE_REFRESH_TOKENS': True,                   # 刷新时轮换令牌
     'BLACKLIST_AFTER_ROTATION': True,                # 轮换后黑名单旧令牌
-    'UPDATE_LAST_LOGIN': True,                       # 更新最后登录时间
+    'UPDATE_LAST_LOGIN': False,                      # 最后登录时间由 rbac.login.LastLoginBuffer 批量写入
     
     'ALGORITHM': 'HS256',                            # 算法
     'SIGNING_KEY': SECRET_KEY,                       # 签名密钥
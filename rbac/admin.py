@@ -3,7 +3,8 @@
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Role, UserRole, PolicyRule, Department, Menu, RoleMenu, ApiGroup, Api, ApiLog
+from .models import User, Role, UserRole, PolicyRule, Department, Menu, RoleMenu, ApiGroup, Api, ApiLog, ApiLogHourlyStat
+from .utils import count_subquery
 
 
 @admin.register(Department)
@@ -123,9 +124,13 @@ class ApiGroupAdmin(admin.ModelAdmin):
     ordering = ['sort_order', 'name']
     readonly_fields = ['created_at', 'updated_at']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(apis_count=count_subquery(Api.objects.all(), 'group'))
+    
     def api_count(self, obj):
-        return obj.api_set.count()
+        return obj.apis_count
     api_count.short_description = 'API数量'
+    api_count.admin_order_field = 'apis_count'
 
 
 @admin.register(Api)
@@ -164,3 +169,20 @@ class ApiLogAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return False  # 禁止删除日志
+
+
+@admin.register(ApiLogHourlyStat)
+class ApiLogHourlyStatAdmin(admin.ModelAdmin):
+    """API小时统计（由 rollup_api_logs 命令生成）"""
+    list_display = ['hour', 'api', 'request_count', 'error_count', 'avg_response_time',
+                    'p50_response_time', 'p95_response_time', 'p99_response_time']
+    list_filter = ['hour']
+    search_fields = ['api__name', 'api__path']
+    ordering = ['-hour']
+    list_select_related = ['api']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
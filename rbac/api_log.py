@@ -0,0 +1,222 @@
+"""
+API访问日志异步写入
+
+请求线程只把原始字段放入有界队列；后台线程按批次（BATCH_SIZE 条或每 FLUSH_INTERVAL 秒）
+完成敏感字段脱敏、匹配 Api 记录，并用 bulk_create 批量写入 ApiLog。
+队列满时按 OVERFLOW 策略处理：'drop' 直接丢弃新记录，'block' 最多等待 BLOCK_TIMEOUT 秒后丢弃。
+进程退出时（atexit）写入队列中剩余的记录。
+
+配置见 settings.API_LOG。
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .route_matcher import RouteMatcher
+from .simple_rbac import normalize_path
+from .versioning import API_VERSION, get_cached_version
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'PATH_PREFIXES': ['/rbac/', '/business_demo/'],  # 只记录这些前缀的请求
+    'EXCLUDE_PATHS': [],  # 不记录的路径前缀
+    'EXCLUDE_METHODS': ['OPTIONS', 'HEAD'],
+    'QUEUE_SIZE': 10000,  # 队列容量
+    'BATCH_SIZE': 200,  # 每批写入条数
+    'FLUSH_INTERVAL': 2.0,  # 最长写入间隔（秒）
+    'OVERFLOW': 'drop',  # 队列满时的策略: drop / block
+    'BLOCK_TIMEOUT': 0.05,  # OVERFLOW=block 时的最长等待（秒）
+    'MAX_BODY_LENGTH': 2000,  # 请求/响应数据保存的最大长度
+    'RETENTION_DAYS': 30,  # 原始日志保留天数（prune_api_logs）
+    'STAT_RETENTION_DAYS': 365,  # 小时汇总保留天数（prune_api_logs）
+    'SENSITIVE_FIELDS': [
+        'password', 'password_confirm', 'old_password', 'new_password',
+        'token', 'access', 'refresh', 'access_token', 'refresh_token',
+    ],
+}
+
+MASK = '******'
+
+_STOP = object()
+
+
+def get_api_log_settings():
+    """合并默认配置与 settings.API_LOG"""
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'API_LOG', {})}
+
+
+def mask_sensitive(text, fields, max_length):
+    """隐藏请求/响应数据中的敏感字段，并截断到 max_length"""
+    if not text:
+        return text
+    try:
+        masked = json.dumps(_mask_value(json.loads(text), fields), ensure_ascii=False)
+    except ValueError:
+        # 非 JSON（表单或被截断的内容）按 key=value / "key": "value" 形式替换
+        masked = text
+        for field in fields:
+            masked = re.sub(rf'("{field}"\s*:\s*)"[^"]*"?', rf'\1"{MASK}"', masked)
+            masked = re.sub(rf'(\b{field}=)[^&]*', rf'\1{MASK}', masked)
+    return masked[:max_length]
+
+
+def _mask_value(value, fields):
+    if isinstance(value, dict):
+        return {key: MASK if key in fields else _mask_value(item, fields) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_mask_value(item, fields) for item in value]
+    return value
+
+
+class ApiLogWriter:
+    """后台批量写入 ApiLog 的单例写入器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._matcher = None
+        self._matcher_version = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    # ===== 请求线程 =====
+
+    def enqueue(self, record):
+        """放入一条日志记录（dict），不做任何数据库操作；返回是否入队"""
+        self._ensure_started()
+        config = get_api_log_settings()
+        try:
+            if config['OVERFLOW'] == 'block':
+                self._queue.put(record, timeout=config['BLOCK_TIMEOUT'])
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _ensure_started(self):
+        # fork 之后（如 gunicorn preload）子进程需要自己的队列和线程
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            config = get_api_log_settings()
+            if self._pid != os.getpid() or self._queue is None:
+                self._queue = queue.Queue(maxsize=config['QUEUE_SIZE'])
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='api-log-writer', daemon=True)
+            self._thread.start()
+
+    # ===== 写入线程 =====
+
+    def _run(self):
+        config = get_api_log_settings()
+        batch = []
+        deadline = time.monotonic() + config['FLUSH_INTERVAL']
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._write(batch)
+                return
+            if record is not None:
+                batch.append(record)
+
+            if len(batch) >= config['BATCH_SIZE'] or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + config['FLUSH_INTERVAL']
+
+    def _write(self, records):
+        if not records:
+            return
+        from .models import ApiLog
+
+        config = get_api_log_settings()
+        fields = set(config['SENSITIVE_FIELDS'])
+        max_length = config['MAX_BODY_LENGTH']
+        try:
+            close_old_connections()
+            matcher = self._get_matcher()
+            logs = []
+            for record in records:
+                api_ids = matcher.match(record['method'], normalize_path(record['path']))
+                logs.append(ApiLog(
+                    user_id=record['user_id'],
+                    api_id=min(api_ids) if api_ids else None,
+                    method=record['method'],
+                    path=record['path'][:200],
+                    ip_address=record['ip_address'],
+                    user_agent=record['user_agent'],
+                    request_data=mask_sensitive(record['request_data'], fields, max_length),
+                    response_data=mask_sensitive(record['response_data'], fields, max_length),
+                    status_code=record['status_code'],
+                    response_time=record['response_time'],
+                    created_at=record['created_at'],
+                    log_date=timezone.localdate(record['created_at']),  # bulk_create 不调用 save()
+                ))
+            ApiLog.objects.bulk_create(logs, batch_size=config['BATCH_SIZE'])
+            self.written += len(logs)
+        except Exception:
+            self.failed += len(records)
+            logger.exception('写入API日志失败，丢弃 %s 条记录', len(records))
+        finally:
+            close_old_connections()
+
+    def _get_matcher(self):
+        """Api 路径匹配器，Api 表变更（版本号变化）后重建"""
+        from .models import Api
+
+        version = get_cached_version(API_VERSION)
+        if self._matcher is None or self._matcher_version != version:
+            self._matcher = RouteMatcher(Api.objects.values_list('method', 'path', 'id'))
+            self._matcher_version = version
+        return self._matcher
+
+    # ===== 关闭 =====
+
+    def flush(self, timeout=5.0):
+        """停止写入线程并写入队列中的剩余记录，之后的 enqueue 会重新启动线程"""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning('API日志队列已满，关闭时未能写入全部记录')
+            return
+        thread.join(timeout)
+
+    def get_stats(self):
+        return {
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+api_log_writer = ApiLogWriter()
+atexit.register(api_log_writer.flush)
@@ -0,0 +1,212 @@
+"""
+JWT 认证 - 用户快照缓存
+
+JWTAuthentication 每个请求都按 token 中的用户ID查询一次用户表。CachedJWTAuthentication
+把认证需要的用户字段缓存为进程内快照（UserSnapshot），命中时不访问数据库，直接用
+User.from_db 构造用户对象（其余字段为延迟加载，访问时才查询）。
+
+快照只包含用户表字段（不含角色，角色由权限引擎快照维护），在以下情况重新加载：
+- 该用户的版本号变化（用户保存或删除，见 rbac/signals.py）：只影响这一个用户，保存用户的进程
+  立即移除快照，其他 worker 每 RBAC_POLICY_CHECK_INTERVAL 秒检查一次该用户的版本号
+- 全局用户版本号变化：只在批量变更用户时递增（如删除部门时把其用户的 department_id 置空）
+- 超过 RBAC_USER_CACHE_TTL 秒（兜底：绕过信号的批量更新，如 queryset.update(is_active=False)）
+角色、策略、部门的变更不影响用户快照。停用用户最迟在 TTL 秒后生效。
+
+授权声明（settings.RBAC_TOKEN_CLAIMS = True 时启用）：
+登录 / 刷新时在 access token 中写入 role_ids、data_scope（有效数据权限）、department_id
+以及签发时的策略版本号、全局和该用户的用户版本号。版本号与当前一致时，认证把声明附加到
+request.user.token_claims，check_permission 和数据权限直接使用 token 中的角色和数据权限，不再查询角色；
+版本号不一致（签发后角色、权限或用户有变更）时忽略声明，回退到原有的查询 / 缓存。
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.db.models import DEFERRED
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import LRUCache
+from .versioning import (
+    POLICY_VERSION, USER_VERSION, get_backend, get_cached_version, get_version, user_version_name,
+)
+
+
+CLAIM_ROLE_IDS = 'role_ids'
+CLAIM_DATA_SCOPE = 'data_scope'
+CLAIM_DEPARTMENT_ID = 'department_id'
+CLAIM_POLICY_VERSION = 'policy_version'
+CLAIM_USER_VERSION = 'user_version'
+
+SNAPSHOT_FIELDS = ('id', 'username', 'is_superuser', 'is_active', 'department_id', 'data_scope')
+# 保存时会影响快照或授权声明的字段（update_fields 不含这些字段的保存不使快照失效，如最后登录信息）
+USER_CACHE_FIELDS = frozenset(SNAPSHOT_FIELDS + ('department', 'password'))
+
+_user_cache = LRUCache(
+    getattr(settings, 'RBAC_USER_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'RBAC_USER_CACHE_TTL', 60),
+)
+
+
+class UserSnapshot:
+    """认证用的用户快照（除检查时间 checked_until 外只读）"""
+
+    __slots__ = SNAPSHOT_FIELDS + ('global_version', 'user_version', 'checked_until', 'password_hash')
+
+    def __init__(self, values, global_version, user_version, password_hash=None):
+        for name, value in zip(SNAPSHOT_FIELDS, values):
+            setattr(self, name, value)
+        self.global_version = global_version  # 全局用户版本号
+        self.user_version = user_version  # 该用户的版本号
+        self.checked_until = 0.0  # 在此之前不再检查该用户的版本号
+        self.password_hash = password_hash  # 仅 CHECK_REVOKE_TOKEN 开启时保存密码的 MD5
+
+    def mark_checked(self):
+        self.checked_until = time.monotonic() + getattr(settings, 'RBAC_POLICY_CHECK_INTERVAL', 1)
+
+    def __repr__(self):
+        return f'<UserSnapshot id={self.id} username={self.username}>'
+
+    def to_user(self):
+        """构造用户对象（不访问数据库）"""
+        User = get_user_model()
+        fields = User._meta.concrete_fields
+        values = [getattr(self, f.attname) if f.attname in SNAPSHOT_FIELDS else DEFERRED for f in fields]
+        return User.from_db(router.db_for_read(User), [f.attname for f in fields], values)
+
+
+def get_user_version(user_id):
+    """该用户的当前版本号（直接读取后端，不进入进程内版本号缓存）"""
+    return get_version(user_version_name(user_id))
+
+
+def load_user_snapshot(user_id, global_version, user_version):
+    """从数据库加载快照（一次查询），用户不存在时返回 None"""
+    User = get_user_model()
+    fields = SNAPSHOT_FIELDS + (('password',) if api_settings.CHECK_REVOKE_TOKEN else ())
+    values = User.objects.filter(pk=user_id).values_list(*fields).first()
+    if values is None:
+        return None
+    password_hash = get_md5_hash_password(values[-1]) if api_settings.CHECK_REVOKE_TOKEN else None
+    return UserSnapshot(values[:len(SNAPSHOT_FIELDS)], global_version, user_version, password_hash)
+
+
+def get_user_snapshot(user_id):
+    """获取用户快照，版本号变化或过期时重新加载"""
+    global_version = get_cached_version(USER_VERSION)
+    snapshot = _user_cache.get(user_id)
+    if snapshot is not None and snapshot.global_version == global_version:
+        if time.monotonic() < snapshot.checked_until:
+            return snapshot
+        # 检查间隔已过：读取该用户的版本号，发现其他 worker 中的变更
+        user_version = get_user_version(user_id)
+        if user_version == snapshot.user_version:
+            snapshot.mark_checked()
+            return snapshot
+    else:
+        user_version = get_user_version(user_id)
+
+    # 先读取版本号再加载数据：加载期间发生的变更会使版本号不一致，下次检查时重新加载
+    snapshot = load_user_snapshot(user_id, global_version, user_version)
+    if snapshot is not None:
+        snapshot.mark_checked()
+        _user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    """使单个用户的快照和 token 授权声明失效：递增该用户的版本号，并移除本进程中的快照"""
+    get_backend().bump(user_version_name(user_id))
+    _user_cache.delete(user_id)
+
+
+def clear_user_cache():
+    """清空进程内的用户快照缓存"""
+    _user_cache.clear()
+
+
+def token_claims_enabled():
+    return getattr(settings, 'RBAC_TOKEN_CLAIMS', False)
+
+
+class AuthorizationClaims:
+    """token 中与当前版本一致的授权声明（只读）"""
+
+    __slots__ = ('role_ids', 'data_scope', 'department_id', 'policy_version')
+
+    def __init__(self, role_ids, data_scope, department_id, policy_version):
+        self.role_ids = role_ids  # 角色主键
+        self.data_scope = data_scope
+        self.department_id = department_id
+        self.policy_version = policy_version
+
+    def __repr__(self):
+        return f'<AuthorizationClaims roles={sorted(self.role_ids)} scope={self.data_scope} policy={self.policy_version}>'
+
+
+def add_authorization_claims(token, user):
+    """在 token 中写入授权声明"""
+    from .data_scope import resolve_scope
+    from .models import UserRole
+
+    # 先读取版本号再读取数据：读取期间发生的变更会使版本号不一致，声明被忽略而不会被误用
+    policy_version = get_cached_version(POLICY_VERSION)
+    user_version = [get_cached_version(USER_VERSION), get_user_version(user.pk)]
+    token[CLAIM_ROLE_IDS] = sorted(UserRole.objects.filter(user_id=user.pk).values_list('role_id', flat=True))
+    token[CLAIM_DATA_SCOPE] = resolve_scope(user).scope
+    token[CLAIM_DEPARTMENT_ID] = user.department_id
+    token[CLAIM_POLICY_VERSION] = policy_version
+    token[CLAIM_USER_VERSION] = user_version
+    return token
+
+
+def get_authorization_claims(validated_token, snapshot):
+    """token 的授权声明，未启用、没有声明、策略版本号已变化或用户版本号与用户快照不一致时返回 None"""
+    if not token_claims_enabled() or CLAIM_POLICY_VERSION not in validated_token:
+        return None
+    policy_version = validated_token[CLAIM_POLICY_VERSION]
+    if policy_version != get_cached_version(POLICY_VERSION) or \
+            validated_token.get(CLAIM_USER_VERSION) != [snapshot.global_version, snapshot.user_version]:
+        return None
+    try:
+        return AuthorizationClaims(
+            frozenset(validated_token[CLAIM_ROLE_IDS]),
+            validated_token[CLAIM_DATA_SCOPE],
+            validated_token[CLAIM_DEPARTMENT_ID],
+            policy_version,
+        )
+    except (KeyError, TypeError):
+        return None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """使用用户快照缓存的 JWTAuthentication（token 中的用户ID需为主键）"""
+
+    def get_user(self, validated_token):
+        try:
+            # token 中的用户ID为字符串，转换为主键类型，与按用户失效快照时使用的键一致
+            user_id = get_user_model()._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        snapshot = get_user_snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN and \
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != snapshot.password_hash:
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        user = snapshot.to_user()
+        claims = get_authorization_claims(validated_token, snapshot)
+        if claims is not None:
+            user.token_claims = claims
+        return user
@@ -2,19 +2,51 @@
 数据权限基础视图 - 所有业务ViewSet都应该继承这些基础类
 """
 from rest_framework import viewsets, status
+from rest_framework.exceptions import APIException
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db import transaction
 
 from .models import DataPermissionManager
+from .pagination import CachedCountPagination, KeysetPagination
 from .response import ApiResponse
 
 
 class BaseDataPermissionViewSet(viewsets.ModelViewSet):
     """
     数据权限基础ViewSet - 所有业务ViewSet都应该继承此类
+    
+    分页模式：
+    - page（默认）：CachedCountPagination 页码分页，count 短期缓存/可近似，仍需 OFFSET
+    - cursor：按 (created_at, id) 键集分页，不统计总数，深页与首页耗时相同
+    子类设置 pagination_mode = 'cursor' 默认使用游标分页；也可按请求传 ?pagination=cursor / page 选择
     """
     permission_classes = [IsAuthenticated]
+    pagination_mode = 'page'
+    pagination_class = CachedCountPagination
+    cursor_pagination_class = KeysetPagination
+    pagination_mode_query_param = 'pagination'
+    
+    def get_pagination_mode(self):
+        """本次请求使用的分页模式"""
+        mode = self.request.query_params.get(self.pagination_mode_query_param) if self.request else None
+        if mode not in ('page', 'cursor'):
+            mode = self.pagination_mode
+        # 带游标的请求（上一页/下一页链接）总是游标分页
+        if self.request and self.request.query_params.get(self.cursor_pagination_class.cursor_query_param):
+            mode = 'cursor'
+        return mode
+    
+    @property
+    def paginator(self):
+        """按分页模式选择分页器"""
+        if not hasattr(self, '_paginator'):
+            if self.get_pagination_mode() == 'cursor':
+                pagination_class = self.cursor_pagination_class
+            else:
+                pagination_class = self.pagination_class
+            self._paginator = pagination_class() if pagination_class else None
+        return self._paginator
     
     def get_queryset(self):
         """根据用户数据权限过滤查询集"""
@@ -51,6 +83,8 @@ class BaseDataPermissionViewSet(viewsets.ModelViewSet):
 
             serializer = self.get_serializer(queryset, many=True)
             return ApiResponse.success(data=serializer.data, message="获取数据成功")
+        except APIException:
+            raise  # 如无效的游标，交给异常处理器返回 4xx
         except Exception as e:
             return ApiResponse.server_error(f"获取数据失败: {str(e)}")
     
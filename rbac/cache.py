@@ -0,0 +1,68 @@
+"""
+进程内缓存工具
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    线程安全的有界 LRU 缓存，超出容量时淘汰最久未使用的条目
+
+    ttl 不为空时条目在写入 ttl 秒后过期
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl is not None:
+                expires, entry = entry
+                if expires <= time.monotonic():
+                    del self._data[key]
+                    entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, value):
+        with self._lock:
+            if self.ttl is not None:
+                value = (time.monotonic() + self.ttl, value)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        """命中则返回缓存值，否则调用 factory() 计算并写入（计算过程不持有锁）"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,79 @@
+"""
+Casbin 适配器 - 从 PolicyRule / UserRole 表批量载入策略
+
+- p 规则: (角色ID, 路径, 请求方法)，一次查询载入全部 PolicyRule
+- g 规则: (用户主体, 角色ID)，一次关联查询载入全部有效角色的 UserRole
+
+策略的写入仍然通过 Django 模型完成（由信号通知各 worker 重建），适配器只负责读取。
+"""
+from casbin import persist
+from casbin.model.policy import DEFAULT_SEP
+
+
+USER_SUBJECT_PREFIX = 'user:'
+
+
+def user_subject(user_id):
+    """用户在 casbin 中的主体名，加前缀避免与角色ID（'1'、'2'…）冲突"""
+    return f'{USER_SUBJECT_PREFIX}{user_id}'
+
+
+class PolicyFilter:
+    """按角色过滤策略：只载入这些角色的 p 规则及其 g 规则"""
+
+    def __init__(self, role_ids=None):
+        self.role_ids = None if role_ids is None else [str(role_id) for role_id in role_ids]
+
+
+class DjangoPolicyAdapter(persist.FilteredAdapter):
+    """基于 PolicyRule / UserRole 的只读批量适配器"""
+
+    def __init__(self, filter=None):
+        # 传入 filter 时 Enforcer 初始化不会载入全量策略，需随后调用 load_filtered_policy(filter)
+        self._filtered = filter is not None
+
+    def is_filtered(self):
+        return self._filtered
+
+    def load_policy(self, model):
+        """载入全部策略"""
+        self._filtered = False
+        self._load(model, None)
+
+    def load_filtered_policy(self, model, filter):
+        """按 PolicyFilter 载入部分角色的策略"""
+        role_ids = getattr(filter, 'role_ids', None)
+        self._filtered = role_ids is not None
+        self._load(model, role_ids)
+
+    def _load(self, model, role_ids):
+        from .models import PolicyRule, UserRole
+
+        policies = PolicyRule.objects.all()
+        user_roles = UserRole.objects.filter(role__is_active=True)
+        if role_ids is not None:
+            policies = policies.filter(role_id__in=role_ids)
+            user_roles = user_roles.filter(role__role_id__in=role_ids)
+
+        self._bulk_add(model, 'p', (
+            [role_id, path, method.upper()]
+            for role_id, path, method in policies.values_list('role_id', 'path', 'method').iterator()
+        ))
+        self._bulk_add(model, 'g', (
+            [user_subject(user_id), role_id]
+            for user_id, role_id in user_roles.values_list('user_id', 'role__role_id').iterator()
+        ))
+
+    @staticmethod
+    def _bulk_add(model, sec, rules):
+        """
+        直接写入 assertion，跳过 model.add_policy() 的逐条查重
+        （其查重是列表线性扫描，载入 n 条规则为 O(n²)）
+        """
+        assertion = model[sec][sec]
+        for rule in rules:
+            key = DEFAULT_SEP.join(rule)
+            if key in assertion.policy_map:
+                continue
+            assertion.policy_map[key] = len(assertion.policy)
+            assertion.policy.append(rule)
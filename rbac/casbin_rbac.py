@@ -0,0 +1,184 @@
+"""
+Casbin 权限引擎（USE_SIMPLE_RBAC = False 时启用）
+
+使用 settings.CASBIN_URL_MODEL 定义的模型，路径由注册的 routeMatch 函数匹配
+（即 route_matcher 的 {id} / * / ** 规则，与 USE_SIMPLE_RBAC = True 时的判定一致），
+策略由 DjangoPolicyAdapter 批量载入。Enforcer 与 simple_rbac 的快照一样按策略版本号
+整体重建并原子替换，重建后只读；enforce 结果按 (主体, 路径, 方法) 缓存，
+同一路径的重复检查不再逐条计算匹配表达式。
+"""
+import threading
+import time
+
+import casbin
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import LRUCache
+from .casbin_adapter import DjangoPolicyAdapter, PolicyFilter, user_subject
+from .route_matcher import route_match
+from .simple_rbac import SimpleRbacManager, normalize_path
+from .versioning import POLICY_VERSION, bump, get_version
+
+
+class CachedEnforcer(casbin.Enforcer):
+    """带 LRU 结果缓存的 Enforcer，重新载入策略时清空缓存"""
+
+    def __init__(self, *args, cache_size=10000, **kwargs):
+        self._cache = LRUCache(cache_size)
+        super().__init__(*args, **kwargs)
+        self.add_function('routeMatch', route_match)
+
+    def enforce(self, *rvals):
+        return self._cache.get_or_set(tuple(rvals), lambda: super(CachedEnforcer, self).enforce(*rvals))
+
+    def invalidate_cache(self):
+        self._cache.clear()
+
+    def load_policy(self):
+        super().load_policy()
+        self.invalidate_cache()
+
+    def load_filtered_policy(self, filter):
+        super().load_filtered_policy(filter)
+        self.invalidate_cache()
+
+
+def create_enforcer(role_ids=None):
+    """
+    创建 Enforcer
+
+    role_ids 为空时载入全部策略；否则只载入这些角色的策略及其用户关系，
+    用于只关心少数角色的场景（如校验某个角色的权限配置）。
+    """
+    model_path = str(getattr(settings, 'CASBIN_URL_MODEL', settings.BASE_DIR / 'rbac' / 'rbac_model_url.conf'))
+    cache_size = getattr(settings, 'CASBIN_ENFORCE_CACHE_SIZE', 10000)
+
+    if role_ids is None:
+        return CachedEnforcer(model_path, DjangoPolicyAdapter(), cache_size=cache_size)
+
+    policy_filter = PolicyFilter(role_ids)
+    enforcer = CachedEnforcer(model_path, DjangoPolicyAdapter(policy_filter), cache_size=cache_size)
+    enforcer.load_filtered_policy(policy_filter)
+    return enforcer
+
+
+class CasbinRbacManager:
+    """
+    Casbin 权限管理器，接口与 SimpleRbacManager 的读取部分一致
+
+    数据维护（add_role_policy 等）仍走 simple_rbac 中的模型写入，
+    变更由信号在事务提交后通过 apply_change() 通知，下次检查时重建 Enforcer。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._enforcer = None
+        self._version = None
+        self._next_check = 0.0
+        self._generation = 0
+        self._reload_count = 0
+        self._load_time = 0.0
+        self._loaded_at = None
+
+    # ===== Enforcer 管理 =====
+
+    @property
+    def version(self):
+        """当前 Enforcer 的策略版本号"""
+        self.get_enforcer()
+        return self._version
+
+    def get_enforcer(self):
+        """获取当前 Enforcer，必要时检查版本号并重建"""
+        enforcer = self._enforcer
+        now = time.monotonic()
+        if enforcer is not None and now < self._next_check:
+            return enforcer
+
+        version = get_version(POLICY_VERSION)
+        self._next_check = now + getattr(settings, 'RBAC_POLICY_CHECK_INTERVAL', 1)
+        if enforcer is not None and self._version == version:
+            return enforcer
+
+        return self._rebuild(version)
+
+    def reload_policies(self):
+        """强制从数据库重新载入全部策略"""
+        return self._rebuild(get_version(POLICY_VERSION))
+
+    def invalidate(self):
+        """丢弃当前 Enforcer，下次访问时重建"""
+        with self._lock:
+            self._generation += 1
+            self._enforcer = None
+
+    def apply_change(self, apply=None):
+        """
+        在事务提交后通知一次策略变更
+
+        Enforcer 不做增量修改（apply 参数仅为与 SimpleRbacManager 接口一致），
+        递增版本号后下次检查时整体重建。
+        """
+        bump(POLICY_VERSION)
+        with self._lock:
+            self._generation += 1
+            self._next_check = 0.0
+
+    def _rebuild(self, version):
+        generation = self._generation
+        started = time.perf_counter()
+        enforcer = create_enforcer()
+        load_time = time.perf_counter() - started
+        with self._lock:
+            if generation == self._generation:
+                self._enforcer = enforcer
+                self._version = version
+                self._load_time = load_time
+                self._loaded_at = timezone.now()
+                self._reload_count += 1
+        return enforcer
+
+    # ===== 权限检查 =====
+
+    def check_permission(self, user, url_path, method):
+        """检查用户是否有权限访问指定路径"""
+        if not user or not user.is_authenticated:
+            return False
+
+        if user.is_superuser:
+            return True
+
+        return self.get_enforcer().enforce(
+            user_subject(user.pk), normalize_path(url_path), method.upper()
+        )
+
+    def get_user_roles(self, user):
+        """获取用户的有效角色ID列表，user 可以是用户对象或用户名"""
+        user_id = SimpleRbacManager._get_user_id(user)
+        if user_id is None:
+            return []
+        return sorted(self.get_enforcer().get_roles_for_user(user_subject(user_id)))
+
+    def get_role_policies(self, role_id):
+        """获取角色权限 [(path, method)]"""
+        policies = self.get_enforcer().get_filtered_policy(0, str(role_id))
+        return sorted((path, method) for _, path, method in policies)
+
+    def get_stats(self):
+        """权限引擎统计信息"""
+        enforcer = self.get_enforcer()
+        policies = enforcer.get_policy()
+        grouping = enforcer.get_grouping_policy()
+        return {
+            'version': self._version,
+            'policy_count': len(policies),
+            'role_count': len({rule[0] for rule in policies} | {rule[1] for rule in grouping}),
+            'user_count': len({rule[0] for rule in grouping}),
+            'load_time_ms': round(self._load_time * 1000, 2),
+            'loaded_at': self._loaded_at,
+            'reload_count': self._reload_count,
+        }
+
+
+casbin_rbac_manager = CasbinRbacManager()
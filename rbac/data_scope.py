@@ -0,0 +1,134 @@
+"""
+有效数据权限范围
+
+用户的数据权限取其有效角色中最高的 data_scope（数字越小权限越高），没有角色时使用
+用户自身的 data_scope。解析结果 EffectiveScope 在一次请求内缓存在用户对象上，
+跨请求缓存在进程内 LRU 中，键包含用户、部门、自身 data_scope 以及策略/部门版本号，
+角色或部门变更后自动失效。
+"""
+from django.conf import settings
+from django.db.models import Min
+
+from .cache import LRUCache
+from .versioning import DEPARTMENT_VERSION, POLICY_VERSION, get_cached_version
+
+
+SCOPE_ALL = 1  # 全部数据
+SCOPE_DEPT_AND_BELOW = 2  # 本部门及以下数据
+SCOPE_DEPT = 3  # 本部门数据
+SCOPE_SELF = 4  # 本人数据
+
+# 部门ID超过该数量时改用闭包表子查询过滤，避免过长的 IN 列表
+MAX_INLINE_DEPARTMENT_IDS = 500
+
+_scope_cache = LRUCache(getattr(settings, 'RBAC_DATA_SCOPE_CACHE_SIZE', 1024))
+
+
+class EffectiveScope:
+    """某个用户的有效数据权限范围（只读）"""
+
+    __slots__ = ('user_id', 'scope', 'department_id', 'department_ids')
+
+    def __init__(self, user_id, scope, department_id=None, department_ids=frozenset()):
+        self.user_id = user_id
+        self.scope = scope
+        self.department_id = department_id
+        self.department_ids = department_ids  # 可访问的部门ID集合，scope 为 2/3 时有效
+
+    def __repr__(self):
+        return f'<EffectiveScope user={self.user_id} scope={self.scope} departments={len(self.department_ids)}>'
+
+    @property
+    def is_all(self):
+        return self.scope == SCOPE_ALL
+
+    @property
+    def fingerprint(self):
+        """能区分不同可见数据范围的摘要，可用作缓存键的一部分"""
+        if self.scope == SCOPE_ALL:
+            return (SCOPE_ALL,)
+        if self.scope == SCOPE_SELF:
+            return (SCOPE_SELF, self.user_id)
+        return (self.scope, self.department_id, hash(self.department_ids))
+
+    def filter_queryset(self, queryset, department_field=None, user_field=None):
+        """
+        按数据权限过滤查询集
+
+        Args:
+            queryset: 要过滤的查询集
+            department_field: 记录所属部门的ID字段，如 'owner_department_id'；为空时部门范围不可见
+            user_field: 记录所属用户的ID字段，如 'created_by_id'；为空时本人范围不可见
+        """
+        if self.scope == SCOPE_ALL:
+            return queryset
+
+        if self.scope in (SCOPE_DEPT_AND_BELOW, SCOPE_DEPT):
+            if not department_field or not self.department_ids:
+                return queryset.none()
+            if len(self.department_ids) > MAX_INLINE_DEPARTMENT_IDS:
+                from .models import DepartmentClosure
+                department_ids = DepartmentClosure.objects.descendant_ids(self.department_id)
+            else:
+                department_ids = self.department_ids
+            return queryset.filter(**{f'{department_field}__in': department_ids})
+
+        if not user_field:
+            return queryset.none()
+        return queryset.filter(**{user_field: self.user_id})
+
+
+def resolve_scope(user):
+    """从数据库解析用户的有效数据权限（不使用缓存）"""
+    from .models import DepartmentClosure, Role
+
+    if user.is_superuser:
+        return EffectiveScope(user.pk, SCOPE_ALL, user.department_id)
+
+    claims = getattr(user, 'token_claims', None)
+    if claims is not None:
+        # token 中的有效数据权限（版本号已在认证时校验，见 rbac/authentication.py）
+        scope = claims.data_scope
+    else:
+        scope = Role.objects.filter(
+            userrole__user_id=user.pk, is_active=True
+        ).aggregate(scope=Min('data_scope'))['scope']
+        if scope is None:
+            scope = getattr(user, 'data_scope', SCOPE_SELF) or SCOPE_SELF
+
+    department_id = user.department_id
+    department_ids = frozenset()
+    if department_id and scope == SCOPE_DEPT_AND_BELOW:
+        department_ids = frozenset(
+            DepartmentClosure.objects.descendant_ids(department_id).values_list('descendant_id', flat=True)
+        )
+    elif department_id and scope == SCOPE_DEPT:
+        department_ids = frozenset([department_id])
+    return EffectiveScope(user.pk, scope, department_id, department_ids)
+
+
+def get_effective_scope(user):
+    """
+    获取用户的有效数据权限范围
+
+    同一用户对象（即同一请求）内只解析一次；跨请求命中 LRU 时不访问数据库。
+    """
+    if not user or not user.is_authenticated:
+        return EffectiveScope(None, SCOPE_SELF)
+
+    cached = getattr(user, '_effective_scope', None)
+    if cached is not None:
+        return cached
+
+    key = (
+        user.pk, user.is_superuser, user.department_id, getattr(user, 'data_scope', None),
+        get_cached_version(POLICY_VERSION), get_cached_version(DEPARTMENT_VERSION),
+    )
+    scope = _scope_cache.get_or_set(key, lambda: resolve_scope(user))
+    user._effective_scope = scope
+    return scope
+
+
+def clear_scope_cache():
+    """清空进程内的数据权限缓存"""
+    _scope_cache.clear()
@@ -47,7 +47,10 @@ def custom_exception_handler(exc, context):
         elif 400 <= status_code < 500:
             # 其他客户端错误
             message = error_data.get('detail', '客户端请求错误') if isinstance(error_data, dict) else str(error_data)
-            return ApiResponse.error(message=message, http_status=status_code)
+            error_response = ApiResponse.error(message=message, http_status=status_code)
+            if 'Retry-After' in response:
+                error_response['Retry-After'] = response['Retry-After']
+            return error_response
         else:
             # 服务器错误
             logger.error(f"服务器错误: {exc}", exc_info=True)
@@ -0,0 +1,261 @@
+"""
+登录吞吐优化
+
+1. 密码校验线程池 / 进程池（LoginHashPool）
+   PBKDF2 等密码哈希是 CPU 密集型操作，登录高峰时会占满 worker。配置 HASH_POOL 后，
+   PooledModelBackend 把哈希计算交给有界的线程池（hashlib 计算时释放 GIL）或进程池，
+   同时在计算的请求数超过 MAX_PENDING 时直接返回 429，而不是让请求无限排队。
+
+2. 最后登录信息缓冲写入（LastLoginBuffer）
+   登录时只在内存中记录 last_login / last_login_ip / last_login_time，后台线程每
+   FLUSH_INTERVAL 秒或累计 BATCH_SIZE 个用户时用 bulk_update 批量写入（同一用户多次登录只写最后一次）。
+   进程退出时（atexit）写入剩余记录。
+
+配置见 settings.RBAC_LOGIN。
+"""
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.db import close_old_connections
+from rest_framework.exceptions import Throttled
+
+from .middleware import parse_ip
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'HASH_POOL': None,  # None 在请求线程中计算 / 'thread' 线程池 / 'process' 进程池
+    'HASH_WORKERS': None,  # 池大小，None 为 CPU 核数
+    'MAX_PENDING': 64,  # 同时等待或计算中的校验数上限，超过时返回 429
+    'RETRY_AFTER': 1,  # 429 响应的 Retry-After（秒）
+    'BUFFER_LAST_LOGIN': True,  # 缓冲写入最后登录信息
+    'FLUSH_INTERVAL': 5.0,  # 最后登录信息的最长写入间隔（秒）
+    'BATCH_SIZE': 500,  # 累计多少个用户时立即写入
+}
+
+LAST_LOGIN_FIELDS = ['last_login', 'last_login_ip', 'last_login_time']
+
+
+def get_login_settings():
+    """合并默认配置与 settings.RBAC_LOGIN"""
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'RBAC_LOGIN', {})}
+
+
+class LoginBusy(Throttled):
+    default_detail = '登录请求过多，请稍后重试'
+    default_code = 'login_busy'
+
+
+def _init_hash_worker():
+    """进程池初始化（spawn 方式启动的子进程需要重新加载 Django 配置）"""
+    import django
+    django.setup()
+
+
+class LoginHashPool:
+    """有界的密码哈希计算池"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._mode = None
+        self._pending = 0
+        self.rejected = 0
+
+    def run(self, func, *args):
+        """
+        执行 func(*args)（check_password / make_password），配置了池时在池中执行
+
+        正在等待或计算的任务数达到 MAX_PENDING 时抛出 LoginBusy
+        """
+        config = get_login_settings()
+        if not config['HASH_POOL']:
+            return func(*args)
+
+        with self._lock:
+            if self._pending >= config['MAX_PENDING']:
+                self.rejected += 1
+                raise LoginBusy(wait=config['RETRY_AFTER'])
+            self._pending += 1
+            executor = self._get_executor(config)
+        try:
+            return executor.submit(func, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _get_executor(self, config):
+        # fork 之后子进程需要自己的池；修改配置（如基准测试切换模式）后重建
+        if self._executor is not None and self._pid == os.getpid() and self._mode == config['HASH_POOL']:
+            return self._executor
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        workers = config['HASH_WORKERS'] or os.cpu_count()
+        if config['HASH_POOL'] == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self._pid = os.getpid()
+        self._mode = config['HASH_POOL']
+        return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def get_stats(self):
+        return {'mode': self._mode, 'pending': self._pending, 'rejected': self.rejected}
+
+
+login_hash_pool = LoginHashPool()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    密码哈希在 LoginHashPool 中计算的 ModelBackend
+
+    与 ModelBackend 行为一致（用户不存在时同样计算一次哈希以避免时序差异、必要时升级密码哈希），
+    未配置 HASH_POOL 时等同于 ModelBackend。
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            login_hash_pool.run(make_password, password)
+            return None
+
+        if not user.has_usable_password() or not login_hash_pool.run(check_password, password, user.password):
+            return None
+        self.upgrade_password(user, password)
+        if not self.user_can_authenticate(user):
+            return None
+        return user
+
+    @staticmethod
+    def upgrade_password(user, password):
+        """哈希算法或迭代次数变化后重新保存密码（与 AbstractBaseUser.check_password 一致）"""
+        preferred = get_hasher('default')
+        try:
+            hasher = identify_hasher(user.password)
+        except ValueError:
+            return
+        if hasher.algorithm != preferred.algorithm or preferred.must_update(user.password):
+            user.set_password(password)
+            user.save(update_fields=['password'])
+
+
+class LastLoginBuffer:
+    """缓冲最后登录信息，后台线程批量写入"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._pid = None
+        self.written = 0
+        self.failed = 0
+
+    def record(self, user, ip_address, login_time):
+        """
+        记录一次登录（同时更新内存中的 user 对象）；未开启缓冲时直接写入
+
+        ip_address 不是有效IP时记为空：一个无效值会使整批 bulk_update 失败（PostgreSQL inet 类型）
+        """
+        ip_address = parse_ip(ip_address) if ip_address else None
+        user.last_login = login_time
+        user.last_login_time = login_time
+        user.last_login_ip = ip_address
+
+        config = get_login_settings()
+        if not config['BUFFER_LAST_LOGIN']:
+            user.save(update_fields=LAST_LOGIN_FIELDS)
+            return
+
+        self._ensure_started()
+        with self._lock:
+            self._pending[user.pk] = (login_time, ip_address)
+            full = len(self._pending) >= config['BATCH_SIZE']
+        if full:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._pending = {}
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='last-login-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(get_login_settings()['FLUSH_INTERVAL'])
+            self._wakeup.clear()
+            self.write()
+
+    def write(self):
+        """写入当前缓冲的全部记录"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        UserModel = get_user_model()
+        users = []
+        for user_id, (login_time, ip_address) in pending.items():
+            user = UserModel(pk=user_id)
+            user.last_login = user.last_login_time = login_time
+            user.last_login_ip = ip_address
+            users.append(user)
+        try:
+            close_old_connections()
+            UserModel.objects.bulk_update(users, LAST_LOGIN_FIELDS, batch_size=get_login_settings()['BATCH_SIZE'])
+            self.written += len(users)
+        except Exception:
+            self.failed += len(users)
+            logger.exception('写入最后登录信息失败，丢弃 %s 条记录', len(users))
+        finally:
+            close_old_connections()
+
+    def flush(self, timeout=5.0):
+        """停止写入线程并写入剩余记录，之后的 record 会重新启动线程"""
+        if self._pid != os.getpid():
+            return
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._stopping = True
+            self._wakeup.set()
+            thread.join(timeout)
+        # 线程退出前最后一次写入之后 record 的记录
+        self.write()
+
+    def get_stats(self):
+        return {'pending': len(self._pending), 'written': self.written, 'failed': self.failed}
+
+
+last_login_buffer = LastLoginBuffer()
+atexit.register(last_login_buffer.flush)
+atexit.register(login_hash_pool.shutdown)
@@ -0,0 +1,115 @@
+"""
+登录基准测试 - 并发调用登录接口，统计每秒登录数和延迟
+"""
+import threading
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from rbac.login import get_login_settings, last_login_buffer, login_hash_pool
+from rbac.models import User
+from rbac.views import CustomTokenObtainPairView
+
+
+USERNAME_PREFIX = 'bench-login-'
+
+
+class Command(BaseCommand):
+    help = '登录基准测试：创建临时用户（结束后删除），按指定并发调用登录接口，输出每秒登录数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='临时用户数量')
+        parser.add_argument('--requests', type=int, default=200, help='登录请求总数')
+        parser.add_argument('--concurrency', type=int, default=8, help='并发线程数')
+        parser.add_argument('--pool', choices=['none', 'thread', 'process'], default=None,
+                            help='密码哈希计算方式，默认使用 RBAC_LOGIN 配置')
+        parser.add_argument('--workers', type=int, default=None, help='哈希计算池大小')
+        parser.add_argument('--max-pending', type=int, default=None, help='排队上限，超过返回 429')
+
+    def handle(self, *args, **options):
+        config = get_login_settings()
+        if options['pool'] is not None:
+            config['HASH_POOL'] = None if options['pool'] == 'none' else options['pool']
+        if options['workers'] is not None:
+            config['HASH_WORKERS'] = options['workers']
+        if options['max_pending'] is not None:
+            config['MAX_PENDING'] = options['max_pending']
+
+        password = 'bench-login-password'
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        encoded = make_password(password)
+        User.objects.bulk_create(
+            User(username=f'{USERNAME_PREFIX}{i}', password=encoded) for i in range(options['users'])
+        )
+        try:
+            with override_settings(RBAC_LOGIN=config):
+                results, elapsed = self.run(options, password)
+                last_login_buffer.write()
+        finally:
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+        if not results:
+            raise CommandError('没有执行任何登录请求')
+        latencies = sorted(latency for _, latency in results)
+        statuses = {}
+        for status_code, _ in results:
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+        succeeded = statuses.get(200, 0)
+
+        self.stdout.write(
+            f"哈希计算: {config['HASH_POOL'] or '请求线程'}  并发: {options['concurrency']}  请求数: {len(results)}"
+        )
+        self.stdout.write(f'状态码: {dict(sorted(statuses.items()))}')
+        self.stdout.write(
+            f'延迟: p50 {self.percentile(latencies, 0.5):.1f} ms  p95 {self.percentile(latencies, 0.95):.1f} ms  '
+            f'最大 {latencies[-1]:.1f} ms'
+        )
+        self.stdout.write(self.style.SUCCESS(f'吞吐: {succeeded / elapsed:.1f} 次登录/秒（总耗时 {elapsed:.2f} 秒）'))
+
+    def run(self, options, password):
+        factory = APIRequestFactory()
+        view = CustomTokenObtainPairView.as_view()
+        results = []
+        lock = threading.Lock()
+        counter = iter(range(options['requests']))
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        index = next(counter, None)
+                    if index is None:
+                        return
+                    data = {'username': f"{USERNAME_PREFIX}{index % options['users']}", 'password': password}
+                    request = factory.post('/rbac/auth/token/', data, format='json', HTTP_HOST='localhost')
+                    started = time.perf_counter()
+                    response = view(request)
+                    latency = (time.perf_counter() - started) * 1000
+                    with lock:
+                        results.append((response.status_code, latency))
+            finally:
+                connections.close_all()
+
+        # 预热：建立哈希计算池
+        view(factory.post('/rbac/auth/token/', {'username': f'{USERNAME_PREFIX}0', 'password': password},
+                          format='json', HTTP_HOST='localhost'))
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        login_hash_pool.shutdown()
+        return results, elapsed
+
+    @staticmethod
+    def percentile(values, fraction):
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * fraction))]
@@ -0,0 +1,95 @@
+"""
+路由匹配基准测试 - 对比前缀树匹配与逐条规则匹配
+"""
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from rbac.route_matcher import RouteMatcher
+
+
+def compile_pattern(pattern):
+    """把策略路径模式编译为正则，作为逐条匹配的基准实现"""
+    parts = []
+    for segment in pattern.split('/'):
+        if segment == '**':
+            parts.append('.*')
+        elif segment == '*':
+            parts.append('[^/]*')
+        elif segment.startswith('{') and segment.endswith('}'):
+            parts.append('[^/]+')
+        else:
+            parts.append(re.escape(segment))
+    return re.compile('^' + '/'.join(parts) + '$')
+
+
+class Command(BaseCommand):
+    help = '路由匹配基准测试：前缀树 vs 逐条规则匹配'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=int, default=10000, help='规则数量')
+        parser.add_argument('--requests', type=int, default=2000, help='请求数量')
+        parser.add_argument('--roles', type=int, default=50, help='角色数量')
+        parser.add_argument('--seed', type=int, default=42, help='随机种子')
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        methods = ['GET', 'POST', 'PUT', 'DELETE']
+        roles = [str(i) for i in range(1, options['roles'] + 1)]
+
+        rules = []
+        for i in range(options['rules']):
+            resource = f'res{i // 4}'
+            kind = i % 4
+            if kind == 0:
+                path = f'/rbac/api/{resource}/'
+            elif kind == 1:
+                path = f'/rbac/api/{resource}/{{id}}/'
+            elif kind == 2:
+                path = f'/rbac/api/{resource}/{{id}}/*/'
+            else:
+                path = f'/business_demo/{resource}/**'
+            rules.append((rnd.choice(methods), path, rnd.choice(roles)))
+
+        requests = []
+        for _ in range(options['requests']):
+            method, pattern, _ = rnd.choice(rules)
+            path = pattern.replace('{id}', str(rnd.randint(1, 10000)))
+            path = path.replace('/**', '/a/b/c/').replace('/*/', '/action/')
+            if rnd.random() < 0.5:
+                method = rnd.choice(methods)  # 约一半请求没有匹配规则
+            requests.append((method, path, set(rnd.sample(roles, 2))))
+
+        # 前缀树
+        started = time.perf_counter()
+        matcher = RouteMatcher(rules)
+        build_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        trie_results = [matcher.matches_any(method, path, user_roles) for method, path, user_roles in requests]
+        trie_time = time.perf_counter() - started
+
+        # 逐条规则匹配
+        compiled = [(method, compile_pattern(path), role_id) for method, path, role_id in rules]
+        started = time.perf_counter()
+        scan_results = [
+            any(
+                rule_method == method and role_id in user_roles and regex.match(path)
+                for rule_method, regex, role_id in compiled
+            )
+            for method, path, user_roles in requests
+        ]
+        scan_time = time.perf_counter() - started
+
+        if trie_results != scan_results:
+            self.stdout.write(self.style.ERROR('匹配结果不一致！'))
+            return
+
+        count = len(requests)
+        self.stdout.write(f'规则数: {len(rules)}  请求数: {count}  允许: {sum(trie_results)}')
+        self.stdout.write(f'前缀树构建: {build_time * 1000:.1f} ms')
+        self.stdout.write(f'前缀树匹配: {trie_time / count * 1e6:.2f} us/请求')
+        self.stdout.write(f'逐条匹配:   {scan_time / count * 1e6:.2f} us/请求')
+        self.stdout.write(self.style.SUCCESS(f'加速比: {scan_time / trie_time:.0f}x'))
@@ -0,0 +1,32 @@
+"""
+用户批量导出 - 导出为 CSV / NDJSON，格式与 import_users 一致
+"""
+from django.core.management.base import BaseCommand
+
+from rbac.models import User
+from rbac.user_transfer import FILE_TYPES, iter_export
+
+
+class Command(BaseCommand):
+    help = '导出用户为 CSV / NDJSON（可直接用于 import_users）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file-type', choices=FILE_TYPES, default='csv', help='文件格式')
+        parser.add_argument('--output', '-o', default=None, help='输出文件路径，默认输出到标准输出')
+        parser.add_argument('--department', default=None, help='只导出该部门编码下的用户')
+
+    def handle(self, *args, **options):
+        queryset = User.objects.all()
+        if options['department']:
+            queryset = queryset.filter(department__code=options['department'])
+
+        content = iter_export(queryset, options['file_type'])
+        if not options['output']:
+            for part in content:
+                self.stdout.write(part, ending='')
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for part in content:
+                output.write(part)
+        self.stdout.write(self.style.SUCCESS(f"已导出到 {options['output']}"))
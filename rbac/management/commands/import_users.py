@@ -0,0 +1,52 @@
+"""
+用户批量导入 - 从 CSV / NDJSON 文件导入用户、部门和角色（按编码）
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rbac.user_transfer import FILE_TYPES, UserImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = '从 CSV / NDJSON 文件批量导入用户（格式见 rbac/user_transfer.py）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='导入文件路径')
+        parser.add_argument('--file-type', choices=FILE_TYPES, help='文件格式，默认按扩展名')
+        parser.add_argument('--chunk-size', type=int, default=None, help='每块的行数')
+        parser.add_argument('--workers', type=int, default=None, help='计算密码哈希的进程数，0 为不使用进程池')
+        parser.add_argument('--default-password', default=None, help='行内未提供密码时使用的密码')
+        parser.add_argument('--dry-run', action='store_true', help='只校验，不写入')
+        parser.add_argument('--max-errors', type=int, default=50, help='最多输出的错误行数')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_type = options['file_type'] or path.rsplit('.', 1)[-1].lower()
+        if file_type not in FILE_TYPES:
+            raise CommandError('无法识别文件格式，请使用 --file-type 指定 csv 或 ndjson')
+
+        started = time.perf_counter()
+        try:
+            stream = open(path, 'rb')
+        except OSError as exc:
+            raise CommandError(f'无法打开文件: {exc}')
+        with stream, UserImporter(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            default_password=options['default_password'],
+            dry_run=options['dry_run'],
+            max_errors=options['max_errors'],
+        ) as importer:
+            result = importer.run(iter_rows(stream, file_type))
+        elapsed = time.perf_counter() - started
+
+        for error in result['errors']:
+            self.stderr.write(f"第 {error['line']} 行 {error['username']}: {error['errors']}")
+        if result['failed'] > len(result['errors']):
+            self.stderr.write(f"……其余 {result['failed'] - len(result['errors'])} 条错误未显示")
+
+        action = '校验通过' if options['dry_run'] else '导入'
+        self.stdout.write(self.style.SUCCESS(
+            f"共 {result['total']} 行，{action} {result['created']} 行，失败 {result['failed']} 行，耗时 {elapsed:.1f} 秒"
+        ))
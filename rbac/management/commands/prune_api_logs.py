@@ -0,0 +1,47 @@
+"""
+API日志保留策略 - 逐天、按主键分批删除过期的原始日志，并删除过期的小时汇总
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rbac.api_log import get_api_log_settings
+from rbac.models import ApiLog, ApiLogHourlyStat
+
+
+class Command(BaseCommand):
+    help = '删除超过保留天数的API日志（逐天按主键分批 DELETE）和小时汇总'
+
+    def add_arguments(self, parser):
+        config = get_api_log_settings()
+        parser.add_argument('--days', type=int, default=config['RETENTION_DAYS'], help='原始日志保留天数')
+        parser.add_argument('--stat-days', type=int, default=config['STAT_RETENTION_DAYS'], help='小时汇总保留天数')
+        parser.add_argument('--batch-size', type=int, default=ApiLog.objects.DELETE_BATCH_SIZE,
+                            help='每条 DELETE 最多删除的日志条数')
+        parser.add_argument('--dry-run', action='store_true', help='只列出将删除的日期，不实际删除')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        cutoff = today - timedelta(days=options['days'])
+        log_dates = ApiLog.objects.log_dates(before=cutoff)
+
+        total = 0
+        for log_date in log_dates:
+            if options['dry_run']:
+                self.stdout.write(f'将删除 {log_date} 的日志')
+                continue
+            deleted = ApiLog.objects.delete_day(log_date, batch_size=options['batch_size'])
+            total += deleted
+            self.stdout.write(f'{log_date}: 删除 {deleted} 条日志')
+
+        stat_cutoff = timezone.now() - timedelta(days=options['stat_days'])
+        stats = ApiLogHourlyStat.objects.filter(hour__lt=stat_cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'将删除 {stats.count()} 条小时汇总')
+            return
+        stat_deleted, _ = stats.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'清理完成：{len(log_dates)} 天共 {total} 条日志，{stat_deleted} 条小时汇总'
+        ))
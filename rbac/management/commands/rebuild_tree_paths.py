@@ -0,0 +1,24 @@
+"""
+重建部门/菜单的树结构冗余数据 - tree_path、level 与部门闭包表
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rbac.models import Department, DepartmentClosure, Menu
+from rbac.versioning import DEPARTMENT_VERSION, bump_version
+
+
+class Command(BaseCommand):
+    help = '根据 parent 关系重建部门和菜单的 tree_path / level 以及部门闭包表'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            departments = Department.rebuild_tree_paths()
+            menus = Menu.rebuild_tree_paths()
+            closure_rows = DepartmentClosure.objects.rebuild()
+            bump_version(DEPARTMENT_VERSION)
+
+        self.stdout.write(f'部门 tree_path 更新: {departments} 条')
+        self.stdout.write(f'菜单 tree_path 更新: {menus} 条')
+        self.stdout.write(f'部门闭包表重建: {closure_rows} 行')
+        self.stdout.write(self.style.SUCCESS('树结构数据重建完成'))
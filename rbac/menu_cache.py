@@ -0,0 +1,96 @@
+"""
+用户菜单树缓存
+
+拥有相同角色集合的用户菜单完全相同，因此菜单树按 (排序后的角色ID元组, 菜单版本号)
+缓存为已序列化的 JSON 响应体。Menu / RoleMenu 变更时递增菜单版本号（见 signals.py），
+旧条目自然失效并被 LRU 淘汰。
+"""
+from django.conf import settings
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+
+from .cache import LRUCache
+from .versioning import MENU_VERSION, get_cached_version
+
+
+SUPERUSER_KEY = ('*',)
+
+_menu_cache = LRUCache(getattr(settings, 'RBAC_MENU_CACHE_SIZE', 256))
+_breadcrumb_cache = LRUCache(2)
+
+
+def get_menu_key(user):
+    """用户的菜单缓存键：超级用户为固定值，其他用户为有效角色ID的有序元组（取自当前权限引擎）"""
+    if user.is_superuser:
+        return SUPERUSER_KEY
+    from .simple_rbac import get_rbac_manager
+    return tuple(get_rbac_manager().get_user_roles(user))
+
+
+def get_menu_cache_key(user):
+    """(菜单缓存键, 菜单版本号)，同时用于生成 ETag（不访问菜单数据）"""
+    return get_menu_key(user), get_cached_version(MENU_VERSION)
+
+
+def load_menus(menu_key):
+    """一次查询取出角色集合可见的菜单（附带上级菜单与子菜单数量）"""
+    from .models import Menu
+
+    menus = Menu.objects.filter(status=True, visible=True)
+    if menu_key != SUPERUSER_KEY:
+        menus = menus.filter(rolemenu__role__role_id__in=menu_key).distinct()
+    return list(
+        menus.select_related('parent')
+        .annotate(children_count=Count('children', distinct=True))
+        .order_by('sort_order')
+    )
+
+
+def get_menu_tree_bytes(key, message='获取用户菜单成功'):
+    """
+    获取菜单树的 JSON 响应体
+
+    Args:
+        key: get_menu_cache_key() 的返回值
+    """
+    from .views.auth import build_menu_tree
+
+    def render():
+        payload = {
+            'code': 0,
+            'message': message,
+            'data': build_menu_tree(load_menus(key[0])),
+            'success': True,
+        }
+        return JSONRenderer().render(payload)
+
+    return _menu_cache.get_or_set(key, render)
+
+
+def build_breadcrumbs():
+    """
+    一次查询取出全部菜单，按 tree_path 自上而下生成 {(菜单ID, 上级菜单ID): 上级菜单标题列表}
+
+    键中带上级菜单ID，移动过上级的菜单不会命中旧条目；只保存上级标题，菜单自身标题取当前值。
+    """
+    from .models import Menu
+
+    rows = sorted(Menu.objects.order_by().values_list('id', 'title', 'parent_id', 'tree_path'), key=lambda row: row[3].count('/'))
+    titles = {}
+    breadcrumbs = {}
+    for menu_id, title, parent_id, _ in rows:
+        ancestors = titles.get(parent_id, [])
+        breadcrumbs[(menu_id, parent_id)] = ancestors
+        titles[menu_id] = ancestors + [title]
+    return breadcrumbs
+
+
+def get_breadcrumbs():
+    """全部菜单的上级标题，按菜单版本号缓存，Menu 变更后重建"""
+    return _breadcrumb_cache.get_or_set(get_cached_version(MENU_VERSION), build_breadcrumbs)
+
+
+def clear_menu_cache():
+    """清空进程内的菜单树与面包屑缓存"""
+    _menu_cache.clear()
+    _breadcrumb_cache.clear()
@@ -0,0 +1,123 @@
+"""
+RBAC 中间件
+"""
+import functools
+import ipaddress
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .api_log import api_log_writer, get_api_log_settings
+
+
+LOGGED_CONTENT_TYPES = ('application/json', 'application/x-www-form-urlencoded')
+
+
+class ApiLogMiddleware:
+    """
+    API访问日志中间件
+
+    只在请求线程中收集原始字段并放入内存队列，由 api_log.ApiLogWriter 后台批量写入，
+    请求路径上不产生任何数据库写操作。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_api_log_settings()
+        if not self.should_log(request, config):
+            return self.get_response(request)
+
+        # 必须在视图读取请求体之前获取
+        request_data = self.get_request_data(request, config)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        response_time = time.perf_counter() - start
+
+        user = getattr(request, 'user', None)
+        api_log_writer.enqueue({
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'method': request.method,
+            'path': request.path,
+            'ip_address': get_client_ip(request) or '0.0.0.0',
+            'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+            'request_data': request_data,
+            'response_data': self.get_response_data(response, config),
+            'status_code': response.status_code,
+            'response_time': response_time,
+            'created_at': timezone.now(),
+        })
+        return response
+
+    @staticmethod
+    def should_log(request, config):
+        if not config['ENABLED'] or request.method in config['EXCLUDE_METHODS']:
+            return False
+        path = request.path
+        if not any(path.startswith(prefix) for prefix in config['PATH_PREFIXES']):
+            return False
+        return not any(path.startswith(prefix) for prefix in config['EXCLUDE_PATHS'])
+
+    @staticmethod
+    def get_request_data(request, config):
+        """JSON / 表单请求体（超长截断），文件上传等其他类型不记录"""
+        if request.method == 'GET':
+            return request.META.get('QUERY_STRING', '')[:config['MAX_BODY_LENGTH']]
+        if not request.content_type.startswith(LOGGED_CONTENT_TYPES):
+            return ''
+        try:
+            body = request.body[:config['MAX_BODY_LENGTH']]
+        except Exception:
+            return ''
+        return body.decode('utf-8', errors='replace')
+
+    @staticmethod
+    def get_response_data(response, config):
+        if response.streaming:
+            return ''
+        return response.content[:config['MAX_BODY_LENGTH']].decode('utf-8', errors='replace')
+
+
+def parse_ip(value):
+    """规范化的IP地址字符串，不是有效IP时返回 None"""
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except (AttributeError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def _trusted_networks(proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def is_trusted_proxy(ip):
+    """ip 是否属于 settings.RBAC_TRUSTED_PROXIES（IP 或网段列表）"""
+    networks = _trusted_networks(tuple(getattr(settings, 'RBAC_TRUSTED_PROXIES', ())))
+    address = ipaddress.ip_address(ip)
+    return any(address in network for network in networks)
+
+
+def get_client_ip(request):
+    """
+    客户端IP（已校验为有效地址），无法确定时返回 None
+
+    只有 REMOTE_ADDR 是可信代理时才使用 X-Forwarded-For：从右向左跳过可信代理，
+    取第一个不是可信代理的地址；遇到无效值时停止，使用已经过的最后一个地址。
+    """
+    remote_addr = parse_ip(request.META.get('REMOTE_ADDR', ''))
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if remote_addr is None or not forwarded or not is_trusted_proxy(remote_addr):
+        return remote_addr
+
+    client_ip = remote_addr
+    for value in reversed(forwarded.split(',')):
+        ip = parse_ip(value)
+        if ip is None:
+            break
+        client_ip = ip
+        if not is_trusted_proxy(ip):
+            break
+    return client_ip
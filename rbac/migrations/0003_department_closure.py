@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_department_closure(apps, schema_editor):
+    """根据现有 parent 关系生成闭包表"""
+    Department = apps.get_model('rbac', 'Department')
+    DepartmentClosure = apps.get_model('rbac', 'DepartmentClosure')
+
+    parents = dict(Department.objects.values_list('id', 'parent_id'))
+    rows = []
+    for department_id in parents:
+        ancestor_id, depth = department_id, 0
+        while ancestor_id is not None and depth <= len(parents):
+            rows.append(DepartmentClosure(ancestor_id=ancestor_id, descendant_id=department_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    DepartmentClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac', '0002_cache_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(default=0, verbose_name='层级距离')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='rbac.department', verbose_name='祖先部门')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='rbac.department', verbose_name='后代部门')),
+            ],
+            options={
+                'verbose_name': '部门闭包',
+                'verbose_name_plural': '部门闭包',
+                'db_table': 'rbac_department_closure',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='rbac_dept_closure_desc_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(build_department_closure, migrations.RunPython.noop),
+    ]
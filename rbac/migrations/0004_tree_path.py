@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:39
+
+from django.db import migrations, models
+
+
+def build_tree_paths(apps, schema_editor):
+    """根据现有 parent 关系生成 tree_path / level"""
+    for model_name in ('Department', 'Menu'):
+        model = apps.get_model('rbac', model_name)
+        nodes = list(model.objects.only('id', 'parent_id', 'tree_path', 'level'))
+        children = {}
+        for node in nodes:
+            children.setdefault(node.parent_id, []).append(node)
+
+        stack = [(node, '/', 1) for node in children.get(None, [])]
+        while stack:
+            node, parent_path, level = stack.pop()
+            node.tree_path = f'{parent_path}{node.pk}/'
+            node.level = level
+            stack.extend((child, node.tree_path, level + 1) for child in children.get(node.pk, []))
+        model.objects.bulk_update(nodes, ['tree_path', 'level'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac', '0003_department_closure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='tree_path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='树路径'),
+        ),
+        migrations.AddField(
+            model_name='menu',
+            name='level',
+            field=models.IntegerField(default=1, verbose_name='层级'),
+        ),
+        migrations.AddField(
+            model_name='menu',
+            name='tree_path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='树路径'),
+        ),
+        migrations.RunPython(build_tree_paths, migrations.RunPython.noop),
+    ]
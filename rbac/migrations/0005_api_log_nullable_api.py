@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac', '0004_tree_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='apilog',
+            name='api',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='rbac.api', verbose_name='API'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import TruncDate
+
+
+def fill_log_date(apps, schema_editor):
+    """按 created_at 填充已有日志的日期分桶键"""
+    ApiLog = apps.get_model('rbac', 'ApiLog')
+    ApiLog.objects.filter(log_date__isnull=True).update(log_date=TruncDate('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac', '0005_api_log_nullable_api'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApiLogHourlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='小时')),
+                ('request_count', models.PositiveIntegerField(default=0, verbose_name='请求数')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='错误数')),
+                ('avg_response_time', models.FloatField(default=0, verbose_name='平均响应时间(秒)')),
+                ('p50_response_time', models.FloatField(default=0, verbose_name='P50响应时间(秒)')),
+                ('p95_response_time', models.FloatField(default=0, verbose_name='P95响应时间(秒)')),
+                ('p99_response_time', models.FloatField(default=0, verbose_name='P99响应时间(秒)')),
+                ('max_response_time', models.FloatField(default=0, verbose_name='最大响应时间(秒)')),
+            ],
+            options={
+                'verbose_name': 'API小时统计',
+                'verbose_name_plural': 'API小时统计',
+                'db_table': 'rbac_api_log_hourly_stat',
+                'ordering': ['-hour', 'api'],
+            },
+        ),
+        migrations.AddField(
+            model_name='apilog',
+            name='log_date',
+            field=models.DateField(editable=False, null=True, verbose_name='日志日期'),
+        ),
+        migrations.RunPython(fill_log_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='apilog',
+            name='log_date',
+            field=models.DateField(editable=False, verbose_name='日志日期'),
+        ),
+        migrations.AddIndex(
+            model_name='apilog',
+            index=models.Index(fields=['log_date'], name='rbac_apilog_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apilog',
+            index=models.Index(fields=['-created_at', '-id'], name='rbac_apilog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apilog',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='rbac_apilog_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apilog',
+            index=models.Index(fields=['api', '-created_at', '-id'], name='rbac_apilog_api_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apilog',
+            index=models.Index(fields=['status_code', '-created_at', '-id'], name='rbac_apilog_status_idx'),
+        ),
+        migrations.AddField(
+            model_name='apiloghourlystat',
+            name='api',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hourly_stats', to='rbac.api', verbose_name='API'),
+        ),
+        migrations.AddIndex(
+            model_name='apiloghourlystat',
+            index=models.Index(fields=['hour', 'api'], name='rbac_apistat_hour_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apiloghourlystat',
+            index=models.Index(fields=['api', 'hour'], name='rbac_apistat_api_idx'),
+        ),
+    ]
@@ -4,10 +4,11 @@ RBAC模型模块 - 导入拆分后的模型
 from .models.base import BaseDataPermissionModel, DataPermissionModelManager, DataPermissionManager
 from .models.user import User, UserRole
 from .models.role import Role
-from .models.department import Department
+from .models.department import Department, DepartmentClosure
 from .models.menu import Menu, RoleMenu
-from .models.api import ApiGroup, Api, ApiLog
+from .models.api import ApiGroup, Api, ApiLog, ApiLogHourlyStat
 from .models.permission import PolicyRule
+from .models.version import CacheVersion
 
 # 保持向后兼容
 __all__ = [
@@ -18,10 +19,13 @@ __all__ = [
     'UserRole',
     'Role',
     'Department',
+    'DepartmentClosure',
     'Menu',
     'RoleMenu',
     'ApiGroup',
     'Api',
     'ApiLog',
+    'ApiLogHourlyStat',
     'PolicyRule',
+    'CacheVersion',
 ]
@@ -4,10 +4,11 @@ RBAC模型模块
 from .base import BaseDataPermissionModel, DataPermissionModelManager, DataPermissionManager
 from .user import User, UserRole
 from .role import Role
-from .department import Department
+from .department import Department, DepartmentClosure
 from .menu import Menu, RoleMenu
-from .api import ApiGroup, Api, ApiLog
+from .api import ApiGroup, Api, ApiLog, ApiLogHourlyStat
 from .permission import PolicyRule
+from .version import CacheVersion
 
 __all__ = [
     'BaseDataPermissionModel',
@@ -17,10 +18,13 @@ __all__ = [
     'UserRole',
     'Role',
     'Department',
+    'DepartmentClosure',
     'Menu',
     'RoleMenu',
     'ApiGroup',
     'Api',
     'ApiLog',
+    'ApiLogHourlyStat',
     'PolicyRule',
+    'CacheVersion',
 ]
@@ -1,7 +1,12 @@
 """
 API相关模型
 """
-from django.db import models
+import math
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import models, transaction
 from django.utils import timezone
 
 
@@ -61,10 +66,50 @@ class Api(models.Model):
         return dict(self.METHOD_CHOICES).get(self.method, self.method)
 
 
+def percentile(sorted_values, percent):
+    """已排序列表的百分位数（最近秩法）"""
+    if not sorted_values:
+        return 0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class ApiLogManager(models.Manager):
+    """API日志按天保留 / 清理"""
+    
+    DELETE_BATCH_SIZE = 5000
+    
+    def log_dates(self, before=None):
+        """已有日志的日期（升序），before 为空时返回全部"""
+        queryset = self.all()
+        if before is not None:
+            queryset = queryset.filter(log_date__lt=before)
+        return list(queryset.order_by('log_date').values_list('log_date', flat=True).distinct())
+    
+    def delete_day(self, log_date, batch_size=None):
+        """
+        删除一天的日志，返回删除的条数
+        
+        按主键分批删除：每批先按 log_date 索引取出至多 batch_size 个主键，再执行一条
+        DELETE ... WHERE id IN (...)。不在事务中调用时每批单独提交，锁和 WAL / undo 的量
+        以批为上限，批之间日志写入线程的 bulk_create 不会被长时间阻塞。
+        ApiLog 没有关联到它的外键，也没有 delete 信号，Django 不会逐行加载。
+        """
+        batch_size = batch_size or self.DELETE_BATCH_SIZE
+        day = self.filter(log_date=log_date).order_by('pk').values_list('pk', flat=True)
+        total = 0
+        while True:
+            ids = list(day[:batch_size])
+            if not ids:
+                return total
+            deleted, _ = self.filter(pk__in=ids).delete()
+            total += deleted
+
+
 class ApiLog(models.Model):
     """API日志模型"""
     user = models.ForeignKey('rbac.User', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='用户')
-    api = models.ForeignKey(Api, on_delete=models.CASCADE, verbose_name='API')
+    api = models.ForeignKey(Api, on_delete=models.CASCADE, null=True, blank=True, verbose_name='API')
     method = models.CharField(max_length=10, verbose_name='请求方法')
     path = models.CharField(max_length=200, verbose_name='请求路径')
     ip_address = models.GenericIPAddressField(verbose_name='IP地址')
@@ -74,12 +119,98 @@ class ApiLog(models.Model):
     status_code = models.IntegerField(verbose_name='状态码')
     response_time = models.FloatField(verbose_name='响应时间(秒)')
     created_at = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    log_date = models.DateField(editable=False, verbose_name='日志日期')  # 按天保留/清理的日期键
+    
+    objects = ApiLogManager()
     
     class Meta:
         db_table = 'rbac_api_log'
         verbose_name = 'API日志'
         verbose_name_plural = 'API日志管理'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['log_date'], name='rbac_apilog_date_idx'),
+            models.Index(fields=['-created_at', '-id'], name='rbac_apilog_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='rbac_apilog_user_idx'),
+            models.Index(fields=['api', '-created_at', '-id'], name='rbac_apilog_api_idx'),
+            models.Index(fields=['status_code', '-created_at', '-id'], name='rbac_apilog_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.method} {self.path} - {self.status_code}"
+    
+    def save(self, *args, **kwargs):
+        if self.log_date is None:
+            self.log_date = timezone.localdate(self.created_at)
+        super().save(*args, **kwargs)
+
+
+class ApiLogHourlyStatManager(models.Manager):
+    """API日志小时汇总"""
+    
+    ERROR_STATUS = 400  # 状态码 >= 400 计为错误
+    
+    def rollup(self, hour):
+        """
+        汇总 [hour, hour + 1小时) 内的日志，按 API 分组写入汇总表（重复执行会覆盖该小时的结果）
+        
+        Returns:
+            写入的汇总行数
+        """
+        hour = hour.replace(minute=0, second=0, microsecond=0)
+        logs = ApiLog.objects.filter(
+            created_at__gte=hour, created_at__lt=hour + timedelta(hours=1)
+        ).order_by('api_id', 'response_time').values_list('api_id', 'response_time', 'status_code')
+        
+        rows = []
+        for api_id, group in groupby(logs.iterator(chunk_size=5000), key=itemgetter(0)):
+            times = []
+            errors = 0
+            for _, response_time, status_code in group:
+                times.append(response_time)
+                errors += status_code >= self.ERROR_STATUS
+            rows.append(self.model(
+                hour=hour,
+                api_id=api_id,
+                request_count=len(times),
+                error_count=errors,
+                avg_response_time=sum(times) / len(times),
+                p50_response_time=percentile(times, 50),
+                p95_response_time=percentile(times, 95),
+                p99_response_time=percentile(times, 99),
+                max_response_time=times[-1],
+            ))
+        
+        with transaction.atomic():
+            self.filter(hour=hour).delete()
+            self.bulk_create(rows)
+        return len(rows)
+
+
+class ApiLogHourlyStat(models.Model):
+    """API日志小时汇总 - 供监控面板使用，无需扫描原始日志"""
+    hour = models.DateTimeField(verbose_name='小时')
+    api = models.ForeignKey(Api, on_delete=models.CASCADE, null=True, blank=True,
+                            related_name='hourly_stats', verbose_name='API')  # 为空表示未登记的路径
+    request_count = models.PositiveIntegerField(default=0, verbose_name='请求数')
+    error_count = models.PositiveIntegerField(default=0, verbose_name='错误数')
+    avg_response_time = models.FloatField(default=0, verbose_name='平均响应时间(秒)')
+    p50_response_time = models.FloatField(default=0, verbose_name='P50响应时间(秒)')
+    p95_response_time = models.FloatField(default=0, verbose_name='P95响应时间(秒)')
+    p99_response_time = models.FloatField(default=0, verbose_name='P99响应时间(秒)')
+    max_response_time = models.FloatField(default=0, verbose_name='最大响应时间(秒)')
+    
+    objects = ApiLogHourlyStatManager()
+    
+    class Meta:
+        db_table = 'rbac_api_log_hourly_stat'
+        verbose_name = 'API小时统计'
+        verbose_name_plural = 'API小时统计'
+        ordering = ['-hour', 'api']
+        indexes = [
+            models.Index(fields=['hour', 'api'], name='rbac_apistat_hour_idx'),
+            models.Index(fields=['api', 'hour'], name='rbac_apistat_api_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H}:00 {self.api_id} - {self.request_count}"
@@ -1,10 +1,15 @@
 """
 基础模型和权限管理
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
 
 
+_UNKNOWN = object()
+
+
 class BaseDataPermissionModel(models.Model):
     """
     数据权限基础模型 - 所有需要数据权限控制的业务表都应该继承此模型
@@ -62,7 +67,7 @@ class DataPermissionModelManager(models.Manager):
         Args:
             queryset: 要过滤的查询集
             user: 当前用户
-            id_field: ID字段名，默认为'id'
+            id_field: 保留参数，兼容旧调用
         
         Returns:
             过滤后的查询集
@@ -70,32 +75,11 @@ class DataPermissionModelManager(models.Manager):
         if not user or user.is_anonymous:
             return queryset.none()
         
-        # 超级用户可以看到所有数据
-        if user.is_superuser:
-            return queryset
-        
-        # 获取用户的数据权限范围
-        data_scope = getattr(user, 'data_scope', 4)  # 默认为本人数据
-        
-        # 根据数据权限范围过滤
-        if data_scope == 1:  # 全部数据
-            return queryset
-        elif data_scope == 2:  # 本部门及以下数据
-            # 获取用户部门及其所有子部门
-            user_dept = getattr(user, 'department', None)
-            if not user_dept:
-                return queryset.filter(**{f'{id_field}__in': []})
-            
-            # 获取部门及其子部门ID列表
-            dept_ids = [user_dept.id] + [child.id for child in user_dept.get_all_children()]
-            return queryset.filter(owner_department_id__in=dept_ids)
-        elif data_scope == 3:  # 本部门数据
-            user_dept = getattr(user, 'department', None)
-            if not user_dept:
-                return queryset.filter(**{f'{id_field}__in': []})
-            return queryset.filter(owner_department=user_dept)
-        else:  # 本人数据 (data_scope == 4)
-            return queryset.filter(created_by=user)
+        # 有效数据权限（角色中最高的数据权限，无角色时使用用户自身设置），见 rbac/data_scope.py
+        from ..data_scope import get_effective_scope
+        return get_effective_scope(user).filter_queryset(
+            queryset, department_field='owner_department_id', user_field='created_by_id'
+        )
     
     def by_data_level(self, level):
         """按数据级别过滤"""
@@ -115,7 +99,7 @@ class DataPermissionManager:
         Args:
             queryset: 要过滤的查询集
             user: 当前用户
-            id_field: ID字段名，默认为'id'
+            id_field: 保留参数，兼容旧调用
         
         Returns:
             过滤后的查询集
@@ -123,29 +107,106 @@ class DataPermissionManager:
         if not user or user.is_anonymous:
             return queryset.none()
         
-        # 超级用户可以看到所有数据
-        if user.is_superuser:
-            return queryset
-        
-        # 获取用户的数据权限范围
-        data_scope = getattr(user, 'data_scope', 4)  # 默认为本人数据
+        # 有效数据权限（角色中最高的数据权限，无角色时使用用户自身设置），见 rbac/data_scope.py
+        from ..data_scope import get_effective_scope
+        return get_effective_scope(user).filter_queryset(
+            queryset, department_field='owner_department_id', user_field='created_by_id'
+        )
+
+
+class TreePathModel(models.Model):
+    """
+    物化路径树模型 - 维护 tree_path（如 /1/4/17/，含自身ID）和 level
+    
+    子树查询使用 tree_path__startswith 走索引，祖先ID由 tree_path 直接拆分得到。
+    子类需要定义 parent 外键和 level 字段。移动节点时整棵子树的路径在一条 UPDATE 中改写；
+    queryset.update(parent=...) 不经过 save()，需要调用 rebuild_tree_paths() 修复。
+    """
+    tree_path = models.CharField(max_length=255, default='', blank=True, db_index=True,
+                                 editable=False, verbose_name='树路径')
+    
+    class Meta:
+        abstract = True
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 用于保存时判断是否移动了位置（parent 被 defer 时保存前再查询）
+        self._loaded_parent_id = self.__dict__.get('parent_id', _UNKNOWN)
+    
+    def save(self, *args, **kwargs):
+        """保存时维护 tree_path / level，移动节点时改写整棵子树"""
+        created = self._state.adding
+        moved = not created and self.is_parent_changed()
+        if not (created or moved or not self.tree_path):
+            super().save(*args, **kwargs)
+            return
         
-        # 根据数据权限范围过滤
-        if data_scope == 1:  # 全部数据
-            return queryset
-        elif data_scope == 2:  # 本部门及以下数据
-            # 获取用户部门及其所有子部门
-            user_dept = getattr(user, 'department', None)
-            if not user_dept:
-                return queryset.filter(**{f'{id_field}__in': []})
+        with transaction.atomic():
+            manager = type(self)._base_manager
+            # 从数据库读取上级的路径，内存中的上级对象可能已因其他移动而过期
+            parent_path, parent_level = '/', 0
+            if self.parent_id:
+                parent_path, parent_level = manager.filter(pk=self.parent_id).values_list('tree_path', 'level').get()
+            old_path = self.tree_path
+            if moved:
+                old_path = manager.filter(pk=self.pk).values_list('tree_path', flat=True).get()
+                if old_path and parent_path.startswith(old_path):
+                    raise ValueError(f'不能将{self._meta.verbose_name}移动到自身或其下级下')
+            
+            self.level = parent_level + 1
+            if not created:
+                self.tree_path = f'{parent_path}{self.pk}/'
+            super().save(*args, **kwargs)
             
-            # 获取部门及其子部门ID列表
-            dept_ids = [user_dept.id] + [child.id for child in user_dept.get_all_children()]
-            return queryset.filter(owner_department_id__in=dept_ids)
-        elif data_scope == 3:  # 本部门数据
-            user_dept = getattr(user, 'department', None)
-            if not user_dept:
-                return queryset.filter(**{f'{id_field}__in': []})
-            return queryset.filter(owner_department=user_dept)
-        else:  # 本人数据 (data_scope == 4)
-            return queryset.filter(created_by=user)
+            if created:
+                # 新建节点保存后才有主键
+                self.tree_path = f'{parent_path}{self.pk}/'
+                manager.filter(pk=self.pk).update(tree_path=self.tree_path)
+            elif old_path and old_path != self.tree_path:
+                manager.filter(tree_path__startswith=old_path).exclude(pk=self.pk).update(
+                    tree_path=Concat(Value(self.tree_path), Substr('tree_path', len(old_path) + 1)),
+                    # 层级差由路径深度计算（level 可能已被调用方预先修改）
+                    level=F('level') + (self.tree_path.count('/') - old_path.count('/')),
+                )
+        self._loaded_parent_id = self.parent_id
+    
+    def is_parent_changed(self):
+        """与载入时相比是否更换了上级"""
+        if self._loaded_parent_id is _UNKNOWN:
+            self._loaded_parent_id = type(self)._base_manager.filter(
+                pk=self.pk
+            ).values_list('parent_id', flat=True).first()
+        return self.parent_id != self._loaded_parent_id
+    
+    def get_ancestor_ids(self, include_self=False):
+        """从 tree_path 拆分得到祖先ID（从根到近）"""
+        ids = [int(node_id) for node_id in self.tree_path.strip('/').split('/') if node_id]
+        return ids if include_self else ids[:-1]
+    
+    def get_descendants(self, include_self=False):
+        """子树查询集（tree_path 前缀匹配）"""
+        queryset = type(self).objects.filter(tree_path__startswith=self.tree_path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+    
+    @classmethod
+    def rebuild_tree_paths(cls):
+        """根据 parent 关系全量重建 tree_path / level，返回更新的节点数"""
+        nodes = list(cls._base_manager.only('id', 'parent_id', 'tree_path', 'level'))
+        children = {}
+        for node in nodes:
+            children.setdefault(node.parent_id, []).append(node)
+        
+        changed = []
+        stack = [(node, '/', 1) for node in children.get(None, [])]
+        while stack:
+            node, parent_path, level = stack.pop()
+            tree_path = f'{parent_path}{node.pk}/'
+            if node.tree_path != tree_path or node.level != level:
+                node.tree_path, node.level = tree_path, level
+                changed.append(node)
+            stack.extend((child, tree_path, level + 1) for child in children.get(node.pk, []))
+        
+        cls._base_manager.bulk_update(changed, ['tree_path', 'level'], batch_size=500)
+        return len(changed)
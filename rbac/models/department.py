@@ -1,11 +1,13 @@
 """
 部门相关模型
 """
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from .base import TreePathModel
 
-class Department(models.Model):
+
+class Department(TreePathModel):
     """部门模型"""
     name = models.CharField(max_length=100, verbose_name='部门名称')
     code = models.CharField(max_length=50, unique=True, verbose_name='部门编码')
@@ -29,23 +31,123 @@ class Department(models.Model):
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        """保存时同步维护 tree_path 和部门闭包表"""
+        created = self._state.adding
+        moved = not created and self.is_parent_changed()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if created:
+                DepartmentClosure.objects.insert_node(self)
+            elif moved:
+                DepartmentClosure.objects.move_subtree(self)
+    
     def get_children(self):
         """获取所有子部门"""
         return Department.objects.filter(parent=self, status=True)
     
     def get_all_children(self):
-        """递归获取所有子部门"""
-        children = []
-        for child in self.get_children():
-            children.append(child)
-            children.extend(child.get_all_children())
-        return children
-    
-    def get_parent_path(self):
-        """获取父级路径"""
-        path = [self.name]
-        parent = self.parent
-        while parent:
-            path.insert(0, parent.name)
-            parent = parent.parent
+        """获取所有子部门（通过闭包表一次查询）"""
+        return list(Department.objects.filter(id__in=self.get_descendant_ids(include_self=False)))
+    
+    def get_descendant_ids(self, include_self=True):
+        """
+        本部门及以下部门ID的子查询，可直接用于 filter(department_id__in=...)
+        
+        与原递归逻辑一致：停用的部门及其下级都不包含（本部门自身除外）
+        """
+        return DepartmentClosure.objects.descendant_ids(self.pk, include_self=include_self)
+    
+    def get_parent_path(self, names=None):
+        """
+        获取父级路径，如 总公司 > 技术部 > 前端组
+        
+        祖先ID由 tree_path 拆分得到；names 为 {部门ID: 名称}，批量调用时传入可避免每次查询
+        """
+        ancestor_ids = self.get_ancestor_ids()
+        if names is None:
+            names = dict(Department.objects.filter(id__in=ancestor_ids).values_list('id', 'name'))
+        path = [names[dept_id] for dept_id in ancestor_ids if dept_id in names]
+        path.append(self.name)
         return ' > '.join(path)
+
+
+class DepartmentClosureManager(models.Manager):
+    """部门闭包表维护"""
+    
+    def descendant_ids(self, department_id, include_self=True):
+        """部门及其有效下级部门ID的子查询（路径上存在停用部门的下级不包含）"""
+        subtree = self.filter(ancestor_id=department_id)
+        # 下级中停用的部门，以及它们的所有下级
+        hidden = self.filter(
+            ancestor__in=subtree.filter(depth__gt=0, descendant__status=False).values('descendant_id')
+        ).values('descendant_id')
+        queryset = subtree.exclude(descendant_id__in=hidden)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return queryset.values('descendant_id')
+    
+    def insert_node(self, department):
+        """新部门：复制上级部门的祖先行，深度加一，再加上自身行"""
+        rows = [self.model(ancestor_id=department.pk, descendant_id=department.pk, depth=0)]
+        if department.parent_id:
+            rows.extend(
+                self.model(ancestor_id=ancestor_id, descendant_id=department.pk, depth=depth + 1)
+                for ancestor_id, depth in self.filter(
+                    descendant_id=department.parent_id
+                ).values_list('ancestor_id', 'depth')
+            )
+        self.bulk_create(rows)
+    
+    def move_subtree(self, department):
+        """移动部门：断开子树与原祖先的连接，再与新上级的祖先重新连接"""
+        subtree = list(self.filter(ancestor_id=department.pk).values_list('descendant_id', 'depth'))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        
+        self.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        
+        if department.parent_id:
+            ancestors = list(self.filter(descendant_id=department.parent_id).values_list('ancestor_id', 'depth'))
+            self.bulk_create(
+                self.model(ancestor_id=ancestor_id, descendant_id=descendant_id,
+                           depth=ancestor_depth + descendant_depth + 1)
+                for ancestor_id, ancestor_depth in ancestors
+                for descendant_id, descendant_depth in subtree
+            )
+    
+    def rebuild(self):
+        """根据 parent 关系全量重建闭包表"""
+        parents = dict(Department.objects.values_list('id', 'parent_id'))
+        rows = []
+        for department_id in parents:
+            ancestor_id, depth = department_id, 0
+            while ancestor_id is not None and depth <= len(parents):
+                rows.append(self.model(ancestor_id=ancestor_id, descendant_id=department_id, depth=depth))
+                ancestor_id, depth = parents.get(ancestor_id), depth + 1
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
+class DepartmentClosure(models.Model):
+    """部门闭包表 - 记录每对 (祖先, 后代) 部门及其距离，含 depth=0 的自身行"""
+    ancestor = models.ForeignKey(Department, on_delete=models.CASCADE,
+                                 related_name='descendant_links', verbose_name='祖先部门')
+    descendant = models.ForeignKey(Department, on_delete=models.CASCADE,
+                                   related_name='ancestor_links', verbose_name='后代部门')
+    depth = models.PositiveIntegerField(default=0, verbose_name='层级距离')
+    
+    objects = DepartmentClosureManager()
+    
+    class Meta:
+        db_table = 'rbac_department_closure'
+        verbose_name = '部门闭包'
+        verbose_name_plural = '部门闭包'
+        unique_together = ['ancestor', 'descendant']
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='rbac_dept_closure_desc_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
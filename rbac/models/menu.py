@@ -4,8 +4,10 @@
 from django.db import models
 from django.utils import timezone
 
+from .base import TreePathModel
 
-class Menu(models.Model):
+
+class Menu(TreePathModel):
     """菜单模型"""
     MENU_TYPE_CHOICES = [
         (1, '目录'),
@@ -23,6 +25,7 @@ class Menu(models.Model):
     permission_code = models.CharField(max_length=100, blank=True, null=True, verbose_name='权限标识')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, 
                               verbose_name='上级菜单', related_name='children')
+    level = models.IntegerField(default=1, verbose_name='层级')
     sort_order = models.IntegerField(default=0, verbose_name='排序')
     is_hidden = models.BooleanField(default=False, verbose_name='是否隐藏')
     is_keep_alive = models.BooleanField(default=True, verbose_name='是否缓存')
@@ -48,11 +51,17 @@ class Menu(models.Model):
         return Menu.objects.filter(parent=self, status=True, visible=True).order_by('sort_order')
 
     def get_all_children(self):
-        """递归获取所有子菜单"""
+        """获取所有子菜单（tree_path 前缀一次查询，停用/隐藏菜单的下级不包含）"""
+        children_map = {}
+        for menu in self.get_descendants().filter(status=True, visible=True).order_by('sort_order'):
+            children_map.setdefault(menu.parent_id, []).append(menu)
+        
         children = []
-        for child in self.get_children():
-            children.append(child)
-            children.extend(child.get_all_children())
+        stack = list(reversed(children_map.get(self.pk, [])))
+        while stack:
+            menu = stack.pop()
+            children.append(menu)
+            stack.extend(reversed(children_map.get(menu.pk, [])))
         return children
 
     @property
@@ -0,0 +1,19 @@
+"""
+缓存版本相关模型
+"""
+from django.db import models
+
+
+class CacheVersion(models.Model):
+    """缓存版本计数器 - 多个worker通过比较版本号判断进程内缓存是否过期"""
+    name = models.CharField(max_length=50, unique=True, verbose_name='缓存名称')
+    version = models.BigIntegerField(default=0, verbose_name='版本号')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'rbac_cache_version'
+        verbose_name = '缓存版本'
+        verbose_name_plural = '缓存版本管理'
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
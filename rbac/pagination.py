@@ -0,0 +1,383 @@
+"""
+分页工具
+"""
+import base64
+import hashlib
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .cache import LRUCache
+
+
+logger = logging.getLogger(__name__)
+
+_count_cache = LRUCache(
+    getattr(settings, 'RBAC_COUNT_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'RBAC_COUNT_CACHE_TTL', 30),
+)
+# 精确总数超过 RBAC_APPROX_COUNT_THRESHOLD 的查询（SQL摘要），只有这些查询才使用执行计划估算
+_large_queries = LRUCache(getattr(settings, 'RBAC_COUNT_CACHE_SIZE', 1024))
+
+
+# 默认 page_size 上限，页码分页与游标分页共用（视图可通过 max_page_size 属性单独设置）
+MAX_PAGE_SIZE = 100
+
+
+def _encode_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class PageSizeStats:
+    """
+    各视图请求的 page_size 统计（进程内）
+
+    记录每个视图的请求次数、被截断到上限的次数、请求过的最大值以及按区间的分布，
+    用于判断 max_page_size 是否合适、是否有调用方在拉取超大页（通过 GET /rbac/api/apis/page-size-stats/ 查看）
+    """
+    BUCKETS = (10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, requested, max_page_size):
+        bucket = next((f'<={b}' for b in self.BUCKETS if requested <= b), f'>{self.BUCKETS[-1]}')
+        with self._lock:
+            stats = self._views.setdefault(view_name, {
+                'requests': 0, 'clamped': 0, 'max_requested': 0, 'histogram': {},
+            })
+            stats['requests'] += 1
+            stats['clamped'] += requested > max_page_size
+            stats['max_requested'] = max(stats['max_requested'], requested)
+            stats['histogram'][bucket] = stats['histogram'].get(bucket, 0) + 1
+
+    def get_stats(self):
+        with self._lock:
+            return {name: {**stats, 'histogram': dict(stats['histogram'])} for name, stats in self._views.items()}
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+
+page_size_stats = PageSizeStats()
+
+
+def get_bounded_page_size(pagination, request):
+    """
+    本次请求的 page_size：未传或非法时用默认值，超过视图 max_page_size 时截断
+
+    只读取请求参数，不修改分页类属性；请求值记录到 page_size_stats
+    """
+    view = getattr(pagination, 'view', None)
+    max_page_size = getattr(view, 'max_page_size', None) or pagination.max_page_size
+    try:
+        requested = int(request.query_params[pagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return pagination.page_size
+    if requested <= 0:
+        return pagination.page_size
+    page_size_stats.record(type(view).__name__ if view is not None else '', requested, max_page_size)
+    return min(requested, max_page_size)
+
+
+class KeysetPagination(BasePagination):
+    """
+    键集（游标）分页
+
+    按 ordering 中的字段（不能为空值，最后一个字段必须唯一，如 id）做字典序比较取下一页：
+        WHERE (created_at, id) < (上一页最后一条的 created_at, id) ORDER BY created_at DESC, id DESC
+    与 OFFSET 分页不同，翻到任意深度的代价都相同，且配合同顺序的复合索引无需排序。
+
+    不统计总数（无 COUNT(*)）。响应格式：
+        {"results": [...], "next": 下一页URL或null, "previous": 上一页URL或null, "page_size": n}
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.page_size = self.get_page_size(request)
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+        position, self.reverse = self.decode_cursor(request, queryset.model)
+        if self.reverse:
+            # 向前翻页：反向排序取 position 之前的记录，再翻转回正常顺序
+            queryset = queryset.order_by(*(self.invert(name) for name in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position, self.reverse))
+
+        # 多取一条用于判断是否还有更多
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if self.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.first_position = self.get_position(page[0]) if page else position
+        self.last_position = self.get_position(page[-1]) if page else position
+        return page
+
+    @staticmethod
+    def invert(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    def get_position(self, instance):
+        return [getattr(instance, name) for name, _ in self.fields]
+
+    def get_page_size(self, request):
+        return get_bounded_page_size(self, request)
+
+    def position_filter(self, position, reverse=False):
+        """(f1, f2, ...) 在 position 之后（reverse 时为之前）的条件：f1 超过，或 f1 相等且 f2 超过，依此类推"""
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = f'{name}__lt' if descending != reverse else f'{name}__gt'
+            equal = {prev_name: position[i] for i, (prev_name, _) in enumerate(self.fields[:index])}
+            condition |= Q(**equal, **{lookup: position[index]})
+        return condition
+
+    def decode_cursor(self, request, model):
+        """游标解码为 (位置, 是否向前翻页)"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = data['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [model._meta.get_field(name).to_python(value) for (name, _), value in zip(self.fields, values)]
+            # 超出 64 位的整数在执行查询时才报错（如 SQLite 的 OverflowError），在此按无效游标处理
+            if any(isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63 for value in position):
+                raise ValueError
+            return position, bool(data.get('r'))
+        except Exception:
+            raise ValidationError({self.cursor_query_param: '无效的游标'})
+
+    def encode_cursor(self, position, reverse=False):
+        # 时间保留完整微秒（DjangoJSONEncoder 会截断到毫秒，导致同一毫秒内的记录被跳过）
+        data = {'p': position, 'r': 1} if reverse else {'p': position}
+        data = json.dumps(data, default=_encode_value, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_position))
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.first_position, reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'results': schema,
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'page_size': {'type': 'integer'},
+            },
+        }
+
+
+class BoundedPageNumberPagination(PageNumberPagination):
+    """
+    支持按请求指定 page_size 的页码分页
+
+    page_size 只作用于本次请求；上限取视图的 max_page_size（默认 MAX_PAGE_SIZE）
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_size(self, request):
+        return get_bounded_page_size(self, request)
+
+
+def estimate_count(queryset):
+    """
+    数据库执行计划估算的行数，不支持的数据库返回 None
+
+    PostgreSQL 取 EXPLAIN 的 Plan Rows，MySQL 取 EXPLAIN 首行的 rows；SQLite 没有可用的估算
+    """
+    connection = connections[queryset.db]
+    try:
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+            if connection.vendor == 'mysql':
+                cursor.execute(f'EXPLAIN {sql}', params)
+                columns = [column[0] for column in cursor.description]
+                return int(dict(zip(columns, cursor.fetchone()))['rows'])
+    except Exception:
+        logger.debug('估算查询行数失败', exc_info=True)
+    return None
+
+
+def clear_count_cache():
+    """清空进程内的列表总数缓存"""
+    _count_cache.clear()
+    _large_queries.clear()
+
+
+class CachedCountPage(Page):
+    """has_next 由多取的一条记录判断，不依赖可能过期或估算的 count"""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class CachedCountPaginator(Paginator):
+    """
+    count 使用短期缓存，超过阈值时使用执行计划估算值的 Paginator
+
+    count / num_pages 只用于展示；页码不按 count 截断，是否有下一页由实际取到的记录判断
+    """
+
+    def __init__(self, *args, fingerprint=None, exact=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fingerprint = fingerprint
+        self.exact = exact
+        self.approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.sha1(f'{queryset.db}|{sql}|{params!r}'.encode('utf-8')).hexdigest()
+        key = (digest, self.fingerprint)
+        if not self.exact:
+            cached = _count_cache.get(key)
+            if cached is not None:
+                count, self.approximate = cached
+                return count
+
+        count, self.approximate = self.compute_count(queryset, digest)
+        _count_cache.set(key, (count, self.approximate))
+        return count
+
+    def validate_number(self, number):
+        """
+        count 可能来自缓存或估算，与实际行数不一致，因此不按 num_pages 拒绝页码，
+        超出实际范围的页返回空列表
+        """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('页码必须是整数')
+        if number < 1:
+            raise EmptyPage('页码不能小于1')
+        return number
+
+    def page(self, number):
+        # 不按 count 截断切片，避免缓存的 count 偏小时漏掉新增的记录；多取一条判断是否有下一页
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return CachedCountPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+    def compute_count(self, queryset, digest):
+        """
+        返回 (总数, 是否为估算值)
+
+        只有之前精确统计超过阈值的查询才执行 EXPLAIN 估算，其余查询直接 COUNT(*)，
+        避免小表在每次缓存失效时都多一次 EXPLAIN
+        """
+        threshold = getattr(settings, 'RBAC_APPROX_COUNT_THRESHOLD', 100000)
+        if not self.exact and _large_queries.get(digest):
+            estimate = estimate_count(queryset.order_by())
+            if estimate is not None and estimate > threshold:
+                return estimate, True
+        count = queryset.count()
+        _large_queries.set(digest, count > threshold)
+        return count, False
+
+
+class CachedCountPagination(BoundedPageNumberPagination):
+    """
+    总数可近似的页码分页
+
+    count 按 (查询SQL与参数, 用户数据权限摘要) 缓存 RBAC_COUNT_CACHE_TTL 秒；
+    精确总数曾超过 RBAC_APPROX_COUNT_THRESHOLD 的查询改用执行计划估算值（响应中 count_approximate 为 true）。
+    next 链接由是否还有记录决定，与 count 无关。
+    请求参数 exact_count=1 强制精确统计并刷新缓存。响应仍保持 results + count 结构。
+    """
+    exact_count_query_param = 'exact_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_options = {
+            'fingerprint': self.get_fingerprint(request),
+            'exact': request.query_params.get(self.exact_count_query_param) in ('1', 'true'),
+        }
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page, **kwargs):
+        return CachedCountPaginator(object_list, per_page, **self.count_options, **kwargs)
+
+    @staticmethod
+    def get_fingerprint(request):
+        from .data_scope import get_effective_scope
+        user = getattr(request, 'user', None)
+        return get_effective_scope(user).fingerprint
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_approximate': self.page.paginator.approximate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_approximate'] = {'type': 'boolean'}
+        return response_schema
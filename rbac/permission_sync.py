@@ -0,0 +1,218 @@
+"""
+角色权限 / 用户角色批量同步
+
+把角色的 API 权限（PolicyRule）/ 菜单权限（RoleMenu）、用户的角色（UserRole）整体设置为目标集合：
+在一个事务内一次查询目标对象、一次查询现有记录，计算差异后用一条 DELETE 和一次 bulk_create 写入。
+不会出现"先全部删除再逐条添加"期间没有权限的窗口，查询数与条数无关。
+
+批量写入不触发模型信号，因此在事务提交后由这里统一通知权限引擎 / 递增菜单版本号（每次同步一次）。
+"""
+from django.db import transaction
+
+from .simple_rbac import get_rbac_manager, simple_rbac_manager
+from .versioning import MENU_VERSION, bump_version
+
+
+def _notify_on_commit(apply):
+    """事务提交后通知权限引擎一次"""
+    transaction.on_commit(lambda: get_rbac_manager().apply_change(apply))
+
+
+def _chunks(values, size):
+    values = sorted(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _raw_delete(queryset):
+    """
+    单条 DELETE，不逐行加载、不发送 post_delete 信号（变更由调用方统一通知）
+
+    只用于没有其他表外键引用的 PolicyRule / RoleMenu / UserRole。这些模型在 signals.py 中注册了
+    post_delete 接收器，公开的 QuerySet.delete() 会逐行取出并逐条发送信号，所以这里使用私有的
+    QuerySet._raw_delete()。该方法在 requirements.txt 固定的 Django 4.2 中可用，升级 Django 时需确认。
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def sync_role_apis(role, api_ids):
+    """
+    将角色的 API 权限设置为 api_ids 对应的 (method, path)
+
+    Returns:
+        {'added': 新增条数, 'removed': 删除条数, 'missing': 不存在的API ID列表}
+    """
+    from .models import Api, PolicyRule
+
+    api_ids = set(api_ids)
+    with transaction.atomic():
+        apis = list(Api.objects.filter(id__in=api_ids).values_list('id', 'method', 'path'))
+        missing = sorted(api_ids - {api_id for api_id, _, _ in apis})
+        target = {(method.upper(), path) for _, method, path in apis}
+
+        current = {}
+        for pk, method, path in PolicyRule.objects.filter(role_id=role.role_id).values_list('id', 'method', 'path'):
+            current[(method.upper(), path)] = pk
+        added = target - current.keys()
+        removed = current.keys() - target
+
+        if removed:
+            _raw_delete(PolicyRule.objects.filter(id__in=[current[rule] for rule in removed]))
+        if added:
+            PolicyRule.objects.bulk_create(
+                [PolicyRule(role_id=role.role_id, method=method, path=path) for method, path in added],
+                ignore_conflicts=True,
+            )
+        if added or removed:
+            _notify_on_commit(simple_rbac_manager.role_policies_changed(role.role_id, added, removed))
+
+    return {'added': len(added), 'removed': len(removed), 'missing': missing}
+
+
+def sync_role_menus(role, menu_ids):
+    """
+    将角色的菜单权限设置为 menu_ids
+
+    Returns:
+        {'added': 新增条数, 'removed': 删除条数, 'missing': 不存在的菜单ID列表}
+    """
+    from .models import Menu, RoleMenu
+
+    menu_ids = set(menu_ids)
+    with transaction.atomic():
+        target = set(Menu.objects.filter(id__in=menu_ids).values_list('id', flat=True))
+        missing = sorted(menu_ids - target)
+
+        current = set(RoleMenu.objects.filter(role=role).values_list('menu_id', flat=True))
+        added = target - current
+        removed = current - target
+
+        if removed:
+            _raw_delete(RoleMenu.objects.filter(role=role, menu_id__in=removed))
+        if added:
+            RoleMenu.objects.bulk_create(
+                [RoleMenu(role=role, menu_id=menu_id) for menu_id in added],
+                ignore_conflicts=True,
+            )
+        if added or removed:
+            bump_version(MENU_VERSION)
+
+    return {'added': len(added), 'removed': len(removed), 'missing': missing}
+
+
+def sync_user_roles(user, role_ids):
+    """
+    将用户的角色设置为 role_ids（角色主键）
+
+    Returns:
+        {'added': 新增条数, 'removed': 删除条数, 'missing': 不存在的角色ID列表}
+    """
+    from .models import Role, UserRole
+
+    role_ids = set(role_ids)
+    with transaction.atomic():
+        target = set(Role.objects.filter(id__in=role_ids).values_list('id', flat=True))
+        missing = sorted(role_ids - target)
+
+        current = set(UserRole.objects.filter(user_id=user.pk).values_list('role_id', flat=True))
+        added = target - current
+        removed = current - target
+
+        if removed:
+            _raw_delete(UserRole.objects.filter(user_id=user.pk, role_id__in=removed))
+        if added:
+            UserRole.objects.bulk_create(
+                [UserRole(user_id=user.pk, role_id=role_pk) for role_pk in added],
+                ignore_conflicts=True,
+            )
+        if added or removed:
+            _notify_on_commit(simple_rbac_manager.user_roles_changed(user.pk, added, removed))
+
+    return {'added': len(added), 'removed': len(removed), 'missing': missing}
+
+
+def assign_role_to_users(role, user_ids, batch_size=1000):
+    """
+    为多个用户分配同一个角色，已拥有该角色的用户跳过
+
+    用户ID按 batch_size 分批查询和写入，一次可处理数千个用户。
+
+    Returns:
+        {'added': 新增条数, 'existing': 已拥有该角色的用户数, 'missing': 不存在的用户ID列表}
+    """
+    from .models import User, UserRole
+
+    user_ids = set(user_ids)
+    target, current = set(), set()
+    with transaction.atomic():
+        for chunk in _chunks(user_ids, batch_size):
+            target.update(User.objects.filter(id__in=chunk).values_list('id', flat=True))
+        missing = sorted(user_ids - target)
+
+        for chunk in _chunks(target, batch_size):
+            current.update(UserRole.objects.filter(role=role, user_id__in=chunk).values_list('user_id', flat=True))
+        added = target - current
+
+        if added:
+            UserRole.objects.bulk_create(
+                [UserRole(user_id=user_id, role=role) for user_id in sorted(added)],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            _notify_on_commit(simple_rbac_manager.role_users_changed(role.pk, added, ()))
+
+    return {'added': len(added), 'existing': len(current), 'missing': missing}
+
+
+def remove_role_from_users(role, user_ids, batch_size=1000):
+    """
+    从多个用户移除同一个角色
+
+    Returns:
+        {'removed': 删除条数}
+    """
+    from .models import UserRole
+
+    removed = set()
+    with transaction.atomic():
+        for chunk in _chunks(set(user_ids), batch_size):
+            queryset = UserRole.objects.filter(role=role, user_id__in=chunk)
+            removed.update(queryset.values_list('user_id', flat=True))
+            _raw_delete(queryset)
+        if removed:
+            _notify_on_commit(simple_rbac_manager.role_users_changed(role.pk, (), removed))
+
+    return {'removed': len(removed)}
+
+
+def bulk_add_user_roles(assignments, batch_size=1000):
+    """
+    批量新增用户角色（如新导入的用户），已存在的关联跳过
+
+    Args:
+        assignments: {用户ID: 角色主键列表}，按列表顺序写入
+
+    Returns:
+        写入的关联条数
+    """
+    from .models import UserRole
+
+    user_roles = [
+        UserRole(user_id=user_id, role_id=role_pk)
+        for user_id, role_pks in assignments.items() for role_pk in role_pks
+    ]
+    if not user_roles:
+        return 0
+
+    UserRole.objects.bulk_create(user_roles, batch_size=batch_size, ignore_conflicts=True)
+    applies = [
+        simple_rbac_manager.user_roles_changed(user_id, frozenset(role_pks), frozenset())
+        for user_id, role_pks in assignments.items() if role_pks
+    ]
+
+    def apply(snapshot):
+        for apply_user in applies:
+            apply_user(snapshot)
+
+    _notify_on_commit(apply)
+    return len(user_roles)
@@ -0,0 +1,156 @@
+"""
+路由匹配器 - 将权限策略路径编译为按请求方法划分的路径段前缀树
+
+支持的路径模式（按 / 分段匹配）：
+- 普通路径:   /rbac/api/users/           精确匹配
+- 路径参数:   /rbac/api/users/{id}/      {xxx} 匹配任意一个非空路径段
+- 单段通配:   /rbac/api/*/               * 匹配任意一个路径段
+- 多段通配:   /rbac/api/**               ** 匹配零个或多个路径段
+
+不含通配的模式直接走哈希表；含通配的模式进入前缀树，匹配耗时只与路径深度相关，
+与规则数量无关。
+"""
+import functools
+import threading
+
+
+def is_pattern(path):
+    """路径是否包含参数或通配符"""
+    return '{' in path or '*' in path
+
+
+def split_path(path):
+    """按 / 分段，保留末尾斜杠产生的空段，使 /a/ 与 /a 区分"""
+    return path.split('/')[1:] if path.startswith('/') else path.split('/')
+
+
+class _Node:
+    __slots__ = ('static', 'param', 'star', 'globstar', 'values')
+
+    def __init__(self):
+        self.static = {}  # 路径段 -> 子节点
+        self.param = None  # {xxx} 子节点
+        self.star = None  # * 子节点
+        self.globstar = None  # ** 子节点
+        self.values = frozenset()  # 在此结束的模式对应的值（整体替换，读取方无需加锁）
+
+
+class RouteMatcher:
+    """
+    路由匹配器
+
+    matcher.add('GET', '/rbac/api/users/{id}/', 'role_1')
+    matcher.match('GET', '/rbac/api/users/42/')  # -> {'role_1'}
+    """
+
+    def __init__(self, rules=()):
+        self._lock = threading.Lock()
+        self._exact = {}  # (method, path) -> 值集合
+        self._roots = {}  # method -> 前缀树根节点
+        for method, pattern, value in rules:
+            self.add(method, pattern, value)
+
+    def add(self, method, pattern, value):
+        """添加规则"""
+        method = method.upper()
+        with self._lock:
+            if not is_pattern(pattern):
+                key = (method, pattern)
+                self._exact[key] = self._exact.get(key, frozenset()) | {value}
+                return
+
+            node = self._roots.get(method)
+            if node is None:
+                node = self._roots[method] = _Node()
+            for segment in split_path(pattern):
+                node = self._child(node, segment)
+            node.values = node.values | {value}
+
+    def remove(self, method, pattern, value):
+        """删除规则（保留空节点，不影响匹配结果）"""
+        method = method.upper()
+        with self._lock:
+            if not is_pattern(pattern):
+                key = (method, pattern)
+                if key in self._exact:
+                    self._exact[key] = self._exact[key] - {value}
+                return
+
+            node = self._roots.get(method)
+            for segment in split_path(pattern):
+                if node is None:
+                    return
+                node = self._find_child(node, segment)
+            if node is not None:
+                node.values = node.values - {value}
+
+    def match(self, method, path):
+        """返回所有匹配 (method, path) 的规则值"""
+        method = method.upper()
+        result = set(self._exact.get((method, path), ()))
+        root = self._roots.get(method)
+        if root is not None:
+            self._match(root, split_path(path), 0, result)
+        return result
+
+    def matches_any(self, method, path, values):
+        """是否存在值属于 values 的匹配规则"""
+        return not values.isdisjoint(self.match(method, path))
+
+    def _match(self, node, segments, index, result):
+        if node.globstar is not None:
+            # ** 匹配剩余的 0..n 个路径段
+            for i in range(index, len(segments) + 1):
+                self._match(node.globstar, segments, i, result)
+
+        if index == len(segments):
+            result.update(node.values)
+            return
+
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            self._match(child, segments, index + 1, result)
+        if node.param is not None and segment:
+            self._match(node.param, segments, index + 1, result)
+        if node.star is not None:
+            self._match(node.star, segments, index + 1, result)
+
+    @staticmethod
+    def _child(node, segment):
+        if segment == '**':
+            if node.globstar is None:
+                node.globstar = _Node()
+            return node.globstar
+        if segment == '*':
+            if node.star is None:
+                node.star = _Node()
+            return node.star
+        if segment.startswith('{') and segment.endswith('}'):
+            if node.param is None:
+                node.param = _Node()
+            return node.param
+        child = node.static.get(segment)
+        if child is None:
+            child = node.static[segment] = _Node()
+        return child
+
+    @staticmethod
+    def _find_child(node, segment):
+        if segment == '**':
+            return node.globstar
+        if segment == '*':
+            return node.star
+        if segment.startswith('{') and segment.endswith('}'):
+            return node.param
+        return node.static.get(segment)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_pattern(pattern):
+    return RouteMatcher([('ANY', pattern, True)])
+
+
+def route_match(path, pattern):
+    """单个模式是否匹配路径（语义与 RouteMatcher 一致），注册为 casbin 模型中的 routeMatch 函数"""
+    return bool(_compile_pattern(pattern).match('ANY', path))
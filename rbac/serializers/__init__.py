@@ -8,7 +8,8 @@ from .user import (
 )
 from .role import (
     RoleListSerializer, RoleDetailSerializer, RoleCreateSerializer, 
-    RoleUpdateSerializer
+    RoleUpdateSerializer, RoleApiPermissionSerializer, RoleMenuPermissionSerializer,
+    RoleUsersSerializer
 )
 from .department import DepartmentSerializer
 from .menu import MenuSerializer, RoleMenuSerializer
@@ -26,6 +27,9 @@ __all__ = [
     'RoleDetailSerializer',
     'RoleCreateSerializer',
     'RoleUpdateSerializer',
+    'RoleApiPermissionSerializer',
+    'RoleMenuPermissionSerializer',
+    'RoleUsersSerializer',
     'DepartmentSerializer',
     'MenuSerializer',
     'RoleMenuSerializer',
@@ -18,8 +18,9 @@ class ApiGroupSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_apis_count(self, obj):
-        """获取API数量"""
-        return obj.apis.count()
+        """获取API数量（优先使用视图集 annotate 的结果）"""
+        count = getattr(obj, 'apis_count', None)
+        return obj.apis.count() if count is None else count
 
 
 class ApiSerializer(serializers.ModelSerializer):
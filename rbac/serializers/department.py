@@ -2,7 +2,7 @@
 部门相关序列化器
 """
 from rest_framework import serializers
-from ..models import Department
+from ..models import Department, DepartmentClosure
 
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -15,11 +15,11 @@ class DepartmentSerializer(serializers.ModelSerializer):
         model = Department
         fields = [
             'id', 'name', 'code', 'parent', 'parent_name',
-            'level', 'sort_order', 'leader', 'phone', 'email',
+            'level', 'tree_path', 'sort_order', 'leader', 'phone', 'email',
             'status', 'children_count', 'user_count',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'tree_path', 'created_at', 'updated_at']
     
     def create(self, validated_data):
         """创建部门时处理parent字段"""
@@ -41,6 +41,9 @@ class DepartmentSerializer(serializers.ModelSerializer):
             if parent_id:
                 try:
                     parent_dept = Department.objects.get(id=parent_id)
+                    # 不能移动到自身或其子部门下
+                    if DepartmentClosure.objects.filter(ancestor=instance, descendant=parent_dept).exists():
+                        raise serializers.ValidationError({'parent': '不能将部门移动到自身或其子部门下'})
                     validated_data['parent'] = parent_dept
                     # 自动设置层级
                     validated_data['level'] = parent_dept.level + 1
@@ -52,9 +55,11 @@ class DepartmentSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
     
     def get_children_count(self, obj):
-        """获取子部门数量"""
-        return obj.children.count()
+        """获取子部门数量（优先使用视图集 annotate 的结果）"""
+        count = getattr(obj, 'children_count', None)
+        return obj.children.count() if count is None else count
     
     def get_user_count(self, obj):
-        """获取用户数量"""
-        return obj.users.count()
+        """获取用户数量（优先使用视图集 annotate 的结果）"""
+        count = getattr(obj, 'user_count', None)
+        return obj.users.count() if count is None else count
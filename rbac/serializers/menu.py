@@ -19,9 +19,16 @@ class MenuSerializer(serializers.ModelSerializer):
             'menu_type', 'menu_type_display', 'permission_code',
             'parent', 'parent_id', 'parent_title', 'sort_order',
             'is_hidden', 'is_keep_alive', 'is_affix', 'is_frame', 'frame_src',
-            'visible', 'status', 'breadcrumb', 'created_at', 'updated_at'
+            'visible', 'status', 'breadcrumb', 'level', 'tree_path', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'level', 'tree_path', 'created_at', 'updated_at']
+    
+    def validate_parent(self, value):
+        """不能将菜单移动到自身或其下级菜单下（按物化路径判断）"""
+        if value is not None and self.instance is not None and \
+                value.tree_path.startswith(self.instance.tree_path):
+            raise serializers.ValidationError('不能将菜单移动到自身或其下级菜单下')
+        return value
     
     def create(self, validated_data):
         """创建菜单时处理parent字段"""
@@ -49,13 +56,16 @@ class MenuSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
     
     def get_breadcrumb(self, obj):
-        """获取面包屑导航"""
-        breadcrumb = [obj.title]
-        parent = obj.parent
-        while parent:
-            breadcrumb.insert(0, parent.title)
-            parent = parent.parent
-        return breadcrumb
+        """获取面包屑导航（按菜单版本号缓存，见 menu_cache.get_breadcrumbs）"""
+        from ..menu_cache import get_breadcrumbs
+        
+        ancestors = get_breadcrumbs().get((obj.pk, obj.parent_id))
+        if ancestors is not None:
+            return ancestors + [obj.title]
+        # 本事务内新建或移动、尚未反映到缓存中的菜单
+        ancestor_ids = obj.get_ancestor_ids()
+        titles = dict(Menu.objects.filter(id__in=ancestor_ids).values_list('id', 'title')) if ancestor_ids else {}
+        return [titles[menu_id] for menu_id in ancestor_ids if menu_id in titles] + [obj.title]
 
 
 class RoleMenuSerializer(serializers.ModelSerializer):
@@ -19,8 +19,9 @@ class RoleListSerializer(serializers.ModelSerializer):
         ]
     
     def get_user_count(self, obj):
-        """获取用户数量"""
-        return obj.userrole_set.count()
+        """获取用户数量（优先使用视图集 annotate 的结果）"""
+        count = getattr(obj, 'user_count', None)
+        return obj.userrole_set.count() if count is None else count
 
 
 class RoleDetailSerializer(serializers.ModelSerializer):
@@ -38,8 +39,9 @@ class RoleDetailSerializer(serializers.ModelSerializer):
         ]
     
     def get_user_count(self, obj):
-        """获取用户数量"""
-        return obj.userrole_set.count()
+        """获取用户数量（优先使用视图集 annotate 的结果）"""
+        count = getattr(obj, 'user_count', None)
+        return obj.userrole_set.count() if count is None else count
     
     def get_users(self, obj):
         """获取用户详细信息"""
@@ -103,3 +105,18 @@ class RoleUpdateSerializer(serializers.ModelSerializer):
         if Role.objects.filter(code=value).exclude(pk=self.instance.pk).exists():
             raise serializers.ValidationError('角色代码已存在')
         return value
+
+
+class RoleApiPermissionSerializer(serializers.Serializer):
+    """角色API权限分配序列化器"""
+    api_ids = serializers.ListField(child=serializers.IntegerField(), default=list)
+
+
+class RoleMenuPermissionSerializer(serializers.Serializer):
+    """角色菜单权限分配序列化器"""
+    menu_ids = serializers.ListField(child=serializers.IntegerField(), default=list)
+
+
+class RoleUsersSerializer(serializers.Serializer):
+    """角色批量分配 / 移除用户序列化器"""
+    user_ids = serializers.ListField(child=serializers.IntegerField(), default=list)
@@ -1,8 +1,31 @@
 """
 用户相关序列化器
 """
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 from ..models import User, UserRole
+from ..permission_sync import sync_user_roles
+
+
+def prefetch_user_roles():
+    """
+    用户角色的预取：查询集加上 prefetch_related(prefetch_user_roles()) 后，
+    序列化器从 user.prefetched_user_roles 读取，不再逐个用户查询
+    """
+    return Prefetch(
+        'userrole_set',
+        queryset=UserRole.objects.select_related('role').order_by('id'),
+        to_attr='prefetched_user_roles',
+    )
+
+
+def get_user_roles(user):
+    """用户的 UserRole 列表（含角色），优先使用预取结果"""
+    user_roles = getattr(user, 'prefetched_user_roles', None)
+    if user_roles is None:
+        user_roles = user.userrole_set.select_related('role').order_by('id')
+    return user_roles
 
 
 class UserListSerializer(serializers.ModelSerializer):
@@ -31,7 +54,7 @@ class UserListSerializer(serializers.ModelSerializer):
     def get_roles(self, obj):
         """获取用户角色"""
         return [{'id': ur.role.id, 'name': ur.role.name, 'code': ur.role.code, 'data_scope': ur.role.data_scope} 
-                for ur in obj.userrole_set.select_related('role').all()]
+                for ur in get_user_roles(obj)]
 
 
 class UserDetailSerializer(serializers.ModelSerializer):
@@ -50,7 +73,17 @@ class UserDetailSerializer(serializers.ModelSerializer):
     def get_roles(self, obj):
         """获取用户角色详细信息"""
         return [{'id': ur.role.id, 'name': ur.role.name, 'code': ur.role.code, 'description': ur.role.description, 'data_scope': ur.role.data_scope} 
-                for ur in obj.userrole_set.select_related('role').all()]
+                for ur in get_user_roles(obj)]
+
+
+def set_user_roles(user, role_ids):
+    """同步用户角色，存在无效的角色ID时抛出 ValidationError（需在事务内调用以回滚）"""
+    result = sync_user_roles(user, role_ids)
+    if result['missing']:
+        raise serializers.ValidationError({'roles': f"角色不存在: {result['missing']}"})
+    # 预取的角色已过期
+    user.__dict__.pop('prefetched_user_roles', None)
+    return result
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -84,19 +117,12 @@ class UserCreateSerializer(serializers.ModelSerializer):
         roles_data = validated_data.pop('roles', [])
         password_confirm = validated_data.pop('password_confirm', None)
         
-        user = User.objects.create_user(**validated_data)
-        
-        # 分配角色
-        if roles_data:
-            from ..simple_rbac import simple_rbac_manager
-            for role_id in roles_data:
-                UserRole.objects.create(user=user, role_id=role_id)
-                # 同步到Casbin
-                role = UserRole.objects.get(user=user, role_id=role_id).role
-                simple_rbac_manager.add_user_role(user.username, role.role_id)
+        with transaction.atomic():
+            user = User.objects.create_user(**validated_data)
             
-            # 用户创建后，重新加载权限策略
-            simple_rbac_manager.reload_policies()
+            # 分配角色
+            if roles_data:
+                set_user_roles(user, roles_data)
         
         return user
 
@@ -116,27 +142,15 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         """更新用户"""
         roles_data = validated_data.pop('roles', None)
         
-        # 更新用户基本信息
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # 更新角色
-        if roles_data is not None:
-            from ..simple_rbac import simple_rbac_manager
-            from ..models import Role
-            
-            # 删除现有角色（先同步到Casbin）
-            for user_role in instance.userrole_set.all():
-                simple_rbac_manager.remove_user_role(instance.username, user_role.role.role_id)
-            instance.userrole_set.all().delete()
+        with transaction.atomic():
+            # 更新用户基本信息
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
             
-            # 添加新角色
-            for role_id in roles_data:
-                UserRole.objects.create(user=instance, role_id=role_id)
-                # 同步到Casbin
-                role = Role.objects.get(id=role_id)
-                simple_rbac_manager.add_user_role(instance.username, role.role_id)
+            # 更新角色（按差异增删）
+            if roles_data is not None:
+                set_user_roles(instance, roles_data)
         
         return instance
 
@@ -0,0 +1,106 @@
+"""
+RBAC信号处理 - 模型变更在事务提交后增量同步到权限引擎，并通知其他worker
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import USER_CACHE_FIELDS, invalidate_user_snapshot
+from .models import Api, Department, Menu, PolicyRule, RoleMenu, User, UserRole, Role
+from .simple_rbac import get_rbac_manager, simple_rbac_manager
+from .versioning import API_VERSION, DEPARTMENT_VERSION, MENU_VERSION, USER_VERSION, bump_version
+
+
+def _on_commit(apply):
+    """事务提交后再应用，回滚的变更不会进入缓存"""
+    transaction.on_commit(lambda: get_rbac_manager().apply_change(apply))
+
+
+def _on_commit_invalidate():
+    """无法增量应用的变更（修改了已有记录），提交后整体重建"""
+    transaction.on_commit(lambda: get_rbac_manager().apply_change(None))
+
+
+@receiver(post_save, sender=PolicyRule)
+def policy_rule_saved(sender, instance, created, **kwargs):
+    """权限策略新增/修改"""
+    if created:
+        _on_commit(simple_rbac_manager.policy_added(instance.role_id, instance.path, instance.method))
+    else:
+        _on_commit_invalidate()
+
+
+@receiver(post_delete, sender=PolicyRule)
+def policy_rule_deleted(sender, instance, **kwargs):
+    """权限策略删除"""
+    _on_commit(simple_rbac_manager.policy_removed(instance.role_id, instance.path, instance.method))
+
+
+@receiver(post_save, sender=UserRole)
+def user_role_saved(sender, instance, created, **kwargs):
+    """用户角色新增/修改"""
+    if created:
+        _on_commit(simple_rbac_manager.user_role_added(instance.user_id, instance.role_id))
+    else:
+        _on_commit_invalidate()
+
+
+@receiver(post_delete, sender=UserRole)
+def user_role_deleted(sender, instance, **kwargs):
+    """用户角色删除"""
+    _on_commit(simple_rbac_manager.user_role_removed(instance.user_id, instance.role_id))
+
+
+@receiver(post_save, sender=Role)
+def role_saved(sender, instance, **kwargs):
+    """角色新增/修改（激活状态、角色ID）"""
+    _on_commit(simple_rbac_manager.role_saved(instance.pk, instance.role_id, instance.is_active))
+
+
+@receiver(post_delete, sender=Role)
+def role_deleted(sender, instance, **kwargs):
+    """角色删除"""
+    _on_commit(simple_rbac_manager.role_removed(instance.pk))
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def department_changed(sender, **kwargs):
+    """部门新增/修改/删除，使依赖部门树的缓存（数据权限范围等）失效"""
+    bump_version(DEPARTMENT_VERSION)
+
+
+@receiver(post_delete, sender=Department)
+def department_deleted(sender, **kwargs):
+    """删除部门时其用户的 department_id 被批量置空（不触发用户信号），使全部用户快照失效"""
+    bump_version(USER_VERSION)
+
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+@receiver(post_save, sender=RoleMenu)
+@receiver(post_delete, sender=RoleMenu)
+def menu_changed(sender, **kwargs):
+    """菜单或角色菜单变更，使用户菜单树缓存失效"""
+    bump_version(MENU_VERSION)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    用户修改/删除，使该用户的 JWT 认证快照和 token 授权声明失效（见 rbac/authentication.py）
+
+    只按用户失效，不影响其他用户的快照；新建用户、只更新无关字段（如最后登录信息）的保存跳过
+    """
+    if created or (update_fields is not None and not USER_CACHE_FIELDS.intersection(update_fields)):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
+
+
+@receiver(post_save, sender=Api)
+@receiver(post_delete, sender=Api)
+def api_changed(sender, **kwargs):
+    """API定义变更，使 API 日志的路径匹配器重建"""
+    bump_version(API_VERSION)
@@ -1,31 +1,387 @@
-import casbin
+"""
+简化RBAC权限引擎
+
+所有权限数据（PolicyRule / Role / UserRole）在首次权限检查时一次性批量载入进程内快照，
+之后的权限检查不再访问数据库：
+- 本进程内的变更由信号在事务提交后增量应用到快照（见 signals.py），无需整体重载
+- 其他worker的变更通过策略版本号感知：每隔 RBAC_POLICY_CHECK_INTERVAL 秒读取一次
+  版本号，变化后重建快照并原子替换
+
+USE_SIMPLE_RBAC = False 时权限检查改由 casbin Enforcer 完成，见 casbin_rbac.py。
+"""
+import threading
+import time
+
 from django.conf import settings
+from django.utils import timezone
 
-# 最简单的权限检查 - 几行代码解决
-def check_permission(user, url_path, method):
-    """最简单的权限检查"""
-    if not user or not user.is_authenticated:
-        return False
-    
-    if user.is_superuser:
-        return True
-    
-    # 直接检查数据库中的权限
-    from .models import UserRole, PolicyRule
-    
-    # 获取用户角色
-    user_roles = UserRole.objects.filter(user=user, role__is_active=True).values_list('role__role_id', flat=True)
-    
-    # 检查是否有权限
+from .route_matcher import RouteMatcher
+from .versioning import POLICY_VERSION, bump, get_version
+
+
+# 默认权限策略：(角色ID, 路径, 请求方法)
+DEFAULT_POLICIES = [
+    # 超级管理员
+    ('1', '/rbac/api/users/', 'GET'),
+    ('1', '/rbac/api/users/', 'POST'),
+    ('1', '/rbac/api/users/{id}/', 'GET'),
+    ('1', '/rbac/api/users/{id}/', 'PUT'),
+    ('1', '/rbac/api/users/{id}/', 'DELETE'),
+    # 部门经理
+    ('2', '/rbac/api/users/', 'GET'),
+    ('2', '/rbac/api/users/{id}/', 'GET'),
+    ('2', '/rbac/api/departments/', 'GET'),
+    ('2', '/rbac/api/departments/tree/', 'GET'),
+    # 普通员工
+    ('3', '/rbac/api/users/', 'GET'),
+    ('3', '/rbac/auth/profile/', 'GET'),
+    ('3', '/rbac/auth/user-menus/', 'GET'),
+]
+
+
+def normalize_path(url_path):
+    """规范化请求路径"""
     normalized_url = url_path.split('?')[0]  # 移除查询参数
     if not normalized_url.endswith('/') and normalized_url.startswith('/rbac/api/'):
         normalized_url += '/'
-    
-    return PolicyRule.objects.filter(
-        role_id__in=user_roles,
-        path=normalized_url,
-        method=method.upper()
-    ).exists()
+    return normalized_url
+
+
+class PolicySnapshot:
+    """某个策略版本下的权限快照"""
+
+    def __init__(self, version, role_policies, roles, user_roles, load_time):
+        self.version = version
+        self.role_policies = role_policies  # 角色ID -> {(method, path)}
+        self.matcher = RouteMatcher(  # (method, path模式) -> 角色ID
+            (method, path, role_id)
+            for role_id, rules in role_policies.items()
+            for method, path in rules
+        )
+        self.roles = roles  # 角色主键 -> (角色ID, 是否激活)
+        self.user_roles = user_roles  # 用户ID -> {角色主键}
+        self.load_time = load_time  # 载入耗时（秒）
+        self.loaded_at = timezone.now()
+
+    @property
+    def policy_count(self):
+        return sum(len(rules) for rules in self.role_policies.values())
+
+    def get_active_role_pks(self, user_id):
+        """获取用户有效（激活）角色的主键"""
+        return {
+            role_pk for role_pk in self.user_roles.get(user_id, ())
+            if role_pk in self.roles and self.roles[role_pk][1]
+        }
+
+    def get_active_role_ids(self, user_id):
+        """获取用户有效（激活）角色的角色ID"""
+        return self.get_role_ids(self.user_roles.get(user_id, ()))
+
+    def get_role_ids(self, role_pks):
+        """角色主键中有效（激活）角色的角色ID"""
+        role_ids = set()
+        for role_pk in role_pks:
+            role = self.roles.get(role_pk)
+            if role and role[1]:
+                role_ids.add(role[0])
+        return role_ids
+
+
+class SimpleRbacManager:
+    """
+    简化RBAC权限管理器
+
+    快照在首次访问时通过三次批量查询载入；PolicyRule / UserRole / Role 的增删
+    由信号在事务提交后调用 apply_change() 增量应用，不触发整体重载。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._next_check = 0.0
+        # 每次变更递增，用于丢弃变更前开始、变更后才完成的重建结果
+        self._generation = 0
+        self._reload_count = 0
+
+    # ===== 快照管理 =====
+
+    @property
+    def version(self):
+        """当前快照的策略版本号"""
+        return self.get_snapshot().version
+
+    def get_snapshot(self):
+        """获取当前快照，必要时检查版本号并重建"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now < self._next_check:
+            return snapshot
+
+        version = get_version(POLICY_VERSION)
+        self._next_check = now + getattr(settings, 'RBAC_POLICY_CHECK_INTERVAL', 1)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        return self._rebuild(version)
+
+    def reload_policies(self):
+        """强制从数据库重新载入全部权限数据"""
+        return self._rebuild(get_version(POLICY_VERSION))
+
+    def invalidate(self):
+        """丢弃当前快照，下次访问时重建"""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def apply_change(self, apply):
+        """
+        在事务提交后增量应用一次变更
+
+        apply(snapshot) 就地修改快照；同时递增策略版本号通知其他worker。
+        apply 为 None（无法增量应用的变更）或期间其他worker也修改过策略时，在下次访问时整体重建。
+        """
+        version = bump(POLICY_VERSION)
+        with self._lock:
+            self._generation += 1
+            snapshot = self._snapshot
+            if apply is None:
+                self._snapshot = None
+            if snapshot is None or apply is None:
+                return
+            apply(snapshot)
+            if version is not None and snapshot.version == version - 1:
+                snapshot.version = version
+            else:
+                self._next_check = 0.0
+
+    def _rebuild(self, version):
+        generation = self._generation
+        snapshot = self._load_snapshot(version)
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._reload_count += 1
+        return snapshot
+
+    @staticmethod
+    def _load_snapshot(version):
+        """批量载入全部权限数据"""
+        from .models import PolicyRule, Role, UserRole
+
+        started = time.perf_counter()
+
+        role_policies = {}
+        for role_id, path, method in PolicyRule.objects.values_list('role_id', 'path', 'method'):
+            role_policies.setdefault(role_id, set()).add((method.upper(), path))
+        role_policies = {role_id: frozenset(rules) for role_id, rules in role_policies.items()}
+
+        roles = {pk: (role_id, is_active)
+                 for pk, role_id, is_active in Role.objects.values_list('id', 'role_id', 'is_active')}
+
+        user_roles = {}
+        for user_id, role_pk in UserRole.objects.values_list('user_id', 'role_id'):
+            user_roles.setdefault(user_id, set()).add(role_pk)
+        user_roles = {user_id: frozenset(role_pks) for user_id, role_pks in user_roles.items()}
+
+        snapshot = PolicySnapshot(version, role_policies, roles, user_roles, 0)
+        snapshot.load_time = time.perf_counter() - started
+        return snapshot
+
+    # ===== 增量变更（由信号在事务提交后调用） =====
+
+    @staticmethod
+    def policy_added(role_id, path, method):
+        def apply(snapshot):
+            policies = dict(snapshot.role_policies)
+            policies[role_id] = policies.get(role_id, frozenset()) | {(method.upper(), path)}
+            snapshot.role_policies = policies
+            snapshot.matcher.add(method, path, role_id)
+        return apply
+
+    @staticmethod
+    def policy_removed(role_id, path, method):
+        def apply(snapshot):
+            policies = dict(snapshot.role_policies)
+            policies[role_id] = policies.get(role_id, frozenset()) - {(method.upper(), path)}
+            snapshot.role_policies = policies
+            snapshot.matcher.remove(method, path, role_id)
+        return apply
+
+    @staticmethod
+    def role_policies_changed(role_id, added, removed):
+        """批量同步角色策略，added / removed 为 {(method, path)}"""
+        def apply(snapshot):
+            policies = dict(snapshot.role_policies)
+            policies[role_id] = (policies.get(role_id, frozenset()) - removed) | added
+            snapshot.role_policies = policies
+            for method, path in removed:
+                snapshot.matcher.remove(method, path, role_id)
+            for method, path in added:
+                snapshot.matcher.add(method, path, role_id)
+        return apply
+
+    @staticmethod
+    def user_role_added(user_id, role_pk):
+        def apply(snapshot):
+            snapshot.user_roles[user_id] = snapshot.user_roles.get(user_id, frozenset()) | {role_pk}
+        return apply
+
+    @staticmethod
+    def user_role_removed(user_id, role_pk):
+        def apply(snapshot):
+            snapshot.user_roles[user_id] = snapshot.user_roles.get(user_id, frozenset()) - {role_pk}
+        return apply
+
+    @staticmethod
+    def user_roles_changed(user_id, added, removed):
+        """批量同步单个用户的角色，added / removed 为角色主键集合"""
+        def apply(snapshot):
+            snapshot.user_roles[user_id] = (snapshot.user_roles.get(user_id, frozenset()) - removed) | added
+        return apply
+
+    @staticmethod
+    def role_users_changed(role_pk, added_user_ids, removed_user_ids):
+        """批量为多个用户分配 / 移除同一个角色"""
+        def apply(snapshot):
+            for user_id in added_user_ids:
+                snapshot.user_roles[user_id] = snapshot.user_roles.get(user_id, frozenset()) | {role_pk}
+            for user_id in removed_user_ids:
+                snapshot.user_roles[user_id] = snapshot.user_roles.get(user_id, frozenset()) - {role_pk}
+        return apply
+
+    @staticmethod
+    def role_saved(role_pk, role_id, is_active):
+        def apply(snapshot):
+            roles = dict(snapshot.roles)
+            roles[role_pk] = (role_id, is_active)
+            snapshot.roles = roles
+        return apply
+
+    @staticmethod
+    def role_removed(role_pk):
+        def apply(snapshot):
+            roles = dict(snapshot.roles)
+            roles.pop(role_pk, None)
+            snapshot.roles = roles
+        return apply
+
+    # ===== 权限检查 =====
+
+    def check_permission(self, user, url_path, method):
+        """检查用户是否有权限访问指定路径"""
+        if not user or not user.is_authenticated:
+            return False
+
+        if user.is_superuser:
+            return True
+
+        snapshot = self.get_snapshot()
+        claims = getattr(user, 'token_claims', None)
+        if claims is not None and claims.policy_version == snapshot.version:
+            # token 中的角色与当前快照为同一策略版本
+            user_roles = snapshot.get_role_ids(claims.role_ids)
+        else:
+            user_roles = snapshot.get_active_role_ids(user.pk)
+        if not user_roles:
+            return False
+
+        # 策略路径支持 {id} 参数和 * / ** 通配，见 route_matcher.py
+        return snapshot.matcher.matches_any(method, normalize_path(url_path), user_roles)
+
+    def get_user_roles(self, user):
+        """获取用户的有效角色ID列表，user 可以是用户对象或用户名"""
+        user_id = self._get_user_id(user)
+        if user_id is None:
+            return []
+        return sorted(self.get_snapshot().get_active_role_ids(user_id))
+
+    # ===== 数据维护（写数据库，快照由信号同步） =====
+
+    def add_role_policy(self, role_id, url_pattern, method):
+        """添加角色权限，返回是否新建"""
+        from .models import PolicyRule
+        _, created = PolicyRule.objects.get_or_create(
+            role_id=role_id,
+            path=url_pattern,
+            method=method.upper()
+        )
+        return created
+
+    def remove_role_policy(self, role_id, url_pattern, method):
+        """删除角色权限，返回是否删除了记录"""
+        from .models import PolicyRule
+        deleted, _ = PolicyRule.objects.filter(
+            role_id=role_id,
+            path=url_pattern,
+            method=method.upper()
+        ).delete()
+        return deleted > 0
+
+    def get_role_policies(self, role_id):
+        """获取角色权限 [(path, method)]"""
+        return sorted((path, method) for method, path in self.get_snapshot().role_policies.get(role_id, ()))
+
+    def add_user_role(self, user, role_id):
+        """为用户分配角色，user 可以是用户对象或用户名，role_id 为角色ID（非主键）"""
+        from .models import Role, UserRole
+        user_id = self._get_user_id(user)
+        role = Role.objects.filter(role_id=role_id).first()
+        if user_id is None or role is None:
+            return False
+        _, created = UserRole.objects.get_or_create(user_id=user_id, role=role)
+        return created
+
+    def remove_user_role(self, user, role_id):
+        """移除用户角色，user 可以是用户对象或用户名，role_id 为角色ID（非主键）"""
+        from .models import UserRole
+        user_id = self._get_user_id(user)
+        if user_id is None:
+            return False
+        deleted, _ = UserRole.objects.filter(user_id=user_id, role__role_id=role_id).delete()
+        return deleted > 0
+
+    def get_stats(self):
+        """权限引擎统计信息"""
+        snapshot = self.get_snapshot()
+        return {
+            'version': snapshot.version,
+            'policy_count': snapshot.policy_count,
+            'role_count': len(snapshot.roles),
+            'user_count': len(snapshot.user_roles),
+            'load_time_ms': round(snapshot.load_time * 1000, 2),
+            'loaded_at': snapshot.loaded_at,
+            'reload_count': self._reload_count,
+        }
+
+    def _get_default_policies(self):
+        """获取默认权限策略"""
+        return list(DEFAULT_POLICIES)
+
+    @staticmethod
+    def _get_user_id(user):
+        if isinstance(user, str):
+            from .models import User
+            return User.objects.filter(username=user).values_list('id', flat=True).first()
+        return getattr(user, 'pk', user)
+
+
+simple_rbac_manager = SimpleRbacManager()
+
+
+def get_rbac_manager():
+    """根据 settings.USE_SIMPLE_RBAC 返回当前使用的权限管理器"""
+    if getattr(settings, 'USE_SIMPLE_RBAC', True):
+        return simple_rbac_manager
+    from .casbin_rbac import casbin_rbac_manager
+    return casbin_rbac_manager
+
+
+# 最简单的权限检查 - 几行代码解决
+def check_permission(user, url_path, method):
+    """最简单的权限检查"""
+    return get_rbac_manager().check_permission(user, url_path, method)
 
 # 最简单的权限类
 class SimplePermission:
@@ -35,23 +391,12 @@ class SimplePermission:
 # 为了兼容现有代码，保留一些基础方法
 def add_role_policy(role_id, url_pattern, method):
     """添加角色权限"""
-    from .models import PolicyRule
-    PolicyRule.objects.get_or_create(
-        role_id=role_id,
-        path=url_pattern,
-        method=method.upper()
-    )
+    return simple_rbac_manager.add_role_policy(role_id, url_pattern, method)
 
 def remove_role_policy(role_id, url_pattern, method):
     """删除角色权限"""
-    from .models import PolicyRule
-    PolicyRule.objects.filter(
-        role_id=role_id,
-        path=url_pattern,
-        method=method.upper()
-    ).delete()
+    return simple_rbac_manager.remove_role_policy(role_id, url_pattern, method)
 
 def get_role_policies(role_id):
     """获取角色权限"""
-    from .models import PolicyRule
-    return PolicyRule.objects.filter(role_id=role_id).values_list('path', 'method')
\ No newline at end of file
+    return get_rbac_manager().get_role_policies(role_id)
@@ -0,0 +1,74 @@
+"""
+测试辅助工具
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(func, using=DEFAULT_DB_ALIAS):
+    """执行 func()，返回 (执行的SQL数量, 捕获的查询列表)"""
+    with CaptureQueriesContext(connections[using]) as context:
+        func()
+    return len(context), context.captured_queries
+
+
+def assert_constant_queries(test_case, request_for_size, sizes=(1, 10, 50), expected=None, using=DEFAULT_DB_ALIAS,
+                            prepare=None):
+    """
+    断言查询数量与数据规模无关（用于发现序列化器中的 N+1 查询）
+
+    Args:
+        test_case: unittest.TestCase 实例
+        request_for_size: 接收规模参数（如 page_size）并执行请求的函数
+        sizes: 依次尝试的规模
+        expected: 期望的固定查询数，为空时只要求各规模的查询数相同
+        prepare: 每个规模执行请求前调用 prepare(size) 准备数据（不计入查询数），用于不分页的接口
+
+    Returns:
+        固定的查询数量
+    """
+    results = {}
+    for size in sizes:
+        if prepare is not None:
+            prepare(size)
+        results[size] = count_queries(lambda: request_for_size(size), using=using)
+
+    counts = {size: count for size, (count, _) in results.items()}
+    baseline = expected if expected is not None else counts[sizes[0]]
+    for size, (count, queries) in results.items():
+        if count != baseline:
+            executed = '\n'.join(f'{i}. {query["sql"]}' for i, query in enumerate(queries, start=1))
+            test_case.fail(f'查询数量随规模变化: {counts}（期望 {baseline}）\n规模 {size} 执行的SQL:\n{executed}')
+    return baseline
+
+
+class ConstantQueriesMixin:
+    """TestCase 混入类，提供 assertConstantQueries"""
+
+    def assertConstantQueries(self, request_for_size, sizes=(1, 10, 50), expected=None, using=DEFAULT_DB_ALIAS,
+                              prepare=None):
+        return assert_constant_queries(
+            self, request_for_size, sizes=sizes, expected=expected, using=using, prepare=prepare,
+        )
+
+
+def clear_process_caches():
+    """
+    清空全部进程内缓存（权限快照、版本号、数据权限、菜单、列表总数、用户快照）
+
+    TransactionTestCase 每个用例结束后清空数据表，版本号随之回到 0，
+    用例开始时调用以免命中上一个用例留下的同版本号缓存。
+    """
+    from .authentication import clear_user_cache
+    from .data_scope import clear_scope_cache
+    from .menu_cache import clear_menu_cache
+    from .pagination import clear_count_cache
+    from .simple_rbac import simple_rbac_manager
+    from .versioning import clear_cached_versions
+
+    clear_cached_versions()
+    simple_rbac_manager.invalidate()
+    clear_scope_cache()
+    clear_menu_cache()
+    clear_count_cache()
+    clear_user_cache()
@@ -0,0 +1,205 @@
+"""
+API日志测试
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from rbac.api_log import MASK, ApiLogWriter
+from rbac.models import Api, ApiGroup, ApiLog, ApiLogHourlyStat, User
+
+
+def create_log(created_at, **kwargs):
+    return ApiLog.objects.create(**{
+        'method': 'GET', 'path': '/rbac/api/users/', 'ip_address': '127.0.0.1',
+        'status_code': 200, 'response_time': 0.01, 'created_at': created_at, **kwargs,
+    })
+
+
+def make_record(**kwargs):
+    return {
+        'user_id': None, 'method': 'GET', 'path': '/rbac/api/users/', 'ip_address': '127.0.0.1',
+        'user_agent': 'test', 'request_data': None, 'response_data': None,
+        'status_code': 200, 'response_time': 0.01, 'created_at': timezone.now(), **kwargs,
+    }
+
+
+@override_settings(API_LOG={'BATCH_SIZE': 2, 'FLUSH_INTERVAL': 60})
+class ApiLogWriterTests(TransactionTestCase):
+
+    def setUp(self):
+        self.writer = ApiLogWriter()
+
+    def tearDown(self):
+        self.writer.flush()
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, '等待写入线程超时')
+            time.sleep(0.01)
+
+    def test_batches_and_flush_on_shutdown(self):
+        with mock.patch.object(ApiLog.objects, 'bulk_create', wraps=ApiLog.objects.bulk_create) as bulk_create:
+            for _ in range(5):
+                self.assertTrue(self.writer.enqueue(make_record()))
+            # 满 BATCH_SIZE 条即写入，不等待 FLUSH_INTERVAL
+            self.wait_for(lambda: self.writer.written == 4)
+            self.assertEqual(ApiLog.objects.count(), 4)
+            # flush 停止线程并写入剩余的不满一批的记录
+            self.writer.flush()
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual(self.writer.get_stats(), {'queued': 0, 'written': 5, 'dropped': 0, 'failed': 0})
+
+        # flush 之后再次入队会重新启动写入线程
+        self.writer.enqueue(make_record())
+        self.writer.flush()
+        self.assertEqual(ApiLog.objects.count(), 6)
+
+    @override_settings(API_LOG={'BATCH_SIZE': 10, 'FLUSH_INTERVAL': 60, 'MAX_BODY_LENGTH': 200})
+    def test_sensitive_fields_are_masked(self):
+        self.writer.enqueue(make_record(
+            request_data=json.dumps({'username': 'alice', 'password': 'secret', 'profile': {'token': 't'}}),
+            response_data='refresh=abc&next=/home',
+        ))
+        self.writer.flush()
+        log = ApiLog.objects.get()
+        self.assertEqual(json.loads(log.request_data), {'username': 'alice', 'password': MASK, 'profile': {'token': MASK}})
+        self.assertEqual(log.response_data, f'refresh={MASK}&next=/home')
+
+    @override_settings(TIME_ZONE='Asia/Shanghai')
+    def test_log_date_is_local_date(self):
+        self.writer.enqueue(make_record(created_at=datetime(2026, 1, 1, 20, 0, tzinfo=dt_timezone.utc)))
+        self.writer.flush()
+        self.assertEqual(ApiLog.objects.get().log_date, datetime(2026, 1, 2).date())
+
+
+class ApiLogOverflowTests(TestCase):
+    """队列已满时的 OVERFLOW 策略（不启动写入线程，队列只由测试消费）"""
+
+    def setUp(self):
+        self.writer = ApiLogWriter()
+        self.writer._queue = queue.Queue(maxsize=1)
+        patcher = mock.patch.object(self.writer, '_ensure_started')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assertTrue(self.writer.enqueue(make_record()))
+
+    @override_settings(API_LOG={'OVERFLOW': 'drop'})
+    def test_drop(self):
+        self.assertFalse(self.writer.enqueue(make_record()))
+        self.assertEqual(self.writer.get_stats()['dropped'], 1)
+
+    @override_settings(API_LOG={'OVERFLOW': 'block', 'BLOCK_TIMEOUT': 0.05})
+    def test_block_times_out(self):
+        started = time.monotonic()
+        self.assertFalse(self.writer.enqueue(make_record()))
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(self.writer.get_stats()['dropped'], 1)
+
+    @override_settings(API_LOG={'OVERFLOW': 'block', 'BLOCK_TIMEOUT': 5})
+    def test_block_waits_for_space(self):
+        consumer = threading.Timer(0.05, self.writer._queue.get)
+        consumer.start()
+        self.assertTrue(self.writer.enqueue(make_record()))
+        consumer.join()
+        self.assertEqual(self.writer.get_stats(), {'queued': 1, 'written': 0, 'dropped': 0, 'failed': 0})
+
+
+class ApiLogRetentionTests(TestCase):
+
+    def test_delete_day(self):
+        now = timezone.now()
+        create_log(now)
+        create_log(now - timedelta(days=1))
+        self.assertEqual(ApiLog.objects.log_dates(), [timezone.localdate(now - timedelta(days=1)), timezone.localdate(now)])
+        self.assertEqual(ApiLog.objects.delete_day(timezone.localdate(now)), 1)
+        self.assertEqual(ApiLog.objects.count(), 1)
+
+    def test_delete_day_in_batches(self):
+        now = timezone.now()
+        for _ in range(5):
+            create_log(now)
+        kept = create_log(now - timedelta(days=1))
+        with self.assertNumQueries(7):  # 3 批 × (取主键 + DELETE) + 最后一次空查询
+            self.assertEqual(ApiLog.objects.delete_day(timezone.localdate(now), batch_size=2), 5)
+        self.assertEqual(list(ApiLog.objects.values_list('id', flat=True)), [kept.id])
+
+    def test_prune_command(self):
+        now = timezone.now()
+        recent = create_log(now)
+        create_log(now - timedelta(days=40))
+        create_log(now - timedelta(days=41))
+        call_command('prune_api_logs', days=30, batch_size=1, stdout=StringIO())
+        self.assertEqual(list(ApiLog.objects.values_list('id', flat=True)), [recent.id])
+
+
+class ApiLogHourlyStatTests(TestCase):
+
+    def setUp(self):
+        self.hour = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+        self.api = Api.objects.create(name='用户列表', path='/rbac/api/users/', method='GET',
+                                      group=ApiGroup.objects.create(name='系统'))
+
+    def test_counts_and_percentiles(self):
+        # 1ms..100ms 倒序写入，其中 10 条为错误
+        for i in range(100, 0, -1):
+            create_log(self.hour + timedelta(seconds=i), api=self.api, response_time=i / 1000,
+                       status_code=500 if i % 10 == 0 else 200)
+        create_log(self.hour + timedelta(minutes=30), status_code=404, response_time=0.2)
+        create_log(self.hour - timedelta(seconds=1), api=self.api)
+        create_log(self.hour + timedelta(hours=1), api=self.api)
+
+        self.assertEqual(ApiLogHourlyStat.objects.rollup(self.hour + timedelta(minutes=15)), 2)
+        stat = ApiLogHourlyStat.objects.get(api=self.api)
+        self.assertEqual(stat.hour, self.hour)
+        self.assertEqual((stat.request_count, stat.error_count), (100, 10))
+        self.assertAlmostEqual(stat.avg_response_time, 0.0505)
+        self.assertEqual(
+            (stat.p50_response_time, stat.p95_response_time, stat.p99_response_time, stat.max_response_time),
+            (0.05, 0.095, 0.099, 0.1),
+        )
+        unknown = ApiLogHourlyStat.objects.get(api=None)
+        self.assertEqual((unknown.request_count, unknown.error_count, unknown.p99_response_time), (1, 1, 0.2))
+
+    def test_rerun_replaces_hour(self):
+        create_log(self.hour, api=self.api)
+        other_hour = ApiLogHourlyStat.objects.create(hour=self.hour - timedelta(hours=1), api=self.api, request_count=7)
+        self.assertEqual(ApiLogHourlyStat.objects.rollup(self.hour), 1)
+
+        create_log(self.hour + timedelta(minutes=59), api=self.api, status_code=500)
+        self.assertEqual(ApiLogHourlyStat.objects.rollup(self.hour), 1)
+        stat = ApiLogHourlyStat.objects.get(hour=self.hour)
+        self.assertEqual((stat.request_count, stat.error_count), (2, 1))
+        self.assertEqual(ApiLogHourlyStat.objects.get(pk=other_hour.pk).request_count, 7)
+
+    def test_empty_hour(self):
+        ApiLogHourlyStat.objects.create(hour=self.hour, api=self.api, request_count=3)
+        self.assertEqual(ApiLogHourlyStat.objects.rollup(self.hour), 0)
+        self.assertFalse(ApiLogHourlyStat.objects.exists())
+
+
+@override_settings(API_LOG={'ENABLED': False})
+class ApiLogExportTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='password'))
+
+    def test_csv_escapes_formulas(self):
+        create_log(timezone.now(), path='=HYPERLINK("http://example.com")', user_agent='@SUM(A1)')
+        response = self.client.get('/rbac/api/api-logs/export/')
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        row = content.splitlines()[1]
+        self.assertIn('"\'=HYPERLINK(""http://example.com"")"', row)
+        self.assertIn("'@SUM(A1)", row)
+        self.assertNotIn(',=', row)
@@ -0,0 +1,105 @@
+"""
+JWT 认证用户快照与 token 授权声明测试
+"""
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from rbac.authentication import CachedJWTAuthentication, add_authorization_claims, get_user_snapshot
+from rbac.models import Department, PolicyRule, Role, User, UserRole
+from rbac.testing import clear_process_caches
+from rbac.versioning import POLICY_VERSION, bump, get_backend, user_version_name
+
+
+@override_settings(RBAC_TOKEN_CLAIMS=True, RBAC_POLICY_CHECK_INTERVAL=60)
+class UserSnapshotTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.alice = User.objects.create_user('alice', password='password')
+        self.bob = User.objects.create_user('bob', password='password')
+        UserRole.objects.create(user=self.alice, role=Role.objects.create(role_id='staff', name='员工', code='staff'))
+
+    def authenticate(self, user):
+        token = AccessToken(str(add_authorization_claims(AccessToken.for_user(user), user)))
+        return token, CachedJWTAuthentication().get_user(token)
+
+    def test_save_evicts_only_that_user(self):
+        alice, bob = get_user_snapshot(self.alice.pk), get_user_snapshot(self.bob.pk)
+        self.alice.data_scope = 1
+        self.alice.save()
+        self.assertIsNot(get_user_snapshot(self.alice.pk), alice)
+        self.assertEqual(get_user_snapshot(self.alice.pk).data_scope, 1)
+        self.assertIs(get_user_snapshot(self.bob.pk), bob)
+
+    def test_unrelated_field_save_keeps_snapshot(self):
+        snapshot = get_user_snapshot(self.alice.pk)
+        self.alice.last_login_ip = '10.0.0.1'
+        self.alice.save(update_fields=['last_login_ip'])
+        self.assertIs(get_user_snapshot(self.alice.pk), snapshot)
+
+    def test_role_policy_and_department_changes_keep_snapshot(self):
+        department = Department.objects.create(name='总部', code='hq')
+        snapshot = get_user_snapshot(self.alice.pk)
+        Role.objects.filter(role_id='staff').get().save()
+        PolicyRule.objects.create(role_id='staff', path='/rbac/api/users/', method='GET')
+        UserRole.objects.create(user=self.bob, role=Role.objects.get())
+        department.name = '总公司'
+        department.save()
+        self.assertIs(get_user_snapshot(self.alice.pk), snapshot)
+
+    def test_department_delete_evicts_its_users(self):
+        department = Department.objects.create(name='总部', code='hq')
+        User.objects.filter(pk=self.alice.pk).update(department=department)
+        self.assertEqual(get_user_snapshot(self.alice.pk).department_id, department.pk)
+        department.delete()
+        self.assertIsNone(get_user_snapshot(self.alice.pk).department_id)
+
+    @override_settings(RBAC_POLICY_CHECK_INTERVAL=0)
+    def test_change_in_other_worker(self):
+        self.assertTrue(get_user_snapshot(self.alice.pk).is_active)
+        # 其他 worker 保存用户：只递增该用户的版本号，本进程的快照不会被直接移除
+        User.objects.filter(pk=self.alice.pk).update(is_active=False)
+        get_backend().bump(user_version_name(self.alice.pk))
+        self.assertFalse(get_user_snapshot(self.alice.pk).is_active)
+
+    def test_claims_survive_other_users_changes(self):
+        token, user = self.authenticate(self.alice)
+        self.assertEqual(user.token_claims.role_ids, {UserRole.objects.get().role_id})
+
+        self.bob.first_name = 'Bob'
+        self.bob.save()
+        self.assertIsNotNone(getattr(CachedJWTAuthentication().get_user(token), 'token_claims', None))
+
+        self.alice.first_name = 'Alice'
+        self.alice.save()
+        self.assertIsNone(getattr(CachedJWTAuthentication().get_user(token), 'token_claims', None))
+
+    def test_claims_ignored_after_policy_change(self):
+        token, user = self.authenticate(self.alice)
+        self.assertIsNotNone(user.token_claims)
+        bump(POLICY_VERSION)
+        self.assertIsNone(getattr(CachedJWTAuthentication().get_user(token), 'token_claims', None))
+
+
+@override_settings(RBAC_TOKEN_CLAIMS=True, API_LOG={'ENABLED': False})
+class TokenRefreshTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.user = User.objects.create_user('alice', password='password')
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post('/rbac/auth/token/refresh/', {'refresh': str(token)}, format='json')
+
+    def test_refresh_adds_claims(self):
+        response = self.refresh(RefreshToken.for_user(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.json()['data']['access'])['role_ids'], [])
+
+    def test_refresh_rejects_inactive_user(self):
+        token = RefreshToken.for_user(self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh(token).status_code, 401)
@@ -0,0 +1,57 @@
+"""
+Casbin 权限引擎测试
+"""
+from django.test import TransactionTestCase, override_settings
+
+from rbac.casbin_rbac import casbin_rbac_manager
+from rbac.models import PolicyRule, Role, User, UserRole
+from rbac.simple_rbac import check_permission, get_rbac_manager
+from rbac.testing import clear_process_caches
+
+
+class CasbinRbacManagerTests(TransactionTestCase):
+    """同一组策略在两种引擎下的判定一致"""
+
+    CASES = [
+        ('/rbac/api/users/42/', 'GET', True),
+        ('/rbac/api/users/', 'GET', False),
+        ('/rbac/api/roles/1/', 'GET', True),
+        ('/rbac/api/roles/1/users/', 'GET', False),
+        ('/rbac/api/menus', 'GET', True),
+        ('/rbac/api/menus/', 'GET', True),
+        ('/rbac/api/menus/1/children/', 'GET', True),
+        ('/rbac/api/menus/1/', 'DELETE', False),
+        ('/rbac/api/menusx/', 'GET', False),
+    ]
+
+    def setUp(self):
+        clear_process_caches()
+        casbin_rbac_manager.invalidate()
+        self.user = User.objects.create_user('staff', password='password')
+        role = Role.objects.create(role_id='staff', name='员工', code='staff')
+        UserRole.objects.create(user=self.user, role=role)
+        PolicyRule.objects.bulk_create([
+            PolicyRule(role_id='staff', path='/rbac/api/users/{id}/', method='GET'),
+            PolicyRule(role_id='staff', path='/rbac/api/roles/*/', method='GET'),
+            PolicyRule(role_id='staff', path='/rbac/api/menus/**', method='GET'),
+        ])
+
+    def assert_cases(self):
+        for path, method, expected in self.CASES:
+            with self.subTest(path=path, method=method):
+                self.assertEqual(check_permission(self.user, path, method), expected)
+
+    def test_simple_engine(self):
+        self.assert_cases()
+
+    @override_settings(USE_SIMPLE_RBAC=False)
+    def test_casbin_engine(self):
+        self.assertIs(get_rbac_manager(), casbin_rbac_manager)
+        self.assert_cases()
+
+    @override_settings(USE_SIMPLE_RBAC=False)
+    def test_casbin_reloads_on_change(self):
+        self.assertFalse(check_permission(self.user, '/rbac/api/depts/', 'GET'))
+        PolicyRule.objects.create(role_id='staff', path='/rbac/api/depts/', method='GET')
+        self.assertTrue(check_permission(self.user, '/rbac/api/depts/', 'GET'))
+        self.assertEqual(casbin_rbac_manager.get_user_roles(self.user), ['staff'])
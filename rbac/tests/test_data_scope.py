@@ -0,0 +1,74 @@
+"""
+有效数据权限范围测试
+"""
+from django.test import TransactionTestCase, override_settings
+
+from rbac.data_scope import SCOPE_DEPT, SCOPE_DEPT_AND_BELOW, SCOPE_SELF, get_effective_scope, resolve_scope
+from rbac.models import Department, Role, User, UserRole
+from rbac.testing import clear_process_caches
+
+
+@override_settings(RBAC_POLICY_CHECK_INTERVAL=60)
+class EffectiveScopeTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.hq = Department.objects.create(name='总部', code='hq')
+        self.branch = Department.objects.create(name='分部', code='branch', parent=self.hq)
+        self.user = User.objects.create_user('alice', password='password', department=self.hq, data_scope=SCOPE_SELF)
+
+    def add_role(self, code, data_scope, is_active=True):
+        role = Role.objects.create(role_id=code, name=code, code=code, data_scope=data_scope, is_active=is_active)
+        UserRole.objects.create(user=self.user, role=role)
+        return role
+
+    def get_scope(self):
+        # 每次使用新的用户对象，模拟新的请求（跳过用户对象上的请求内缓存）
+        return get_effective_scope(User.objects.get(pk=self.user.pk))
+
+    def test_most_permissive_role(self):
+        self.add_role('self', SCOPE_SELF)
+        self.add_role('dept', SCOPE_DEPT)
+        self.add_role('dept-below', SCOPE_DEPT_AND_BELOW)
+        scope = resolve_scope(self.user)
+        self.assertEqual(scope.scope, SCOPE_DEPT_AND_BELOW)
+        self.assertEqual(scope.department_ids, {self.hq.pk, self.branch.pk})
+
+    def test_user_scope_without_roles(self):
+        self.user.data_scope = SCOPE_DEPT
+        scope = resolve_scope(self.user)
+        self.assertEqual((scope.scope, scope.department_ids), (SCOPE_DEPT, {self.hq.pk}))
+
+    def test_inactive_roles_are_ignored(self):
+        self.add_role('all', 1, is_active=False)
+        self.assertEqual(resolve_scope(self.user).scope, SCOPE_SELF)
+
+        self.user.data_scope = SCOPE_DEPT
+        self.assertEqual(resolve_scope(self.user).scope, SCOPE_DEPT)  # 只有停用的角色时使用用户自身的 data_scope
+        self.add_role('self', SCOPE_SELF)
+        self.assertEqual(resolve_scope(self.user).scope, SCOPE_SELF)
+
+    def test_resolved_once_per_user_object(self):
+        user = User.objects.get(pk=self.user.pk)
+        scope = get_effective_scope(user)
+        with self.assertNumQueries(0):
+            self.assertIs(get_effective_scope(user), scope)
+
+    def test_role_change_invalidates_cache(self):
+        role = self.add_role('dept', SCOPE_DEPT)
+        self.assertEqual(self.get_scope().scope, SCOPE_DEPT)
+
+        # 绕过信号的修改不会使缓存失效
+        Role.objects.filter(pk=role.pk).update(data_scope=SCOPE_DEPT_AND_BELOW)
+        self.assertEqual(self.get_scope().scope, SCOPE_DEPT)
+
+        role.data_scope = SCOPE_DEPT_AND_BELOW
+        role.save()
+        self.assertEqual(self.get_scope().scope, SCOPE_DEPT_AND_BELOW)
+
+    def test_department_change_invalidates_cache(self):
+        self.add_role('dept-below', SCOPE_DEPT_AND_BELOW)
+        self.assertEqual(self.get_scope().department_ids, {self.hq.pk, self.branch.pk})
+
+        team = Department.objects.create(name='小组', code='team', parent=self.branch)
+        self.assertEqual(self.get_scope().department_ids, {self.hq.pk, self.branch.pk, team.pk})
@@ -0,0 +1,57 @@
+"""
+部门闭包表测试
+"""
+from django.test import TestCase
+
+from rbac.models import Department, DepartmentClosure
+
+
+class DepartmentClosureTests(TestCase):
+
+    def setUp(self):
+        self.a = Department.objects.create(name='A', code='a')
+        self.b = Department.objects.create(name='B', code='b', parent=self.a)
+        self.c = Department.objects.create(name='C', code='c', parent=self.b)
+        self.d = Department.objects.create(name='D', code='d', parent=self.a)
+        self.e = Department.objects.create(name='E', code='e', parent=self.d)
+
+    def descendant_codes(self, department, **kwargs):
+        ids = department.get_descendant_ids(**kwargs)
+        return sorted(Department.objects.filter(id__in=ids).values_list('code', flat=True))
+
+    def test_descendants(self):
+        self.assertEqual(self.descendant_codes(self.a), ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(self.descendant_codes(self.a, include_self=False), ['b', 'c', 'd', 'e'])
+        self.assertEqual(self.descendant_codes(self.d), ['d', 'e'])
+        self.assertEqual(DepartmentClosure.objects.get(ancestor=self.a, descendant=self.e).depth, 2)
+
+    def test_descendant_filter_is_one_query(self):
+        with self.assertNumQueries(1):
+            list(Department.objects.filter(id__in=self.a.get_descendant_ids()))
+
+    def test_move_subtree(self):
+        self.d.parent = self.c
+        self.d.save()
+        self.assertEqual(self.descendant_codes(self.b), ['b', 'c', 'd', 'e'])
+        self.assertEqual(DepartmentClosure.objects.get(ancestor=self.a, descendant=self.e).depth, 4)
+        self.assertFalse(DepartmentClosure.objects.filter(ancestor=self.d, descendant=self.c).exists())
+
+    def test_rejects_cycle(self):
+        self.b.parent = self.c
+        with self.assertRaises(ValueError):
+            self.b.save()
+        self.assertEqual(DepartmentClosure.objects.get(ancestor=self.a, descendant=self.c).depth, 2)
+
+    def test_inactive_department_hides_subtree(self):
+        Department.objects.filter(pk=self.b.pk).update(status=False)
+        self.assertEqual(self.descendant_codes(self.a), ['a', 'd', 'e'])
+
+    def test_delete_removes_rows(self):
+        self.d.delete()
+        self.assertFalse(DepartmentClosure.objects.filter(descendant__code__in=['d', 'e']).exists())
+
+    def test_rebuild(self):
+        count = DepartmentClosure.objects.count()
+        DepartmentClosure.objects.all().delete()
+        self.assertEqual(DepartmentClosure.objects.rebuild(), count)
+        self.assertEqual(self.descendant_codes(self.a), ['a', 'b', 'c', 'd', 'e'])
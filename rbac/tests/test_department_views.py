@@ -0,0 +1,72 @@
+"""
+部门列表 / 部门树接口测试 - ETag 与数据权限范围
+"""
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from rbac.models import Department, PolicyRule, Role, User, UserRole
+from rbac.testing import clear_process_caches
+
+
+LIST_URL = '/rbac/api/departments/'
+TREE_URL = '/rbac/api/departments/tree/'
+
+
+@override_settings(API_LOG={'ENABLED': False}, RBAC_POLICY_CHECK_INTERVAL=60)
+class DepartmentViewTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.hq = Department.objects.create(name='总部', code='hq')
+        self.branch = Department.objects.create(name='分部', code='branch', parent=self.hq)
+        self.team = Department.objects.create(name='小组', code='team', parent=self.branch)
+        self.other = Department.objects.create(name='其他', code='other', parent=self.hq)
+
+        role = Role.objects.create(role_id='manager', name='经理', code='manager', data_scope=2)
+        PolicyRule.objects.bulk_create([
+            PolicyRule(role_id='manager', path=LIST_URL, method='GET'),
+            PolicyRule(role_id='manager', path=TREE_URL, method='GET'),
+        ])
+        self.manager = User.objects.create_user('manager', password='password', department=self.branch)
+        UserRole.objects.create(user=self.manager, role=role)
+        self.admin = User.objects.create_superuser('admin', password='password')
+        self.client = APIClient()
+
+    def get(self, url, user, etag=None):
+        self.client.force_authenticate(user)
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def test_not_modified_until_department_changes(self):
+        for url in (LIST_URL, TREE_URL):
+            with self.subTest(url=url):
+                etag = self.get(url, self.admin)['ETag']
+                response = self.get(url, self.admin, etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+                self.team.name = f'小组-{url}'
+                self.team.save()
+                response = self.get(url, self.admin, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                self.assertIn(self.team.name, response.content.decode('utf-8'))
+
+    def test_etag_depends_on_scope(self):
+        for url in (LIST_URL, TREE_URL):
+            with self.subTest(url=url):
+                etag = self.get(url, self.admin)['ETag']
+                self.assertEqual(self.get(url, self.manager, etag).status_code, 200)
+
+    def test_scoped_tree_promotes_root(self):
+        data = self.get(TREE_URL, self.manager).json()['data']
+        # 分部的上级（总部）不在可见范围内，分部作为根节点
+        self.assertEqual([(node['name'], [child['name'] for child in node['children']]) for node in data],
+                         [('分部', ['小组'])])
+
+    def test_scoped_list_keeps_ancestor_path(self):
+        data = self.get(LIST_URL, self.manager).json()['data']
+        rows = {row['code']: row for row in data}
+        self.assertEqual(set(rows), {'branch', 'team'})
+        self.assertEqual((rows['branch']['parent_name'], rows['branch']['path']), ('总部', '总部 > 分部'))
+        self.assertEqual(rows['team']['path'], '总部 > 分部 > 小组')
@@ -0,0 +1,69 @@
+"""
+列表接口查询数量测试 - 查询数不随每页条数（或数据量）增长
+"""
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from rbac.models import Api, ApiGroup, Department, Role, User, UserRole
+from rbac.testing import ConstantQueriesMixin, clear_process_caches
+
+
+@override_settings(API_LOG={'ENABLED': False}, RBAC_POLICY_CHECK_INTERVAL=60)
+class ListQueryCountTests(ConstantQueriesMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='password')
+        cls.department = Department.objects.create(name='总部', code='hq')
+        users = User.objects.bulk_create(User(username=f'user{i:02d}', department=cls.department) for i in range(5))
+        for i in range(60):
+            role = Role.objects.create(role_id=f'role{i:02d}', name=f'角色{i}', code=f'role{i:02d}')
+            UserRole.objects.bulk_create(UserRole(user=user, role=role) for user in users[:i % 5])
+            group = ApiGroup.objects.create(name=f'分组{i:02d}', sort_order=i)
+            Api.objects.bulk_create(
+                Api(name=f'api{i}-{j}', path=f'/rbac/api/g{i}/{j}/', method='GET', group=group) for j in range(i % 3)
+            )
+
+    def setUp(self):
+        clear_process_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get_list(self, url, size):
+        response = self.client.get(url, {'page_size': size})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_role_list(self):
+        self.get_list('/rbac/api/roles/', 1)
+        self.assertConstantQueries(lambda size: self.get_list('/rbac/api/roles/', size))
+        results = self.get_list('/rbac/api/roles/', 5).json()['data']['results']
+        for role in results:
+            self.assertEqual(role['user_count'], int(role['code'][4:]) % 5)
+
+    def test_api_group_list(self):
+        self.get_list('/rbac/api/api-groups/', 1)
+        self.assertConstantQueries(lambda size: self.get_list('/rbac/api/api-groups/', size))
+        results = self.get_list('/rbac/api/api-groups/', 3).json()['data']['results']
+        self.assertEqual([group['apis_count'] for group in results], [0, 1, 2])
+
+    def test_user_list(self):
+        self.get_list('/rbac/api/users/', 1)
+        self.assertConstantQueries(lambda size: self.get_list('/rbac/api/users/', size), sizes=(1, 3, 6))
+
+    def test_department_list_and_tree(self):
+        def prepare(size):
+            existing = Department.objects.filter(parent=self.department).count()
+            Department.objects.bulk_create(
+                Department(name=f'部门{i}', code=f'dept{i}', parent=self.department) for i in range(existing, size)
+            )
+
+        for url in ('/rbac/api/departments/', '/rbac/api/departments/tree/'):
+            with self.subTest(url=url):
+                self.client.get(url)
+                self.assertConstantQueries(lambda size: self.client.get(url), prepare=prepare)
+
+    def test_department_detail_counts(self):
+        Department.objects.create(name='子部门', code='child', parent=self.department)
+        data = self.client.get(f'/rbac/api/departments/{self.department.pk}/').json()['data']
+        self.assertEqual((data['children_count'], data['user_count']), (1, 5))
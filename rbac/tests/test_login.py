@@ -0,0 +1,48 @@
+"""
+最后登录信息缓冲写入测试
+"""
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from rbac.login import LastLoginBuffer
+from rbac.models import User
+
+
+class LastLoginBufferTests(TransactionTestCase):
+
+    def setUp(self):
+        self.buffer = LastLoginBuffer()
+        self.alice = User.objects.create_user('alice', password='password')
+        self.bob = User.objects.create_user('bob', password='password')
+
+    def tearDown(self):
+        self.buffer.flush()
+
+    def last_login_ips(self):
+        return dict(User.objects.order_by('username').values_list('username', 'last_login_ip'))
+
+    @override_settings(RBAC_LOGIN={'BUFFER_LAST_LOGIN': True, 'FLUSH_INTERVAL': 60})
+    def test_invalid_ip_does_not_discard_batch(self):
+        now = timezone.now()
+        self.buffer.record(self.alice, '10.0.0.1', now)
+        self.buffer.record(self.bob, 'not-an-ip', now)
+        self.assertIsNone(self.bob.last_login_ip)
+
+        self.buffer.flush()
+        self.assertEqual(self.last_login_ips(), {'alice': '10.0.0.1', 'bob': None})
+        self.assertEqual(self.buffer.get_stats(), {'pending': 0, 'written': 2, 'failed': 0})
+
+    @override_settings(RBAC_LOGIN={'BUFFER_LAST_LOGIN': True, 'FLUSH_INTERVAL': 60})
+    def test_flush_writes_records_left_after_thread_stops(self):
+        self.buffer.record(self.alice, '10.0.0.1', timezone.now())
+        self.buffer.flush()
+        # 线程已停止，直接放入缓冲的记录由 flush 写入
+        self.buffer._pending[self.bob.pk] = (timezone.now(), '10.0.0.2')
+        self.buffer.flush()
+        self.assertEqual(self.last_login_ips(), {'alice': '10.0.0.1', 'bob': '10.0.0.2'})
+
+    @override_settings(RBAC_LOGIN={'BUFFER_LAST_LOGIN': False})
+    def test_unbuffered_invalid_ip(self):
+        self.buffer.record(self.alice, '1.2.3.4, 5.6.7.8', timezone.now())
+        self.assertIsNone(self.last_login_ips()['alice'])
+        self.assertIsNotNone(User.objects.get(pk=self.alice.pk).last_login)
@@ -0,0 +1,34 @@
+"""
+中间件测试
+"""
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from rbac.middleware import get_client_ip
+
+
+class ClientIpTests(SimpleTestCase):
+
+    def get_ip(self, remote_addr, forwarded=None):
+        headers = {'REMOTE_ADDR': remote_addr}
+        if forwarded is not None:
+            headers['HTTP_X_FORWARDED_FOR'] = forwarded
+        return get_client_ip(RequestFactory().get('/', **headers))
+
+    def test_forwarded_for_ignored_without_trusted_proxy(self):
+        self.assertEqual(self.get_ip('203.0.113.9', '1.2.3.4'), '203.0.113.9')
+
+    def test_invalid_remote_addr(self):
+        self.assertIsNone(self.get_ip('not-an-ip'))
+        self.assertEqual(self.get_ip('::ffff:10.0.0.1'), '::ffff:a00:1')
+
+    @override_settings(RBAC_TRUSTED_PROXIES=['10.0.0.0/8'])
+    def test_forwarded_for_behind_trusted_proxy(self):
+        self.assertEqual(self.get_ip('10.0.0.1', '198.51.100.7'), '198.51.100.7')
+        # 客户端自行添加的地址在最左侧，只取最后一个不可信的地址
+        self.assertEqual(self.get_ip('10.0.0.1', '1.2.3.4, 198.51.100.7, 10.0.0.2'), '198.51.100.7')
+        self.assertEqual(self.get_ip('203.0.113.9', '198.51.100.7'), '203.0.113.9')
+
+    @override_settings(RBAC_TRUSTED_PROXIES=['10.0.0.1'])
+    def test_invalid_forwarded_value_falls_back(self):
+        self.assertEqual(self.get_ip('10.0.0.1', "'; drop table"), '10.0.0.1')
+        self.assertEqual(self.get_ip('10.0.0.1', '198.51.100.7, unknown'), '10.0.0.1')
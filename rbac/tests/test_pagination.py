@@ -0,0 +1,147 @@
+"""
+分页测试
+"""
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from rbac.models import ApiLog, User
+from rbac.pagination import MAX_PAGE_SIZE, _count_cache, page_size_stats
+from rbac.testing import clear_process_caches
+
+
+@override_settings(API_LOG={'ENABLED': False})
+class CachedCountPaginationTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.admin = User.objects.create_superuser('admin', password='password')
+        User.objects.bulk_create(User(username=f'user{i:02d}') for i in range(4))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get_page(self, query=''):
+        return self.client.get(f'/rbac/api/users/?page_size=5{query}').json()['data']
+
+    def test_next_link_ignores_stale_count(self):
+        data = self.get_page()
+        self.assertEqual(data['count'], 5)
+        self.assertIsNone(data['next'])
+
+        User.objects.bulk_create(User(username=f'new{i}') for i in range(3))
+        data = self.get_page()
+        self.assertEqual(data['count'], 5)  # 缓存的总数
+        self.assertIsNotNone(data['next'])
+        data = self.get_page('&page=2')
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+
+    def test_page_beyond_count_is_empty(self):
+        self.assertEqual(self.get_page('&page=9')['results'], [])
+
+    @override_settings(RBAC_APPROX_COUNT_THRESHOLD=3)
+    def test_estimate_only_after_large_exact_count(self):
+        with mock.patch('rbac.pagination.estimate_count', return_value=1000) as estimate:
+            data = self.get_page()
+            self.assertEqual((data['count'], data['count_approximate']), (5, False))
+            estimate.assert_not_called()
+
+            _count_cache.clear()  # 只让总数缓存过期，保留“大查询”标记
+            data = self.get_page()
+            self.assertEqual((data['count'], data['count_approximate']), (1000, True))
+
+            data = self.get_page('&exact_count=1')
+            self.assertEqual((data['count'], data['count_approximate']), (5, False))
+
+    def test_small_queries_never_estimate(self):
+        with mock.patch('rbac.pagination.estimate_count') as estimate:
+            self.get_page()
+            self.get_page('&exact_count=1')
+            estimate.assert_not_called()
+
+
+@override_settings(API_LOG={'ENABLED': False})
+class PageSizeLimitTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        page_size_stats.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='password'))
+
+    def test_cursor_mode_uses_same_cap(self):
+        data = self.client.get('/business_demo/api/articles/?pagination=cursor&page_size=1000').json()['data']
+        self.assertEqual(data['page_size'], MAX_PAGE_SIZE)
+
+    def test_stats_endpoint(self):
+        self.client.get('/business_demo/api/articles/?pagination=cursor&page_size=1000')
+        self.client.get('/business_demo/api/articles/?page_size=20')
+        stats = self.client.get('/rbac/api/apis/page-size-stats/').json()['data']
+        self.assertEqual(stats['ArticleViewSet']['requests'], 2)
+        self.assertEqual(stats['ArticleViewSet']['clamped'], 1)
+        self.assertEqual(stats['ArticleViewSet']['max_requested'], 1000)
+
+
+@override_settings(API_LOG={'ENABLED': False})
+class KeysetPaginationTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='password'))
+        # 每个时间点 3 条记录，created_at 相同时按 id 倒序
+        now = timezone.now()
+        ApiLog.objects.bulk_create(
+            ApiLog(method='GET', path='/rbac/api/users/', ip_address='127.0.0.1', status_code=200,
+                   response_time=0.01, created_at=now - timedelta(minutes=minutes), log_date=timezone.localdate(now))
+            for minutes in (0, 0, 0, 1, 1, 1, 2)
+        )
+        self.expected = list(ApiLog.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        return [log['id'] for log in data['results']], data
+
+    def test_walk_next_and_previous(self):
+        pages = []
+        ids, data = self.get('/rbac/api/api-logs/?page_size=2')
+        self.assertIsNone(data['previous'])
+        pages.append(ids)
+        while data['next']:
+            ids, data = self.get(data['next'])
+            pages.append(ids)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual([log_id for page in pages for log_id in page], self.expected)
+
+        # 从最后一页向前翻，页面与向后翻时一致
+        reverse_pages = [pages[-1]]
+        while data['previous']:
+            ids, data = self.get(data['previous'])
+            reverse_pages.append(ids)
+        self.assertEqual(reverse_pages, pages[::-1])
+        self.assertIsNotNone(data['next'])
+
+    def test_invalid_cursor(self):
+        def encode(data):
+            return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii')
+
+        for cursor in (
+            'not-a-cursor',
+            base64.urlsafe_b64encode(b'not json').decode('ascii'),
+            encode([1, 2]),
+            encode({'p': [1]}),
+            encode({'p': ['yesterday', 1]}),
+            encode({'p': [timezone.now().isoformat(), 'x']}),
+            encode({'p': [timezone.now().isoformat(), 10 ** 30]}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/rbac/api/api-logs/', {'cursor': cursor})
+                self.assertGreaterEqual(response.status_code, 400)
+                self.assertLess(response.status_code, 500)
@@ -0,0 +1,121 @@
+"""
+角色权限 / 用户角色批量同步测试
+"""
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from rbac.menu_cache import get_menu_cache_key
+from rbac.models import Api, ApiGroup, Menu, PolicyRule, Role, RoleMenu, User, UserRole
+from rbac.permission_sync import (
+    assign_role_to_users, remove_role_from_users, sync_role_apis, sync_role_menus, sync_user_roles,
+)
+from rbac.simple_rbac import check_permission
+from rbac.testing import clear_process_caches
+
+
+class SyncHelperTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.role = Role.objects.create(role_id='staff', name='员工', code='staff')
+        self.user = User.objects.create_user('staff', password='password')
+        UserRole.objects.create(user=self.user, role=self.role)
+        group = ApiGroup.objects.create(name='系统')
+        self.users_api = Api.objects.create(name='用户列表', path='/rbac/api/users/', method='GET', group=group)
+        self.roles_api = Api.objects.create(name='角色列表', path='/rbac/api/roles/', method='GET', group=group)
+
+    def test_sync_role_apis(self):
+        PolicyRule.objects.create(role_id='staff', path='/rbac/api/users/', method='get')
+        check_permission(self.user, '/rbac/api/users/', 'GET')
+
+        result = sync_role_apis(self.role, [self.roles_api.pk, 999])
+        self.assertEqual(result, {'added': 1, 'removed': 1, 'missing': [999]})
+        self.assertEqual(list(PolicyRule.objects.values_list('path', flat=True)), ['/rbac/api/roles/'])
+        self.assertTrue(check_permission(self.user, '/rbac/api/roles/', 'GET'))
+        self.assertFalse(check_permission(self.user, '/rbac/api/users/', 'GET'))
+
+        result = sync_role_apis(self.role, [self.roles_api.pk])
+        self.assertEqual(result, {'added': 0, 'removed': 0, 'missing': []})
+
+    def test_sync_role_menus(self):
+        first = Menu.objects.create(name='first', title='一')
+        second = Menu.objects.create(name='second', title='二')
+        RoleMenu.objects.create(role=self.role, menu=first)
+        version = get_menu_cache_key(self.user)[1]
+
+        result = sync_role_menus(self.role, [second.pk])
+        self.assertEqual(result, {'added': 1, 'removed': 1, 'missing': []})
+        self.assertEqual(list(RoleMenu.objects.values_list('menu_id', flat=True)), [second.pk])
+        self.assertNotEqual(get_menu_cache_key(self.user)[1], version)
+
+    def test_sync_user_roles(self):
+        other = Role.objects.create(role_id='other', name='其他', code='other')
+        PolicyRule.objects.create(role_id='other', path='/rbac/api/roles/', method='GET')
+        self.assertFalse(check_permission(self.user, '/rbac/api/roles/', 'GET'))
+
+        result = sync_user_roles(self.user, [other.pk])
+        self.assertEqual(result, {'added': 1, 'removed': 1, 'missing': []})
+        self.assertTrue(check_permission(self.user, '/rbac/api/roles/', 'GET'))
+
+    def test_assign_and_remove_role_users(self):
+        PolicyRule.objects.create(role_id='staff', path='/rbac/api/users/', method='GET')
+        others = User.objects.bulk_create(User(username=f'user{i}') for i in range(3))
+        other_ids = [user.pk for user in others]
+
+        result = assign_role_to_users(self.role, [self.user.pk, *other_ids, 999], batch_size=2)
+        self.assertEqual(result, {'added': 3, 'existing': 1, 'missing': [999]})
+        self.assertTrue(check_permission(others[0], '/rbac/api/users/', 'GET'))
+
+        self.assertEqual(remove_role_from_users(self.role, other_ids[:2], batch_size=1), {'removed': 2})
+        self.assertFalse(check_permission(others[0], '/rbac/api/users/', 'GET'))
+        self.assertTrue(check_permission(others[2], '/rbac/api/users/', 'GET'))
+
+
+@override_settings(API_LOG={'ENABLED': False})
+class AssignPermissionViewTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.role = Role.objects.create(role_id='staff', name='员工', code='staff')
+        group = ApiGroup.objects.create(name='系统')
+        self.api = Api.objects.create(name='用户列表', path='/rbac/api/users/', method='GET', group=group)
+        self.menu = Menu.objects.create(name='users', title='用户')
+        self.user = User.objects.create_user('staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='password'))
+
+    def post(self, url, data):
+        return self.client.post(url.format(pk=self.role.pk), data, format='json')
+
+    def test_ids_are_coerced(self):
+        for url, field, obj in (
+            ('/rbac/api/roles/{pk}/assign-api-permissions/', 'api_ids', self.api),
+            ('/rbac/api/roles/{pk}/assign_api_permissions/', 'api_ids', self.api),
+            ('/rbac/api/roles/{pk}/assign_menu_permissions/', 'menu_ids', self.menu),
+            ('/rbac/api/roles/{pk}/assign-users/', 'user_ids', self.user),
+        ):
+            with self.subTest(url=url):
+                response = self.post(url, {field: [str(obj.pk)]})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['data']['missing'], [])
+
+    def test_invalid_ids_are_rejected(self):
+        for url, field in (
+            ('/rbac/api/roles/{pk}/assign-api-permissions/', 'api_ids'),
+            ('/rbac/api/roles/{pk}/assign_api_permissions/', 'api_ids'),
+            ('/rbac/api/roles/{pk}/assign_menu_permissions/', 'menu_ids'),
+            ('/rbac/api/roles/{pk}/assign-users/', 'user_ids'),
+            ('/rbac/api/roles/{pk}/remove-users/', 'user_ids'),
+        ):
+            for value in (5, [1, 'x']):
+                with self.subTest(url=url, value=value):
+                    # 字段校验错误由 custom_exception_handler 统一返回 422（与 UserCreateSerializer.roles 一致）
+                    self.assertEqual(self.post(url, {field: value}).status_code, 422)
+        self.assertFalse(PolicyRule.objects.exists())
+        self.assertFalse(RoleMenu.objects.exists())
+        self.assertFalse(UserRole.objects.exists())
+
+    def test_remove_users_with_string_ids(self):
+        UserRole.objects.create(user=self.user, role=self.role)
+        response = self.post('/rbac/api/roles/{pk}/remove-users/', {'user_ids': [str(self.user.pk)]})
+        self.assertEqual(response.json()['data'], {'removed': 1})
@@ -0,0 +1,58 @@
+"""
+路由匹配器测试
+"""
+from django.test import SimpleTestCase
+
+from rbac.route_matcher import RouteMatcher, is_pattern, split_path
+
+
+class RouteMatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.matcher = RouteMatcher([
+            ('GET', '/rbac/api/users/', 'list'),
+            ('GET', '/rbac/api/users/{id}/', 'detail'),
+            ('get', '/rbac/api/**', 'all'),
+            ('DELETE', '/rbac/api/*/items/', 'star'),
+        ])
+
+    def test_exact_and_param(self):
+        self.assertEqual(self.matcher.match('GET', '/rbac/api/users/'), {'list', 'all'})
+        self.assertEqual(self.matcher.match('GET', '/rbac/api/users/42/'), {'detail', 'all'})
+
+    def test_param_requires_non_empty_segment(self):
+        self.assertEqual(self.matcher.match('GET', '/rbac/api/users//'), {'all'})
+
+    def test_trailing_slash_is_significant(self):
+        self.assertEqual(self.matcher.match('DELETE', '/rbac/api/users/items/'), {'star'})
+        self.assertEqual(self.matcher.match('DELETE', '/rbac/api/users/items'), set())
+
+    def test_star_matches_one_segment(self):
+        self.assertEqual(self.matcher.match('DELETE', '/rbac/api/a/b/items/'), set())
+        self.assertEqual(self.matcher.match('DELETE', '/rbac/api/a/other/'), set())
+
+    def test_globstar_matches_zero_or_more_segments(self):
+        self.assertEqual(self.matcher.match('GET', '/rbac/api'), {'all'})
+        self.assertEqual(self.matcher.match('GET', '/rbac/api/a/b/c/'), {'all'})
+        self.assertEqual(self.matcher.match('GET', '/rbac/apis/'), set())
+
+    def test_methods_are_separate(self):
+        self.assertEqual(self.matcher.match('POST', '/rbac/api/users/'), set())
+        self.assertEqual(self.matcher.match('get', '/rbac/api/users/'), {'list', 'all'})
+
+    def test_remove(self):
+        self.matcher.remove('GET', '/rbac/api/users/{id}/', 'detail')
+        self.matcher.remove('GET', '/rbac/api/users/', 'list')
+        self.matcher.remove('GET', '/rbac/api/missing/{id}/', 'detail')
+        self.assertEqual(self.matcher.match('GET', '/rbac/api/users/42/'), {'all'})
+        self.assertEqual(self.matcher.match('GET', '/rbac/api/users/'), {'all'})
+
+    def test_matches_any(self):
+        self.assertTrue(self.matcher.matches_any('GET', '/rbac/api/users/1/', {'detail', 'other'}))
+        self.assertFalse(self.matcher.matches_any('GET', '/rbac/api/users/1/', {'list'}))
+
+    def test_helpers(self):
+        self.assertTrue(is_pattern('/a/{id}/'))
+        self.assertTrue(is_pattern('/a/**'))
+        self.assertFalse(is_pattern('/a/b/'))
+        self.assertEqual(split_path('/a/b/'), ['a', 'b', ''])
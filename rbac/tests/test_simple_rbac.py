@@ -0,0 +1,61 @@
+"""
+简化RBAC权限引擎测试
+"""
+from django.test import TransactionTestCase
+
+from rbac.models import PolicyRule, Role, User, UserRole
+from rbac.simple_rbac import check_permission, simple_rbac_manager
+from rbac.testing import clear_process_caches, count_queries
+
+
+class SimpleRbacManagerTests(TransactionTestCase):
+    """权限变更由信号在事务提交后增量应用到快照"""
+
+    def setUp(self):
+        clear_process_caches()
+        self.user = User.objects.create_user('staff', password='password')
+        self.role = Role.objects.create(role_id='staff', name='员工', code='staff')
+        UserRole.objects.create(user=self.user, role=self.role)
+        PolicyRule.objects.create(role_id='staff', path='/rbac/api/users/{id}/', method='GET')
+
+    def test_check_permission(self):
+        self.assertTrue(check_permission(self.user, '/rbac/api/users/42/', 'GET'))
+        self.assertTrue(check_permission(self.user, '/rbac/api/users/42', 'get'))
+        self.assertFalse(check_permission(self.user, '/rbac/api/users/42/', 'DELETE'))
+        self.assertFalse(check_permission(self.user, '/rbac/api/users/', 'GET'))
+
+    def test_superuser_and_anonymous(self):
+        superuser = User.objects.create_superuser('admin', password='password')
+        self.assertTrue(check_permission(superuser, '/rbac/api/anything/', 'DELETE'))
+        self.assertFalse(check_permission(None, '/rbac/api/users/42/', 'GET'))
+
+    def test_checks_do_not_query(self):
+        check_permission(self.user, '/rbac/api/users/1/', 'GET')
+        count, _ = count_queries(lambda: check_permission(self.user, '/rbac/api/users/2/', 'GET'))
+        self.assertEqual(count, 0)
+
+    def test_incremental_changes(self):
+        check_permission(self.user, '/rbac/api/users/1/', 'GET')
+        PolicyRule.objects.create(role_id='staff', path='/rbac/api/roles/', method='GET')
+        self.assertTrue(check_permission(self.user, '/rbac/api/roles/', 'GET'))
+
+        PolicyRule.objects.filter(role_id='staff', path='/rbac/api/users/{id}/').delete()
+        self.assertFalse(check_permission(self.user, '/rbac/api/users/1/', 'GET'))
+
+        self.role.is_active = False
+        self.role.save()
+        self.assertFalse(check_permission(self.user, '/rbac/api/roles/', 'GET'))
+
+        self.role.is_active = True
+        self.role.save()
+        UserRole.objects.filter(user=self.user).delete()
+        self.assertFalse(check_permission(self.user, '/rbac/api/roles/', 'GET'))
+
+    def test_modified_rule_rebuilds_snapshot(self):
+        check_permission(self.user, '/rbac/api/users/1/', 'GET')
+        rule = PolicyRule.objects.get(role_id='staff')
+        rule.method = 'PUT'
+        rule.save()
+        self.assertFalse(check_permission(self.user, '/rbac/api/users/1/', 'GET'))
+        self.assertTrue(check_permission(self.user, '/rbac/api/users/1/', 'PUT'))
+        self.assertEqual(simple_rbac_manager.get_role_policies('staff'), [('/rbac/api/users/{id}/', 'PUT')])
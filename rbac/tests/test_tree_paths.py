@@ -0,0 +1,123 @@
+"""
+部门 / 菜单物化路径测试
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework.exceptions import ValidationError
+
+from rbac.models import Department, Menu, User
+from rbac.serializers import DepartmentSerializer, MenuSerializer
+from rbac.testing import clear_process_caches
+
+
+class DepartmentTreePathTests(TestCase):
+
+    def setUp(self):
+        self.a = Department.objects.create(name='A', code='a')
+        self.b = Department.objects.create(name='B', code='b', parent=self.a)
+        self.c = Department.objects.create(name='C', code='c', parent=self.b)
+        self.x = Department.objects.create(name='X', code='x')
+
+    def move(self, department, parent):
+        serializer = DepartmentSerializer(
+            Department.objects.get(pk=department.pk), data={'parent': parent.pk if parent else ''}, partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    def test_paths(self):
+        self.assertEqual(self.c.tree_path, f'/{self.a.pk}/{self.b.pk}/{self.c.pk}/')
+        self.assertEqual(self.c.level, 3)
+        self.assertEqual(self.c.get_parent_path(), 'A > B > C')
+
+    def test_move_updates_descendants(self):
+        self.move(self.b, self.x)
+        self.c.refresh_from_db()
+        self.assertEqual((self.c.tree_path, self.c.level), (f'/{self.x.pk}/{self.b.pk}/{self.c.pk}/', 3))
+        self.assertEqual(sorted(d.code for d in self.x.get_descendants()), ['b', 'c'])
+
+        self.move(self.b, None)
+        self.c.refresh_from_db()
+        self.assertEqual((self.c.tree_path, self.c.level), (f'/{self.b.pk}/{self.c.pk}/', 2))
+
+    def test_move_under_descendant_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.move(self.a, self.c)
+        self.a.refresh_from_db()
+        self.assertIsNone(self.a.parent_id)
+
+    def test_rebuild_command(self):
+        Department.objects.update(tree_path='', level=0)
+        call_command('rebuild_tree_paths', stdout=StringIO())
+        self.c.refresh_from_db()
+        self.assertEqual((self.c.tree_path, self.c.level), (f'/{self.a.pk}/{self.b.pk}/{self.c.pk}/', 3))
+
+
+class MenuTreePathTests(TestCase):
+
+    def test_children_in_order(self):
+        root = Menu.objects.create(name='root', title='根')
+        first = Menu.objects.create(name='first', title='一', parent=root, sort_order=1)
+        second = Menu.objects.create(name='second', title='二', parent=root, sort_order=2, visible=False)
+        Menu.objects.create(name='child', title='子', parent=first)
+        Menu.objects.create(name='hidden-child', title='隐', parent=second)
+        self.assertEqual([menu.name for menu in root.get_all_children()], ['first', 'child'])
+
+
+@override_settings(API_LOG={'ENABLED': False})
+class MenuMoveApiTests(TestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.root = Menu.objects.create(name='root', title='根')
+        self.child = Menu.objects.create(name='child', title='子', parent=self.root)
+        self.other = Menu.objects.create(name='other', title='其他')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='password'))
+
+    def move(self, menu, parent):
+        return self.client.patch(f'/rbac/api/menus/{menu.pk}/', {'parent': parent.pk}, format='json')
+
+    def test_move_under_descendant_is_rejected(self):
+        for parent in (self.child, self.root):
+            with self.subTest(parent=parent.name):
+                response = self.move(self.root, parent)
+                # 字段校验错误由 custom_exception_handler 统一返回 422
+                self.assertEqual(response.status_code, 422)
+                self.assertIn('parent', response.json()['data']['errors'])
+        self.root.refresh_from_db()
+        self.assertIsNone(self.root.parent_id)
+
+    def test_move(self):
+        self.assertEqual(self.move(self.root, self.other).status_code, 200)
+        self.child.refresh_from_db()
+        self.assertEqual(self.child.tree_path, f'/{self.other.pk}/{self.root.pk}/{self.child.pk}/')
+
+
+class MenuBreadcrumbTests(TestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        self.root = Menu.objects.create(name='root', title='根')
+        self.other = Menu.objects.create(name='other', title='其他')
+        self.child = Menu.objects.create(name='child', title='子', parent=self.root)
+
+    def breadcrumb(self, menu):
+        return MenuSerializer(Menu.objects.get(pk=menu.pk)).data['breadcrumb']
+
+    def test_moved_menu_is_not_served_from_cache(self):
+        self.assertEqual(self.breadcrumb(self.child), ['根', '子'])
+        # 菜单版本号在提交后才递增，此时缓存仍是旧的
+        self.child.parent = self.other
+        self.child.save()
+        self.assertEqual(self.breadcrumb(self.child), ['其他', '子'])
+
+    def test_renamed_ancestor_after_commit(self):
+        self.assertEqual(self.breadcrumb(self.child), ['根', '子'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.root.title = '新根'
+            self.root.save()
+        self.assertEqual(self.breadcrumb(self.child), ['新根', '子'])
@@ -0,0 +1,68 @@
+"""
+用户列表测试 - 数据权限过滤与角色预取（非超级用户）
+"""
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from rbac.models import Department, PolicyRule, Role, User, UserRole
+from rbac.testing import ConstantQueriesMixin, clear_process_caches
+
+
+@override_settings(API_LOG={'ENABLED': False}, RBAC_POLICY_CHECK_INTERVAL=60)
+class UserListTests(ConstantQueriesMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        hq = Department.objects.create(name='总部', code='hq')
+        branch = Department.objects.create(name='分部', code='branch', parent=hq)
+        team = Department.objects.create(name='小组', code='team', parent=branch)
+
+        manager_role = Role.objects.create(role_id='manager', name='经理', code='manager', data_scope=2)
+        lead_role = Role.objects.create(role_id='lead', name='组长', code='lead', data_scope=3)
+        extra_roles = [Role.objects.create(role_id=f'extra{i}', name=f'角色{i}', code=f'extra{i}') for i in range(3)]
+        PolicyRule.objects.bulk_create([
+            PolicyRule(role_id='manager', path='/rbac/api/users/', method='GET'),
+            PolicyRule(role_id='lead', path='/rbac/api/users/', method='GET'),
+        ])
+
+        cls.manager = User.objects.create_user('manager', password='password', department=branch)
+        cls.lead = User.objects.create_user('lead', password='password', department=team)
+        UserRole.objects.create(user=cls.manager, role=manager_role)
+        UserRole.objects.create(user=cls.lead, role=lead_role)
+
+        User.objects.create_user('hq-user', password='password', department=hq)
+        members = User.objects.bulk_create(User(username=f'member{i:02d}', department=team) for i in range(60))
+        UserRole.objects.bulk_create(UserRole(user=user, role=role) for user in members for role in extra_roles)
+
+    def setUp(self):
+        clear_process_caches()
+        self.client = APIClient()
+
+    def get_users(self, user, size=100):
+        self.client.force_authenticate(user)
+        response = self.client.get('/rbac/api/users/', {'page_size': size})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_department_and_below_scope(self):
+        data = self.get_users(self.manager)
+        usernames = {user['username'] for user in data['results']}
+        self.assertEqual(data['count'], 62)
+        self.assertIn('manager', usernames)
+        self.assertNotIn('hq-user', usernames)
+
+    def test_department_scope(self):
+        data = self.get_users(self.lead)
+        self.assertEqual(data['count'], 61)
+        self.assertNotIn('manager', {user['username'] for user in data['results']})
+
+    def test_roles_are_prefetched(self):
+        results = self.get_users(self.lead)['results']
+        member = next(user for user in results if user['username'] == 'member00')
+        self.assertEqual(len(member['roles']), 3)
+
+    def test_constant_queries(self):
+        for user in (self.manager, self.lead):
+            with self.subTest(user=user.username):
+                self.get_users(user, 1)
+                self.assertConstantQueries(lambda size: self.get_users(user, size))
@@ -0,0 +1,59 @@
+"""
+用户菜单接口测试
+"""
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from rbac.casbin_rbac import casbin_rbac_manager
+from rbac.menu_cache import clear_menu_cache
+from rbac.models import Menu, Role, RoleMenu, User, UserRole
+from rbac.testing import clear_process_caches
+
+
+URL = '/rbac/auth/user-menus/'
+
+
+@override_settings(API_LOG={'ENABLED': False})
+class UserMenusViewTests(TransactionTestCase):
+
+    def setUp(self):
+        clear_process_caches()
+        casbin_rbac_manager.invalidate()
+        self.root = Menu.objects.create(name='system', title='系统', sort_order=1)
+        self.users_menu = Menu.objects.create(name='users', title='用户', parent=self.root, sort_order=2)
+        self.roles_menu = Menu.objects.create(name='roles', title='角色', parent=self.root, sort_order=1)
+        self.role = Role.objects.create(role_id='staff', name='员工', code='staff')
+        RoleMenu.objects.bulk_create([RoleMenu(role=self.role, menu=self.root), RoleMenu(role=self.role, menu=self.users_menu)])
+        self.user = User.objects.create_user('staff', password='password')
+        UserRole.objects.create(user=self.user, role=self.role)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_titles(self):
+        data = self.client.get(URL).json()['data']
+        return [(menu['title'], [child['title'] for child in menu['children']]) for menu in data]
+
+    def test_menu_tree(self):
+        self.assertEqual(self.get_titles(), [('系统', ['用户'])])
+        RoleMenu.objects.create(role=self.role, menu=self.roles_menu)
+        self.assertEqual(self.get_titles(), [('系统', ['角色', '用户'])])
+
+    @override_settings(RBAC_POLICY_CHECK_INTERVAL=60)
+    def test_not_modified_skips_rendering(self):
+        etag = self.client.get(URL)['ETag']
+        clear_menu_cache()
+        with self.assertNumQueries(0):
+            response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        RoleMenu.objects.create(role=self.role, menu=self.roles_menu)
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(USE_SIMPLE_RBAC=False)
+    def test_casbin_engine(self):
+        self.assertEqual(self.get_titles(), [('系统', ['用户'])])
+        self.role.is_active = False
+        self.role.save()
+        self.assertEqual(self.get_titles(), [])
@@ -0,0 +1,110 @@
+"""
+用户批量导入 / 导出测试
+"""
+import io
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from rbac.models import Department, Role, User
+from rbac.user_transfer import UserImporter, iter_export, iter_rows
+
+
+def read_csv(content):
+    return iter_rows(io.BytesIO(content.encode('utf-8')), 'csv')
+
+
+class UserImporterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Department.objects.create(name='总部', code='hq')
+        Role.objects.create(role_id='staff', name='员工', code='staff')
+        User.objects.create_user('existing', password='password')
+
+    def run_import(self, content, **kwargs):
+        with UserImporter(workers=0, **kwargs) as importer:
+            return importer.run(read_csv(content))
+
+    def test_row_errors_do_not_affect_other_rows(self):
+        result = self.run_import(
+            'username,email,department,roles\n'
+            'alice,alice@example.com,hq,staff\n'
+            'existing,,,\n'
+            'bob,not-an-email,,\n'
+            'carol,,missing,\n'
+            'dave,,,staff|ghost\n'
+            'alice,,,\n'
+        )
+        self.assertEqual((result['total'], result['created'], result['failed']), (6, 1, 5))
+        self.assertEqual(
+            [(error['line'], error['username'], sorted(error['errors'])) for error in result['errors']],
+            [(3, 'existing', ['username']), (4, 'bob', ['email']), (5, 'carol', ['department']),
+             (6, 'dave', ['roles']), (7, 'alice', ['username'])],
+        )
+        alice = User.objects.get(username='alice')
+        self.assertEqual(alice.department.code, 'hq')
+        self.assertEqual(list(alice.userrole_set.values_list('role__code', flat=True)), ['staff'])
+
+    def test_errors_are_capped(self):
+        content = 'username,email\n' + ''.join(f'user{i},bad\n' for i in range(7))
+        result = self.run_import(content, chunk_size=3, max_errors=4)
+        self.assertEqual(result['failed'], 7)
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3, 4, 5])
+
+    def test_thread_pool_hashing(self):
+        with UserImporter(workers=2, pool='thread') as importer:
+            result = importer.run(read_csv('username,password\nalice,secret1\nbob,secret2\ncarol,\n'))
+        self.assertEqual(result['created'], 3)
+        self.assertTrue(User.objects.get(username='bob').check_password('secret2'))
+        self.assertFalse(User.objects.get(username='carol').has_usable_password())
+
+    def test_dry_run(self):
+        result = self.run_import('username\nfrank\n', dry_run=True)
+        self.assertEqual(result['created'], 1)
+        self.assertFalse(User.objects.filter(username='frank').exists())
+
+    def test_csv_export_escapes_formulas_and_round_trips(self):
+        User.objects.create_user('eve', password='password', first_name='=HYPERLINK("x")', last_name='@SUM(A1)')
+        content = ''.join(iter_export(User.objects.filter(username='eve'), 'csv')).lstrip('\ufeff')
+        self.assertIn('"\'=HYPERLINK(""x"")",\'@SUM(A1)', content)
+
+        User.objects.filter(username='eve').delete()
+        self.assertEqual(self.run_import(content)['created'], 1)
+        eve = User.objects.get(username='eve')
+        self.assertEqual((eve.first_name, eve.last_name), ('=HYPERLINK("x")', '@SUM(A1)'))
+
+
+@override_settings(API_LOG={'ENABLED': False}, RBAC_IMPORT_MAX_ERRORS=2)
+class ImportEndpointTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='password'))
+
+    def post(self, content):
+        upload = SimpleUploadedFile('users.csv', content.encode('utf-8'))
+        return self.client.post('/rbac/api/users/import/', {'file': upload}, format='multipart')
+
+    def test_import_hashes_in_thread_pool_and_caps_errors(self):
+        content = 'username,password,email\nu1,secret1,\nu2,secret2,\nbad1,,x\nbad2,,x\nbad3,,x\n'
+        with mock.patch('rbac.user_transfer.ProcessPoolExecutor') as process_pool, \
+                mock.patch('rbac.user_transfer.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as thread_pool:
+            response = self.post(content)
+        process_pool.assert_not_called()
+        thread_pool.assert_called_once()
+
+        data = response.json()['data']
+        self.assertEqual((data['created'], data['failed'], len(data['errors'])), (2, 3, 2))
+        self.assertTrue(User.objects.get(username='u2').check_password('secret2'))
+
+    @override_settings(RBAC_IMPORT_MAX_ROWS=2)
+    def test_row_cap(self):
+        response = self.post('username\nu1\nu2\nu3\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(username__startswith='u').exists())
+
+        self.assertEqual(self.post('username\nu1\nu2\n').json()['data']['created'], 2)
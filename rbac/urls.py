@@ -3,8 +3,8 @@
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
-from .views import UserViewSet, RoleViewSet, DepartmentViewSet, MenuViewSet, CustomTokenObtainPairView, ApiGroupViewSet, ApiViewSet, get_role_api_permissions, assign_role_api_permissions, get_role_menu_permissions, assign_role_menu_permissions, jwt_profile_view, user_menus_view
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenVerifyView
+from .views import UserViewSet, RoleViewSet, DepartmentViewSet, MenuViewSet, CustomTokenObtainPairView, CustomTokenRefreshView, ApiGroupViewSet, ApiViewSet, ApiLogViewSet, get_role_api_permissions, assign_role_api_permissions, get_role_menu_permissions, assign_role_menu_permissions, jwt_profile_view, user_menus_view
 
 # 创建路由器
 router = DefaultRouter()
@@ -14,7 +14,7 @@ router.register(r'departments', DepartmentViewSet, basename='department')
 router.register(r'menus', MenuViewSet, basename='menu')
 router.register(r'api-groups', ApiGroupViewSet, basename='api-group')
 router.register(r'apis', ApiViewSet, basename='api')
-# router.register(r'api-logs', ApiLogViewSet, basename='api-log')  # 暂时注释掉
+router.register(r'api-logs', ApiLogViewSet, basename='api-log')
 
 urlpatterns = [
     # API路由
@@ -30,7 +30,7 @@ urlpatterns = [
     
     # JWT认证相关
     path('auth/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     path('auth/profile/', jwt_profile_view, name='jwt_profile'),
     path('auth/user-menus/', user_menus_view, name='user_menus'),
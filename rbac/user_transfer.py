@@ -0,0 +1,315 @@
+"""
+用户批量导入 / 导出
+
+导入（CSV 或 NDJSON，字段见 FIELDS，role 编码在 CSV 中用 | 分隔）按 chunk_size 分块处理：
+    1. 逐行校验字段格式（不查询数据库）
+    2. 每块一次查询解析部门编码、角色编码，一次查询检查用户名是否已存在
+    3. 密码在进程池或线程池中计算哈希（PBKDF2 等算法是 CPU 密集型，串行计算是导入的主要耗时）；
+       管理命令使用进程池，HTTP 导入接口使用线程池（hashlib 计算时释放 GIL，不在多线程的 worker 中 fork 子进程）
+    4. bulk_create 写入用户和用户角色，事务提交后通知权限引擎一次
+每行的错误单独记录，不影响同块其他行；结果中最多保留 max_errors 条（按行号），failed 为全部失败行数。
+HTTP 导入接口每次最多导入 RBAC_IMPORT_MAX_ROWS 行，更大的文件使用 import_users 管理命令。
+
+导出与导入字段一致（不含密码），可直接作为导入文件使用。CSV 导出时以 = + - @ 开头的值前加 '
+（见 utils.csv_safe），导入 CSV 时去掉。
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .permission_sync import bulk_add_user_roles
+from .utils import csv_safe, csv_unescape
+
+
+FIELDS = (
+    'username', 'first_name', 'last_name', 'email', 'phone',
+    'department', 'roles', 'data_scope', 'is_active',
+)
+ROLE_SEPARATOR = '|'
+FILE_TYPES = ('csv', 'ndjson')
+
+
+class UserImportRowSerializer(serializers.Serializer):
+    """导入行的格式校验（不访问数据库，部门/角色/用户名由导入器按块统一检查）"""
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    password = serializers.CharField(required=False, write_only=True)
+    first_name = serializers.CharField(max_length=150, required=False, default='')
+    last_name = serializers.CharField(max_length=150, required=False, default='')
+    email = serializers.EmailField(required=False, default='')
+    phone = serializers.CharField(max_length=20, required=False, allow_null=True, default=None)
+    department = serializers.CharField(max_length=50, required=False, allow_null=True, default=None)
+    roles = serializers.ListField(child=serializers.CharField(max_length=50), required=False, default=list)
+    data_scope = serializers.ChoiceField(choices=[1, 2, 3, 4], required=False, default=4)
+    is_active = serializers.BooleanField(required=False, default=True)
+
+
+def get_import_settings():
+    return {
+        'chunk_size': getattr(settings, 'RBAC_IMPORT_CHUNK_SIZE', 500),
+        'workers': getattr(settings, 'RBAC_IMPORT_HASH_WORKERS', None),
+        'max_errors': getattr(settings, 'RBAC_IMPORT_MAX_ERRORS', 100),
+        'max_rows': getattr(settings, 'RBAC_IMPORT_MAX_ROWS', 5000),
+    }
+
+
+# ===== 读取 =====
+
+def _clean_row(row):
+    """去掉空值（视为未填写），roles 统一为列表"""
+    row = {key: value for key, value in row.items() if key and value not in ('', None)}
+    roles = row.get('roles')
+    if isinstance(roles, str):
+        row['roles'] = [code.strip() for code in roles.split(ROLE_SEPARATOR) if code.strip()]
+    return row
+
+
+def iter_rows(stream, file_type):
+    """
+    逐行读取导入文件，返回 (行号, 行数据) 的迭代器
+
+    stream 为二进制文件对象（上传的文件或 open(path, 'rb')），按行读取，不整体载入内存
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_type == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, _clean_row({key: csv_unescape(value) for key, value in row.items()})
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            yield line_number, {'__invalid__': '不是有效的JSON对象'}
+            continue
+        yield line_number, _clean_row(row)
+
+
+def _init_hash_worker():
+    """进程池初始化（spawn 方式启动的子进程需要重新加载 Django 配置）"""
+    import django
+    django.setup()
+
+
+# ===== 导入 =====
+
+class UserImporter:
+    """
+    用户批量导入器
+
+    用法：
+        with UserImporter() as importer:
+            result = importer.run(iter_rows(stream, 'csv'))
+
+    Args:
+        chunk_size: 每块的行数
+        workers: 计算密码哈希的进程（线程）数，None 为 CPU 核数，0 表示在当前线程中计算
+        pool: 'process' 进程池 / 'thread' 线程池（在多线程的 web worker 中使用）
+        default_password: 行内未提供密码时使用的密码，为空则设置为不可用密码
+        dry_run: 只校验，不写入（结果中 created 为可导入的行数）
+        max_errors: 结果中最多保留的错误行数
+    """
+
+    def __init__(self, chunk_size=None, workers=None, default_password=None, dry_run=False, max_errors=None,
+                 pool='process'):
+        config = get_import_settings()
+        self.chunk_size = chunk_size or config['chunk_size']
+        self.workers = config['workers'] if workers is None else workers
+        self.max_errors = config['max_errors'] if max_errors is None else max_errors
+        self.default_password = default_password
+        self.dry_run = dry_run
+        self.pool = pool
+        self._pool = None
+        self._seen_usernames = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def run(self, rows):
+        """导入全部行，返回 {'total', 'created', 'failed', 'errors': [{'line', 'username', 'errors'}]}"""
+        result = {'total': 0, 'created': 0, 'failed': 0, 'errors': []}
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk, result)
+                self.trim_errors(result)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk, result)
+            self.trim_errors(result)
+        return result
+
+    def trim_errors(self, result):
+        """错误按行号排序，只保留前 max_errors 条（各块按行号顺序处理）"""
+        result['errors'].sort(key=lambda error: error['line'])
+        del result['errors'][self.max_errors:]
+
+    def import_chunk(self, chunk, result):
+        from .models import Department, Role, User
+
+        result['total'] += len(chunk)
+        valid = []
+        for line, row in chunk:
+            if '__invalid__' in row:
+                self.add_error(result, line, '', {'non_field_errors': [row['__invalid__']]})
+                continue
+            serializer = UserImportRowSerializer(data=row)
+            if not serializer.is_valid():
+                self.add_error(result, line, row.get('username', ''), serializer.errors)
+                continue
+            valid.append((line, serializer.validated_data))
+        if not valid:
+            return
+
+        # 每块一次查询：部门、角色、已存在的用户名
+        department_codes = {data['department'] for _, data in valid if data['department']}
+        role_codes = {code for _, data in valid for code in data['roles']}
+        usernames = {data['username'] for _, data in valid}
+        departments = dict(Department.objects.filter(code__in=department_codes).values_list('code', 'id'))
+        roles = dict(Role.objects.filter(code__in=role_codes).values_list('code', 'id'))
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        accepted = []
+        for line, data in valid:
+            errors = {}
+            username = data['username']
+            if username in existing or username in self._seen_usernames:
+                errors['username'] = ['用户名已存在']
+            if data['department'] and data['department'] not in departments:
+                errors['department'] = [f"部门不存在: {data['department']}"]
+            missing_roles = [code for code in data['roles'] if code not in roles]
+            if missing_roles:
+                errors['roles'] = [f'角色不存在: {", ".join(missing_roles)}']
+            if errors:
+                self.add_error(result, line, username, errors)
+                continue
+            self._seen_usernames.add(username)
+            accepted.append((line, data))
+
+        if not accepted or self.dry_run:
+            result['created'] += len(accepted)
+            return
+
+        passwords = self.hash_passwords([data.get('password') or self.default_password for _, data in accepted])
+        users = []
+        for (_, data), password in zip(accepted, passwords):
+            users.append(User(
+                username=data['username'], password=password,
+                first_name=data['first_name'], last_name=data['last_name'],
+                email=data['email'], phone=data['phone'],
+                department_id=departments.get(data['department']),
+                data_scope=data['data_scope'], is_active=data['is_active'],
+            ))
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=self.chunk_size)
+                if any(user.pk is None for user in users):
+                    # 不支持 RETURNING 的数据库（MySQL）需要按用户名查回主键
+                    ids = dict(User.objects.filter(username__in=[user.username for user in users])
+                               .values_list('username', 'id'))
+                    for user in users:
+                        user.pk = ids[user.username]
+                bulk_add_user_roles({
+                    user.pk: list(dict.fromkeys(roles[code] for code in data['roles']))
+                    for user, (_, data) in zip(users, accepted)
+                }, batch_size=self.chunk_size)
+        except IntegrityError as exc:
+            # 与并发写入冲突（如同名用户刚被创建），整块失败
+            for line, data in accepted:
+                self.add_error(result, line, data['username'], {'non_field_errors': [f'写入失败: {exc}']})
+            return
+        result['created'] += len(users)
+
+    def hash_passwords(self, passwords):
+        """计算密码哈希，未提供密码的设置为不可用密码"""
+        plain = [password for password in passwords if password]
+        if self.workers == 0 or len(plain) < 2:
+            hashed = [make_password(password) for password in plain]
+        else:
+            if self._pool is None:
+                workers = self.workers or os.cpu_count()
+                if self.pool == 'thread':
+                    self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-hash')
+                else:
+                    self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker)
+            hashed = list(self._pool.map(make_password, plain, chunksize=max(1, len(plain) // 32)))
+        hashed = iter(hashed)
+        return [next(hashed) if password else make_password(None) for password in passwords]
+
+    @staticmethod
+    def add_error(result, line, username, errors):
+        result['failed'] += 1
+        result['errors'].append({'line': line, 'username': username, 'errors': errors})
+
+
+# ===== 导出 =====
+
+class _Echo:
+    """csv.writer 的伪文件对象，write 直接返回写入的行"""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(queryset, chunk_size=2000):
+    """按 FIELDS 逐个输出用户字典，角色按块预取"""
+    from .serializers.user import get_user_roles, prefetch_user_roles
+
+    # 查询集可能已带有角色预取（如 UserViewSet.get_queryset），先清除再统一预取
+    users = (
+        queryset.select_related('department')
+        .prefetch_related(None)
+        .prefetch_related(prefetch_user_roles())
+        .order_by('id')
+        .iterator(chunk_size=chunk_size)
+    )
+    for user in users:
+        yield {
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'email': user.email,
+            'phone': user.phone or '',
+            'department': user.department.code if user.department else '',
+            'roles': [user_role.role.code for user_role in get_user_roles(user)],
+            'data_scope': user.data_scope,
+            'is_active': user.is_active,
+        }
+
+
+def iter_export(queryset, file_type, chunk_size=2000):
+    """导出内容的文本片段迭代器，用于 StreamingHttpResponse 或逐段写入文件"""
+    rows = iter_export_rows(queryset, chunk_size=chunk_size)
+    if file_type == 'ndjson':
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+        return
+
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM，便于 Excel 识别 UTF-8
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        row['roles'] = ROLE_SEPARATOR.join(row['roles'])
+        yield writer.writerow([csv_safe(row[field]) for field in FIELDS])
@@ -1,6 +1,12 @@
 """
 RBAC工具模块
 """
+import hashlib
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -57,3 +63,62 @@ class ApiResponse:
             'data': None,
             'success': False
         }, status=status.HTTP_403_FORBIDDEN)
+
+
+def make_etag(*parts):
+    """由版本号等组成部分生成强 ETag"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag):
+    """请求头 If-None-Match 是否包含该 ETag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags
+
+
+def not_modified(etag):
+    """304 响应（不经过统一响应渲染，响应体为空）"""
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_safe(value):
+    """
+    CSV 导出的单元格值：以 = + - @（及制表符、回车）开头的字符串前加 '，
+    避免用电子表格打开时被当作公式执行；其他值原样返回
+    """
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_unescape(value):
+    """csv_safe 的逆操作，用于读取本系统导出的 CSV（如用户导出文件再导入）"""
+    if isinstance(value, str) and value.startswith("'") and value[1:].startswith(CSV_FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def count_subquery(queryset, field):
+    """
+    关联对象数量的相关子查询，用于 annotate
+
+    例如 Role.objects.annotate(user_count=count_subquery(UserRole.objects.all(), 'role'))。
+    与 Count() 不同，多个计数之间不会因 JOIN 相乘，也不需要对主表 GROUP BY。
+    """
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
@@ -0,0 +1,155 @@
+"""
+缓存版本总线 - 多worker之间同步进程内缓存
+
+每个进程内缓存对应一个命名版本号（如 'policy'）。数据变更后递增版本号，
+其他worker按固定间隔读取版本号，发现变化后重建本地快照。
+
+后端通过 settings.RBAC_VERSION_BACKEND 配置：
+- DatabaseVersionBackend: 版本号保存在 rbac_cache_version 表（默认）
+- FileVersionBackend: 版本号保存在本地文件，适用于单机多worker部署
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+POLICY_VERSION = 'policy'
+DEPARTMENT_VERSION = 'department'
+MENU_VERSION = 'menu'
+API_VERSION = 'api'
+USER_VERSION = 'user'
+
+
+def user_version_name(user_id):
+    """单个用户的版本号名称（用户快照按用户失效，见 rbac/authentication.py）"""
+    return f'{USER_VERSION}:{user_id}'
+
+
+class DatabaseVersionBackend:
+    """基于数据库的版本号存储"""
+
+    def get(self, name):
+        from .models import CacheVersion
+
+        version = CacheVersion.objects.filter(name=name).values_list('version', flat=True).first()
+        return version or 0
+
+    def bump(self, name):
+        """递增版本号并返回新值（同一事务内更新后再读取，行锁保证读到的是自己写入的值）"""
+        from .models import CacheVersion
+
+        with transaction.atomic():
+            updated = CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
+            if not updated:
+                _, created = CacheVersion.objects.get_or_create(name=name, defaults={'version': 1})
+                if not created:
+                    CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
+            return CacheVersion.objects.filter(name=name).values_list('version', flat=True).first()
+
+
+class FileVersionBackend:
+    """基于本地文件的版本号存储 - 每个版本一个文件，写入时加文件锁"""
+
+    def __init__(self, directory=None):
+        self.directory = str(directory or getattr(
+            settings, 'RBAC_VERSION_FILE_DIR', settings.BASE_DIR / 'cache_versions'
+        ))
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.version')
+
+    def get(self, name):
+        try:
+            with open(self._path(name)) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self, name):
+        """递增版本号并返回新值"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(name), 'a+') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    version = int(f.read().strip() or 0)
+                except ValueError:
+                    version = 0
+                f.seek(0)
+                f.truncate()
+                f.write(str(version + 1))
+                f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        return version + 1
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """获取配置的版本后端（进程内单例）"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(
+                    settings, 'RBAC_VERSION_BACKEND', 'rbac.versioning.DatabaseVersionBackend'
+                )
+                _backend = import_string(backend_path)()
+    return _backend
+
+
+def get_version(name):
+    """读取当前版本号"""
+    return get_backend().get(name)
+
+
+# 进程内版本号缓存: name -> (版本号, 下次检查时间)
+_local_versions = {}
+
+
+def get_cached_version(name):
+    """
+    读取版本号，每个进程每 RBAC_POLICY_CHECK_INTERVAL 秒最多访问一次后端
+
+    本进程通过 bump() 递增的版本号立即可见，其他 worker 的变更最多延迟一个间隔。
+    """
+    cached = _local_versions.get(name)
+    now = time.monotonic()
+    if cached is not None and now < cached[1]:
+        return cached[0]
+    version = get_version(name)
+    _local_versions[name] = (version, now + getattr(settings, 'RBAC_POLICY_CHECK_INTERVAL', 1))
+    return version
+
+
+def clear_cached_versions():
+    """清空进程内的版本号缓存，下次读取时访问后端"""
+    _local_versions.clear()
+
+
+def bump(name):
+    """立即递增版本号并返回新值"""
+    version = get_backend().bump(name)
+    _local_versions[name] = (version, time.monotonic() + getattr(settings, 'RBAC_POLICY_CHECK_INTERVAL', 1))
+    return version
+
+
+def bump_version(name):
+    """递增版本号，在当前事务提交后执行"""
+    transaction.on_commit(lambda: bump(name))
@@ -5,7 +5,7 @@ from .views.user import UserViewSet
 from .views.role import RoleViewSet
 from .views.department import DepartmentViewSet
 from .views.menu import MenuViewSet
-from .views.api import ApiGroupViewSet, ApiViewSet
+from .views.api import ApiGroupViewSet, ApiViewSet, ApiLogViewSet
 from .views.auth import (
     CustomTokenObtainPairView, CustomTokenRefreshView, 
     jwt_profile_view, user_menus_view
@@ -23,6 +23,7 @@ __all__ = [
     'MenuViewSet',
     'ApiGroupViewSet',
     'ApiViewSet',
+    'ApiLogViewSet',
     'CustomTokenObtainPairView',
     'CustomTokenRefreshView',
     'jwt_profile_view',
@@ -5,7 +5,7 @@ from .user import UserViewSet
 from .role import RoleViewSet
 from .department import DepartmentViewSet
 from .menu import MenuViewSet
-from .api import ApiGroupViewSet, ApiViewSet
+from .api import ApiGroupViewSet, ApiViewSet, ApiLogViewSet
 from .auth import (
     CustomTokenObtainPairView, CustomTokenRefreshView, 
     jwt_profile_view, user_menus_view
@@ -22,6 +22,7 @@ __all__ = [
     'MenuViewSet',
     'ApiGroupViewSet',
     'ApiViewSet',
+    'ApiLogViewSet',
     'CustomTokenObtainPairView',
     'CustomTokenRefreshView',
     'jwt_profile_view',
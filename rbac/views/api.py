@@ -1,14 +1,23 @@
 """
 API相关视图
 """
+import csv
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 
-from ..models import ApiGroup, Api
-from ..serializers import ApiGroupSerializer, ApiSerializer
-from ..utils import ApiResponse
+from ..models import ApiGroup, Api, ApiLog
+from ..serializers import ApiGroupSerializer, ApiSerializer, ApiLogSerializer
+from ..utils import ApiResponse, count_subquery, csv_safe
+from ..pagination import CachedCountPagination, KeysetPagination, page_size_stats
 from ..permissions import CasbinPermission
 
 
@@ -20,7 +29,9 @@ class ApiGroupViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """获取API分组查询集"""
-        return ApiGroup.objects.filter(is_active=True).order_by('sort_order', 'created_at')
+        return ApiGroup.objects.filter(is_active=True).annotate(
+            apis_count=count_subquery(Api.objects.all(), 'group')
+        ).order_by('sort_order', 'created_at')
 
 
 class ApiViewSet(viewsets.ModelViewSet):
@@ -28,25 +39,122 @@ class ApiViewSet(viewsets.ModelViewSet):
     model = Api
     serializer_class = ApiSerializer
     permission_classes = [CasbinPermission]
-    pagination_class = PageNumberPagination
+    pagination_class = CachedCountPagination
+    max_page_size = 1000  # 沿用原有的 page_size 上限
     
     def get_queryset(self):
         """获取API查询集"""
         return Api.objects.filter(is_active=True).select_related('group').order_by('group', 'path')
-    
-    def list(self, request, *args, **kwargs):
-        """重写list方法，支持动态page_size"""
-        # 获取page_size参数，如果没有则使用默认值
-        page_size = request.query_params.get('page_size')
-        if page_size:
-            try:
-                page_size = int(page_size)
-                # 限制最大page_size为1000，防止性能问题
-                if page_size > 1000:
-                    page_size = 1000
-                # 临时设置分页大小
-                self.pagination_class.page_size = page_size
-            except ValueError:
-                pass
-        
-        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], url_path='page-size-stats')
+    def page_size_report(self, request):
+        """
+        本进程内各视图请求的 page_size 统计
+
+        返回 {视图名: {requests, clamped, max_requested, histogram}}，clamped 为超过上限被截断的次数
+        """
+        return ApiResponse.success(data=page_size_stats.get_stats(), message='获取分页统计成功')
+
+
+class _Echo:
+    """csv.writer 的伪文件对象，write 直接返回写入的行"""
+
+    def write(self, value):
+        return value
+
+
+class ApiLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API日志视图集（只读）
+
+    列表使用 (created_at, id) 键集分页；导出以流式响应逐批读取，内存占用与导出条数无关。
+    """
+    model = ApiLog
+    serializer_class = ApiLogSerializer
+    permission_classes = [CasbinPermission]
+    pagination_class = KeysetPagination
+
+    EXPORT_FIELDS = [
+        'id', 'created_at', 'user_id', 'user__username', 'api_id', 'api__name', 'method', 'path',
+        'status_code', 'response_time', 'ip_address', 'user_agent',
+    ]
+    EXPORT_CHUNK_SIZE = 2000
+
+    def get_queryset(self):
+        """获取API日志查询集，筛选条件与 rbac_apilog_* 复合索引的前缀一致"""
+        queryset = ApiLog.objects.select_related('user', 'api')
+        params = self.request.query_params
+
+        for param, field in (('api_id', 'api_id'), ('user_id', 'user_id'), ('status_code', 'status_code')):
+            value = params.get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{field: int(value)})
+                except ValueError:
+                    raise ValidationError({param: '必须是整数'})
+
+        method = params.get('method')
+        if method:
+            queryset = queryset.filter(method=method.upper())
+
+        start_date = params.get('start_date')
+        if start_date:
+            queryset = queryset.filter(created_at__gte=self.parse_time(start_date, 'start_date'))
+        end_date = params.get('end_date')
+        if end_date:
+            queryset = queryset.filter(created_at__lte=self.parse_time(end_date, 'end_date', end_of_day=True))
+        return queryset
+
+    @staticmethod
+    def parse_time(value, param, end_of_day=False):
+        """解析 ISO 时间或日期；只有日期时 end_of_day 表示取当天结束"""
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValidationError({param: '时间格式错误'})
+            parsed = datetime.combine(day, time.max if end_of_day else time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        流式导出API日志
+
+        参数 file_type: csv（默认）或 ndjson，筛选参数与列表相同
+        """
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in ('csv', 'ndjson'):
+            return ApiResponse.error(message='file_type 只支持 csv 或 ndjson')
+
+        rows = (
+            self.get_queryset()
+            .order_by('-created_at', '-id')
+            .values_list(*self.EXPORT_FIELDS)
+            .iterator(chunk_size=self.EXPORT_CHUNK_SIZE)
+        )
+        if file_type == 'csv':
+            writer = csv.writer(_Echo())
+            content = self.iter_csv(writer, rows)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            content = self.iter_ndjson(rows)
+            content_type = 'application/x-ndjson; charset=utf-8'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f'api_logs_{timezone.localtime():%Y%m%d%H%M%S}.{file_type}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def iter_csv(self, writer, rows):
+        yield '\ufeff'  # BOM，便于 Excel 识别 UTF-8
+        yield writer.writerow(self.EXPORT_FIELDS)
+        for row in rows:
+            # 路径、User-Agent、请求数据来自客户端，需防止公式注入
+            yield writer.writerow([csv_safe(value) for value in row])
+
+    def iter_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(self.EXPORT_FIELDS, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
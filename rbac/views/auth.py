@@ -1,14 +1,23 @@
 """
 认证相关视图
 """
+from django.http import HttpResponse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
 
-from ..utils import ApiResponse
-from ..models import User, UserRole, Menu, RoleMenu
+from ..utils import ApiResponse, etag_matches, make_etag, not_modified
+from ..models import User, UserRole
+from ..menu_cache import get_menu_cache_key, get_menu_tree_bytes
+from ..authentication import add_authorization_claims, token_claims_enabled
+from ..login import last_login_buffer
+from ..middleware import get_client_ip
 
 
 def build_menu_tree(menus):
@@ -33,8 +42,8 @@ def build_menu_tree(menus):
             'menu_type': menu.menu_type,
             'menu_type_display': menu.menu_type_display,
             'permission_code': menu.permission_code,
-            'parent_id': menu.parent.id if menu.parent else None,
-            'parent_title': menu.parent.title if menu.parent else None,
+            'parent_id': menu.parent_id,
+            'parent_title': menu.parent.title if menu.parent_id else None,
             'sort_order': menu.sort_order,
             'is_hidden': menu.is_hidden,
             'is_keep_alive': menu.is_keep_alive,
@@ -43,7 +52,7 @@ def build_menu_tree(menus):
             'frame_src': menu.frame_src,
             'visible': menu.visible,
             'status': menu.status,
-            'children_count': menu.children.count(),
+            'children_count': menu.children_count if hasattr(menu, 'children_count') else menu.children.count(),
             'breadcrumb': [menu.title],
             'created_at': menu.created_at,
             'updated_at': menu.updated_at,
@@ -54,8 +63,8 @@ def build_menu_tree(menus):
     # 第二遍：构建父子关系 - 支持无限层级
     for menu in menus:
         menu_data = menu_map[menu.id]
-        if menu.parent:
-            parent_data = menu_map.get(menu.parent.id)
+        if menu.parent_id:
+            parent_data = menu_map.get(menu.parent_id)
             if parent_data:
                 parent_data['children'].append(menu_data)
         else:
@@ -101,9 +110,21 @@ def build_menu_tree(menus):
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """自定义JWT序列化器"""
     
+    @classmethod
+    def get_token(cls, user):
+        """开启 RBAC_TOKEN_CLAIMS 时在 token 中写入角色、数据权限等授权声明"""
+        token = super().get_token(user)
+        if token_claims_enabled():
+            add_authorization_claims(token, user)
+        return token
+    
     def validate(self, attrs):
         data = super().validate(attrs)
         
+        # 最后登录信息缓冲后批量写入（见 rbac/login.py），不在登录请求中执行 UPDATE
+        request = self.context.get('request')
+        last_login_buffer.record(self.user, get_client_ip(request) if request else None, timezone.now())
+        
         # 添加用户信息到响应中
         data['user'] = {
             'id': self.user.id,
@@ -126,9 +147,26 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """刷新 token 时重新生成授权声明（refresh token 中的声明可能已过期）"""
+    
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        
+        if token_claims_enabled():
+            access = AccessToken(data['access'])
+            user = User.objects.filter(pk=access[api_settings.USER_ID_CLAIM]).first()
+            # 与 CachedJWTAuthentication 一致：已删除或停用的用户不签发带授权声明的 token
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+            data['access'] = str(add_authorization_claims(access, user))
+        
+        return data
+
+
 class CustomTokenRefreshView(TokenRefreshView):
     """自定义JWT刷新视图"""
-    pass
+    serializer_class = CustomTokenRefreshSerializer
 
 
 @api_view(['GET'])
@@ -136,7 +174,8 @@ class CustomTokenRefreshView(TokenRefreshView):
 def jwt_profile_view(request):
     """JWT用户信息视图"""
     try:
-        user = request.user
+        # request.user 为认证缓存构造的用户对象（只含快照字段），这里一次查询取完整信息和部门
+        user = User.objects.select_related('department').get(pk=request.user.pk)
         
         # 获取用户角色
         user_roles = UserRole.objects.filter(user=user).select_related('role')
@@ -166,26 +205,20 @@ def jwt_profile_view(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_menus_view(request):
-    """用户菜单视图"""
+    """
+    用户菜单视图
+    
+    菜单树按角色集合缓存为已序列化的响应体（见 rbac/menu_cache.py），命中时不访问数据库
+    """
     try:
-        user = request.user
-        
-        if user.is_superuser:
-            # 超级用户返回所有菜单
-            menus = Menu.objects.filter(status=True, visible=True).order_by('sort_order')
-        else:
-            # 普通用户根据角色获取菜单
-            user_roles = UserRole.objects.filter(user=user).values_list('role_id', flat=True)
-            role_menus = RoleMenu.objects.filter(role_id__in=user_roles).values_list('menu_id', flat=True)
-            menus = Menu.objects.filter(
-                id__in=role_menus, 
-                status=True, 
-                visible=True
-            ).order_by('sort_order')
-        
-        # 构建菜单树形结构
-        menu_tree = build_menu_tree(menus)
+        # ETag 只取决于角色集合与菜单版本号，未变化时不生成菜单树
+        key = get_menu_cache_key(request.user)
+        etag = make_etag('menu', key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        return ApiResponse.success(data=menu_tree, message="获取用户菜单成功")
+        response = HttpResponse(get_menu_tree_bytes(key), content_type='application/json')
+        response['ETag'] = etag
+        return response
     except Exception as e:
         return ApiResponse.error(message="获取用户菜单失败")
@@ -5,10 +5,11 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from ..models import Department
+from ..models import Department, User
 from ..serializers import DepartmentSerializer
-from ..utils import ApiResponse
-from ..models import DataPermissionManager
+from ..utils import ApiResponse, count_subquery, etag_matches, make_etag, not_modified
+from ..data_scope import get_effective_scope
+from ..versioning import DEPARTMENT_VERSION, get_cached_version
 from ..permissions import CasbinPermission
 
 
@@ -21,66 +22,93 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """获取部门查询集"""
         queryset = Department.objects.select_related('parent')
+        if self.action not in ('list', 'tree'):
+            # 序列化器需要的子部门/用户数量（列表和树接口直接读取字段，不需要）
+            queryset = queryset.annotate(
+                children_count=count_subquery(Department.objects.all(), 'parent'),
+                user_count=count_subquery(User.objects.all(), 'department'),
+            )
         
-        # 应用数据权限过滤
+        # 应用数据权限过滤（有效数据权限在一次请求内只解析一次，见 rbac/data_scope.py）
         if hasattr(self.request, 'user') and self.request.user.is_authenticated:
-            # 对于Department模型，使用自定义过滤逻辑
-            user = self.request.user
-            if user.is_superuser:
-                return queryset
-            else:
-                # 根据用户的数据权限范围过滤
-                # 优先使用角色的数据权限，如果没有角色则使用用户的数据权限
-                data_scope = getattr(user, 'data_scope', 4)
-                
-                # 获取用户角色的最高数据权限
-                from ..models import UserRole
-                user_roles = UserRole.objects.filter(user=user).select_related('role')
-                if user_roles.exists():
-                    # 取角色中最高的数据权限（数字越小权限越高）
-                    role_data_scopes = [ur.role.data_scope for ur in user_roles]
-                    data_scope = min(role_data_scopes)
-                if data_scope == 1:  # 全部数据
-                    return queryset
-                elif data_scope == 2:  # 本部门及以下数据
-                    user_dept = getattr(user, 'department', None)
-                    if not user_dept:
-                        return queryset.none()
-                    dept_ids = [user_dept.id] + [child.id for child in user_dept.get_all_children()]
-                    return queryset.filter(id__in=dept_ids)
-                elif data_scope == 3:  # 本部门数据
-                    user_dept = getattr(user, 'department', None)
-                    if not user_dept:
-                        return queryset.none()
-                    return queryset.filter(id=user_dept.id)
-                else:  # 本人数据 - 部门没有创建人概念，返回空
-                    return queryset.none()
+            return get_effective_scope(self.request.user).filter_queryset(
+                queryset, department_field='id', user_field=None
+            )
         
         return queryset.none()
     
+    # 列表/树接口使用的字段
+    list_fields = [
+        'id', 'name', 'code', 'parent_id', 'level', 'sort_order',
+        'leader', 'phone', 'email', 'status', 'created_at', 'tree_path',
+    ]
+    
+    def get_tree_etag(self, kind):
+        """
+        部门数据的 ETag：部门版本号 + 当前用户可见范围
+        
+        部门的新增/修改/删除都会递增部门版本号（见 signals.py），
+        数据权限范围相同的用户看到的内容相同。
+        """
+        scope = get_effective_scope(self.request.user)
+        return make_etag('department', kind, get_cached_version(DEPARTMENT_VERSION), scope.scope, scope.department_id)
+    
+    def get_department_rows(self, *ordering):
+        """一次查询取出当前用户可见的部门（字典形式）"""
+        queryset = self.get_queryset()
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return list(queryset.values(*self.list_fields))
+    
     def list(self, request, *args, **kwargs):
         """获取部门列表"""
-        queryset = self.get_queryset()
-        departments = []
+        etag = self.get_tree_etag('list')
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        rows = self.get_department_rows()
+        names = {row['id']: row['name'] for row in rows}
+        
+        # 上级部门不在可见范围内时，补查一次祖先名称（用于父级路径和上级名称）
+        missing = {
+            int(dept_id)
+            for row in rows
+            for dept_id in row['tree_path'].strip('/').split('/')[:-1]
+            if dept_id and int(dept_id) not in names
+        }
+        if missing:
+            names.update(Department.objects.filter(id__in=missing).values_list('id', 'name'))
         
-        for dept in queryset:
+        # 按层级自上而下计算父级路径，每个部门只拼接一次
+        paths = {}
+        for row in sorted(rows, key=lambda item: item['tree_path'].count('/')):
+            parent_path = paths.get(row['parent_id'])
+            if parent_path is None:
+                ancestor_ids = [int(dept_id) for dept_id in row['tree_path'].strip('/').split('/')[:-1] if dept_id]
+                parent_path = ' > '.join(names[dept_id] for dept_id in ancestor_ids if dept_id in names)
+            paths[row['id']] = f"{parent_path} > {row['name']}" if parent_path else row['name']
+        
+        departments = []
+        for row in rows:
             departments.append({
-                'id': dept.id,
-                'name': dept.name,
-                'code': dept.code,
-                'parent_id': dept.parent.id if dept.parent else None,
-                'parent_name': dept.parent.name if dept.parent else None,
-                'level': dept.level,
-                'sort_order': dept.sort_order,
-                'leader': dept.leader,
-                'phone': dept.phone,
-                'email': dept.email,
-                'status': dept.status,
-                'created_at': dept.created_at,
-                'path': dept.get_parent_path(),
+                'id': row['id'],
+                'name': row['name'],
+                'code': row['code'],
+                'parent_id': row['parent_id'],
+                'parent_name': names.get(row['parent_id']),
+                'level': row['level'],
+                'sort_order': row['sort_order'],
+                'leader': row['leader'],
+                'phone': row['phone'],
+                'email': row['email'],
+                'status': row['status'],
+                'created_at': row['created_at'],
+                'path': paths[row['id']],
             })
         
-        return ApiResponse.success(data=departments, message="获取部门列表成功")
+        response = ApiResponse.success(data=departments, message="获取部门列表成功")
+        response['ETag'] = etag
+        return response
     
     @action(detail=True, methods=['get'])
     def children(self, request, pk=None):
@@ -108,24 +136,30 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """获取部门树"""
-        def build_tree(departments, parent_id=None):
-            tree = []
-            for dept in departments:
-                if dept.parent_id == parent_id:
-                    children = build_tree(departments, dept.id)
-                    tree.append({
-                        'id': dept.id,
-                        'name': dept.name,
-                        'code': dept.code,
-                        'level': dept.level,
-                        'sort_order': dept.sort_order,
-                        'leader': dept.leader,
-                        'status': dept.status,
-                        'children': children
-                    })
-            return tree
+        etag = self.get_tree_etag('tree')
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        nodes = {}
+        for row in self.get_department_rows('sort_order', 'level'):
+            nodes[row['id']] = {
+                'id': row['id'],
+                'name': row['name'],
+                'code': row['code'],
+                'level': row['level'],
+                'sort_order': row['sort_order'],
+                'leader': row['leader'],
+                'status': row['status'],
+                'parent_id': row['parent_id'],
+                'children': [],
+            }
         
-        departments = list(self.get_queryset().order_by('sort_order', 'level'))
-        tree_data = build_tree(departments)
+        # 按父ID挂载；上级不在可见范围内的部门作为根节点
+        tree_data = []
+        for node in nodes.values():
+            parent = nodes.get(node.pop('parent_id'))
+            (parent['children'] if parent else tree_data).append(node)
         
-        return ApiResponse.success(data=tree_data, message="获取部门树成功")
+        response = ApiResponse.success(data=tree_data, message="获取部门树成功")
+        response['ETag'] = etag
+        return response
@@ -22,7 +22,7 @@ class MenuViewSet(viewsets.ModelViewSet):
         return Menu.objects.filter(
             status=True,
             menu_type__in=[1, 2]  # 1=目录, 2=菜单, 3=按钮
-        ).order_by('sort_order', 'created_at')
+        ).select_related('parent').order_by('sort_order', 'created_at')
     
     @action(detail=False, methods=['get'])
     def tree(self, request):
@@ -7,9 +7,32 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 
 from ..models import Role, PolicyRule, RoleMenu
+from ..permission_sync import sync_role_apis, sync_role_menus
+from ..route_matcher import RouteMatcher
+from ..serializers import RoleApiPermissionSerializer, RoleMenuPermissionSerializer
 from ..utils import ApiResponse
 
 
+def get_role_api_list(role):
+    """获取角色已授权的API - 策略路径按模式匹配（支持 {id}、*、**），共两次查询"""
+    from ..models import Api
+    
+    policies = PolicyRule.objects.filter(role_id=role.role_id).values_list('method', 'path')
+    matcher = RouteMatcher((method, path, role.role_id) for method, path in policies)
+    
+    apis = []
+    for api in Api.objects.all():
+        if matcher.match(api.method, api.path):
+            apis.append({
+                'id': api.id,
+                'name': api.name,
+                'path': api.path,
+                'method': api.method,
+                'description': api.description or 'API已删除或不存在'
+            })
+    return apis
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_role_api_permissions(request, role_id):
@@ -17,26 +40,7 @@ def get_role_api_permissions(request, role_id):
     try:
         role = get_object_or_404(Role, id=role_id)
         
-        # 获取角色的权限策略
-        policies = PolicyRule.objects.filter(role_id=role.role_id)
-        
-        # 获取API信息
-        from ..models import Api
-        apis = []
-        for policy in policies:
-            # 模糊匹配API路径
-            matching_apis = Api.objects.filter(
-                path__icontains=policy.path.replace('*', ''),
-                method__iexact=policy.method
-            )
-            for api in matching_apis:
-                apis.append({
-                    'id': api.id,
-                    'name': api.name,
-                    'path': api.path,
-                    'method': api.method,
-                    'description': api.description or 'API已删除或不存在'
-                })
+        apis = get_role_api_list(role)
         
         return ApiResponse.success(data=apis, message="获取API权限成功")
     except Exception as e:
@@ -47,30 +51,14 @@ def get_role_api_permissions(request, role_id):
 @permission_classes([IsAuthenticated])
 def assign_role_api_permissions(request, role_id):
     """分配角色的API权限"""
+    serializer = RoleApiPermissionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
     try:
         role = get_object_or_404(Role, id=role_id)
-        api_ids = request.data.get('api_ids', [])
         
-        # 去重
-        api_ids = list(set(api_ids))
+        result = sync_role_apis(role, serializer.validated_data['api_ids'])
         
-        # 删除现有权限
-        PolicyRule.objects.filter(role_id=role.role_id).delete()
-        
-        # 添加新权限
-        from ..models import Api
-        for api_id in api_ids:
-            try:
-                api = Api.objects.get(id=api_id)
-                PolicyRule.objects.create(
-                    role_id=role.role_id,
-                    path=api.path,
-                    method=api.method
-                )
-            except Api.DoesNotExist:
-                continue
-        
-        return ApiResponse.success(message="API权限分配成功")
+        return ApiResponse.success(data=result, message="API权限分配成功")
     except Exception as e:
         return ApiResponse.error(message="API权限分配失败")
 
@@ -114,25 +102,13 @@ def get_role_menu_permissions(request, role_id):
 @permission_classes([IsAuthenticated])
 def assign_role_menu_permissions(request, role_id):
     """分配角色的菜单权限"""
+    serializer = RoleMenuPermissionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
     try:
         role = get_object_or_404(Role, id=role_id)
-        menu_ids = request.data.get('menu_ids', [])
-        
-        # 去重
-        menu_ids = list(set(menu_ids))
-        
-        # 删除现有权限
-        RoleMenu.objects.filter(role=role).delete()
         
-        # 添加新权限
-        for menu_id in menu_ids:
-            try:
-                from ..models import Menu
-                menu = Menu.objects.get(id=menu_id)
-                RoleMenu.objects.create(role=role, menu=menu)
-            except Menu.DoesNotExist:
-                continue
+        result = sync_role_menus(role, serializer.validated_data['menu_ids'])
         
-        return ApiResponse.success(message="菜单权限分配成功")
+        return ApiResponse.success(data=result, message="菜单权限分配成功")
     except Exception as e:
         return ApiResponse.error(message="菜单权限分配失败")
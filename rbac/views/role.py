@@ -5,13 +5,15 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from ..models import Role
+from ..models import Role, UserRole
 from ..serializers import (
     RoleListSerializer, RoleDetailSerializer, RoleCreateSerializer,
-    RoleUpdateSerializer
+    RoleUpdateSerializer, RoleApiPermissionSerializer, RoleUsersSerializer
 )
-from ..utils import ApiResponse
+from ..utils import ApiResponse, count_subquery
 from ..permissions import CasbinPermission
+from ..permission_sync import assign_role_to_users, remove_role_from_users, sync_role_apis
+from .permission import get_role_api_list
 
 
 class RoleViewSet(viewsets.ModelViewSet):
@@ -20,6 +22,10 @@ class RoleViewSet(viewsets.ModelViewSet):
     serializer_class = RoleListSerializer
     permission_classes = [CasbinPermission]
     
+    def get_queryset(self):
+        """获取角色查询集，用户数量在同一条查询中统计"""
+        return super().get_queryset().annotate(user_count=count_subquery(UserRole.objects.all(), 'role'))
+    
     def get_serializer_class(self):
         """根据动作返回不同的序列化器"""
         if self.action == 'create':
@@ -35,27 +41,7 @@ class RoleViewSet(viewsets.ModelViewSet):
         """获取角色的API权限"""
         role = self.get_object()
         
-        # 获取角色的权限策略
-        from ..models import PolicyRule
-        policies = PolicyRule.objects.filter(role_id=role.role_id)
-        
-        # 获取API信息
-        from ..models import Api
-        apis = []
-        for policy in policies:
-            # 模糊匹配API路径
-            matching_apis = Api.objects.filter(
-                path__icontains=policy.path.replace('*', ''),
-                method__iexact=policy.method
-            )
-            for api in matching_apis:
-                apis.append({
-                    'id': api.id,
-                    'name': api.name,
-                    'path': api.path,
-                    'method': api.method,
-                    'description': api.description or 'API已删除或不存在'
-                })
+        apis = get_role_api_list(role)
         
         return ApiResponse.success(data=apis, message="获取API权限成功")
     
@@ -63,28 +49,31 @@ class RoleViewSet(viewsets.ModelViewSet):
     def assign_api_permissions(self, request, pk=None):
         """分配角色的API权限"""
         role = self.get_object()
-        api_ids = request.data.get('api_ids', [])
+        serializer = RoleApiPermissionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # 去重
-        api_ids = list(set(api_ids))
+        result = sync_role_apis(role, serializer.validated_data['api_ids'])
         
-        # 删除现有权限
-        from ..models import PolicyRule
+        return ApiResponse.success(data=result, message="API权限分配成功")
+    
+    @action(detail=True, methods=['post'], url_path='assign-users')
+    def assign_users(self, request, pk=None):
+        """批量为用户分配该角色"""
+        role = self.get_object()
+        serializer = RoleUsersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # 删除数据库中的权限
-        PolicyRule.objects.filter(role_id=role.role_id).delete()
+        result = assign_role_to_users(role, serializer.validated_data['user_ids'])
+        
+        return ApiResponse.success(data=result, message="角色分配成功")
+    
+    @action(detail=True, methods=['post'], url_path='remove-users')
+    def remove_users(self, request, pk=None):
+        """批量移除用户的该角色"""
+        role = self.get_object()
+        serializer = RoleUsersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # 添加新权限
-        from ..models import Api
-        for api_id in api_ids:
-            try:
-                api = Api.objects.get(id=api_id)
-                PolicyRule.objects.create(
-                    role_id=role.role_id,
-                    path=api.path,
-                    method=api.method
-                )
-            except Api.DoesNotExist:
-                continue
+        result = remove_role_from_users(role, serializer.validated_data['user_ids'])
         
-        return ApiResponse.success(message="API权限分配成功")
+        return ApiResponse.success(data=result, message="角色移除成功")
@@ -1,8 +1,13 @@
 """
 用户相关视图
 """
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 
@@ -11,9 +16,12 @@ from ..serializers import (
     UserListSerializer, UserDetailSerializer, UserCreateSerializer,
     UserUpdateSerializer, UserPasswordResetSerializer
 )
+from ..serializers.user import prefetch_user_roles
 from ..utils import ApiResponse
-from ..models import DataPermissionManager
+from ..data_scope import get_effective_scope
+from ..pagination import CachedCountPagination
 from ..permissions import CasbinPermission
+from ..user_transfer import FILE_TYPES, UserImporter, get_import_settings, iter_export, iter_rows
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -24,6 +32,7 @@ class UserViewSet(viewsets.ModelViewSet):
     update_serializer_class = UserUpdateSerializer
     detail_serializer_class = UserDetailSerializer
     permission_classes = [CasbinPermission]
+    pagination_class = CachedCountPagination
     
     def get_serializer_class(self):
         """根据动作返回不同的序列化器"""
@@ -37,41 +46,13 @@ class UserViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """获取用户查询集"""
-        queryset = User.objects.select_related('department').prefetch_related('userrole_set__role')
+        queryset = User.objects.select_related('department').prefetch_related(prefetch_user_roles())
         
-        # 应用数据权限过滤
+        # 应用数据权限过滤（有效数据权限在一次请求内只解析一次，见 rbac/data_scope.py）
         if hasattr(self.request, 'user') and self.request.user.is_authenticated:
-            # 对于User模型，使用自定义过滤逻辑
-            user = self.request.user
-            if user.is_superuser:
-                return queryset
-            else:
-                # 根据用户的数据权限范围过滤
-                # 优先使用角色的数据权限，如果没有角色则使用用户的数据权限
-                data_scope = getattr(user, 'data_scope', 4)
-                
-                # 获取用户角色的最高数据权限
-                from ..models import UserRole
-                user_roles = UserRole.objects.filter(user=user).select_related('role')
-                if user_roles.exists():
-                    # 取角色中最高的数据权限（数字越小权限越高）
-                    role_data_scopes = [ur.role.data_scope for ur in user_roles]
-                    data_scope = min(role_data_scopes)
-                if data_scope == 1:  # 全部数据
-                    return queryset
-                elif data_scope == 2:  # 本部门及以下数据
-                    user_dept = getattr(user, 'department', None)
-                    if not user_dept:
-                        return queryset.none()
-                    dept_ids = [user_dept.id] + [child.id for child in user_dept.get_all_children()]
-                    return queryset.filter(department_id__in=dept_ids)
-                elif data_scope == 3:  # 本部门数据
-                    user_dept = getattr(user, 'department', None)
-                    if not user_dept:
-                        return queryset.none()
-                    return queryset.filter(department=user_dept)
-                else:  # 本人数据
-                    return queryset.filter(id=user.id)
+            return get_effective_scope(self.request.user).filter_queryset(
+                queryset, department_field='department_id', user_field='id'
+            )
         
         return queryset.none()
     
@@ -87,6 +68,58 @@ class UserViewSet(viewsets.ModelViewSet):
         else:
             return ApiResponse.error(message="密码重置失败", data=serializer.errors)
     
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_users(self, request):
+        """
+        批量导入用户
+
+        上传字段 file（CSV 或 NDJSON，格式见 rbac/user_transfer.py），可选参数：
+        file_type（默认按文件扩展名）、default_password、dry_run
+
+        每次最多导入 RBAC_IMPORT_MAX_ROWS 行（先读取并计数，超出时不导入任何行），
+        更大的文件使用 import_users 管理命令
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return ApiResponse.error(message="请上传导入文件")
+        file_type = request.data.get('file_type') or upload.name.rsplit('.', 1)[-1].lower()
+        if file_type not in FILE_TYPES:
+            return ApiResponse.error(message="file_type 只支持 csv 或 ndjson")
+
+        max_rows = get_import_settings()['max_rows']
+        rows = list(islice(iter_rows(upload.file, file_type), max_rows + 1))
+        if len(rows) > max_rows:
+            return ApiResponse.error(message=f"单次最多导入 {max_rows} 行，请拆分文件或使用 import_users 命令")
+
+        # 密码哈希在线程池中计算：不在多线程的 worker 进程中 fork 进程池
+        with UserImporter(
+            pool='thread',
+            default_password=request.data.get('default_password') or None,
+            dry_run=request.data.get('dry_run') in ('1', 'true'),
+        ) as importer:
+            result = importer.run(rows)
+
+        return ApiResponse.success(data=result, message=f"导入完成：成功 {result['created']} 条，失败 {result['failed']} 条")
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        流式导出用户（数据权限范围内），导出文件可直接用于导入
+
+        参数 file_type: csv（默认）或 ndjson
+        """
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in FILE_TYPES:
+            return ApiResponse.error(message="file_type 只支持 csv 或 ndjson")
+
+        content_type = 'text/csv' if file_type == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(
+            iter_export(self.get_queryset(), file_type), content_type=f'{content_type}; charset=utf-8'
+        )
+        filename = f'users_{timezone.localtime():%Y%m%d%H%M%S}.{file_type}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
     @action(detail=True, methods=['post'], url_path='set_custom_scope')
     def set_custom_scope(self, request, pk=None):
         """设置用户自定义数据权限"""